@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Client throughput benchmark against the mock LeekWars API
+
+Starts mock_leekwars_api.py in-process, points every client at it through
+LEEKWARS_API_URL and times our request pipelines end to end. Nothing touches
+leekwars.com and all fight databases/archives/manifests go to a temp dir.
+
+Scenarios:
+    multi     lw_solo_fights_multi.py: concurrent starts, harvest and DB writes
+    harvest   FightHarvester draining started fights into the archive
+    sync      sync_fight_logs.py: history diff + download of missing fights
+    upload    upload_v8.py: full upload, then a no-change re-upload
+
+Usage: python3 bench_clients.py [--scenarios multi upload] [--fights 40] [--latency 50] [--rate-limit 5]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from mock_leekwars_api import MockAPIHandler, start_server
+
+SCRIPT_DIR = Path(__file__).parent
+V8_DIR = SCRIPT_DIR.parent / "V8_modules"
+
+
+def bench_multi(args, workdir):
+    from lw_solo_fights_multi import LeekWarsMultiLeekFighter
+    fighter = LeekWarsMultiLeekFighter(rate=args.rate, harvest_workers=args.workers, quiet=True,
+                                       db_dir=str(workdir))
+    fighter.login("bench", "bench")
+    fighter.run_multi_leek_fights(args.fights, strategy="smart")
+    return len(fighter.fights_run), "fights"
+
+
+def bench_harvest(args, workdir):
+    from fight_archive import FightArchive
+    from fight_harvester import FightHarvester
+    from lw_solo_fights_db import LeekWarsSmartFighterDB
+    from rate_limiter import RateLimiter, RateLimitedSession
+
+    fighter = LeekWarsSmartFighterDB()
+    fighter.session = RateLimitedSession(RateLimiter(args.rate))
+    fighter.login("bench", "bench")
+    leek_ids = list(fighter.leeks)
+
+    harvester = FightHarvester(fighter.session, max_workers=args.workers,
+                               archive=FightArchive(str(workdir / "archive")))
+    for i in range(args.fights):
+        leek_id = leek_ids[i % len(leek_ids)]
+        opponent = fighter.get_leek_opponents(leek_id)[0]
+        fight_id = fighter.start_solo_fight(leek_id, opponent['id'])
+        if fight_id:
+            harvester.submit(fight_id, str(leek_id))
+    harvester.wait_all()
+    harvester.shutdown()
+    return harvester.successful, "fights"
+
+
+def bench_sync(args, workdir):
+    if not (workdir / "archive").exists():
+        bench_harvest(args, workdir)
+        # Start from an empty archive so every listed fight is missing
+        os.rename(workdir / "archive", workdir / "archive_seed")
+
+    from sync_fight_logs import FightLogSync
+    syncer = FightLogSync(str(workdir / "archive"), rate=args.rate, workers=args.workers, db_dir=str(workdir))
+    syncer.login("bench", "bench")
+    for leek in syncer.leeks.values():
+        syncer.sync_leek(leek, use_db=True)
+    return syncer.archive.stats()["fights"], "fights"
+
+
+def bench_upload(args, workdir):
+    from upload_v8 import V8Uploader
+    total = 0
+    for _ in range(2):
+        uploader = V8Uploader(workdir / "upload_manifest.json", workers=args.workers, rate=args.rate)
+        uploader.login("bench", "bench")
+        uploader.create_v8_structure(V8_DIR)
+        total += sum(1 for _ in V8_DIR.rglob("*.lk"))
+    return total, "modules (2 runs)"
+
+
+SCENARIOS = {
+    "multi": bench_multi,
+    "harvest": bench_harvest,
+    "sync": bench_sync,
+    "upload": bench_upload,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the API clients against the mock server')
+    parser.add_argument('--scenarios', nargs='+', choices=list(SCENARIOS), default=list(SCENARIOS),
+                        help='Scenarios to run (default: all)')
+    parser.add_argument('--fights', type=int, default=40, help='Fights per fight scenario (default: 40)')
+    parser.add_argument('--rate', type=float, default=8.0, help='Client request budget per second (default: 8)')
+    parser.add_argument('--workers', type=int, default=4, help='Client worker threads (default: 4)')
+    parser.add_argument('--latency', type=float, default=50, help='Mock latency per request in ms (default: 50)')
+    parser.add_argument('--jitter', type=float, default=20, help='Mock random extra latency in ms (default: 20)')
+    parser.add_argument('--fight-delay', type=float, default=1.0, help='Mock fight generation time in s (default: 1)')
+    parser.add_argument('--error-rate', type=float, default=0, help='Random 429 fraction (default: 0)')
+    parser.add_argument('--rate-limit', type=float, default=0, help='Mock per-client requests/s (default: unlimited)')
+    parser.add_argument('--verbose', action='store_true', help='Show client output')
+    args = parser.parse_args()
+
+    server, base_url = start_server(port=0, fight_delay=args.fight_delay, latency=args.latency / 1000.0,
+                                    jitter=args.jitter / 1000.0, error_rate=args.error_rate,
+                                    rate_limit=args.rate_limit, fights=100000, seed=42)
+    # Clients read the API URL when they are imported
+    os.environ["LEEKWARS_API_URL"] = base_url
+
+    print("="*60)
+    print("CLIENT BENCHMARK (mock API)")
+    print("="*60)
+    print(f"Server: {base_url} (latency {args.latency:.0f}±{args.jitter:.0f} ms, "
+          f"429 rate {args.error_rate:.0%}, limit {args.rate_limit or '∞'}/s)")
+    print(f"Client: {args.rate:.1f} requests/s budget, {args.workers} workers\n")
+
+    rows = []
+    with tempfile.TemporaryDirectory(prefix="lw_bench_") as tmp:
+        workdir = Path(tmp)
+        for name in args.scenarios:
+            before = dict(MockAPIHandler.stats)
+            start = time.monotonic()
+            output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+            try:
+                with output:
+                    done, unit = SCENARIOS[name](args, workdir)
+            except Exception as e:
+                print(f"❌ {name}: {e}")
+                continue
+            elapsed = time.monotonic() - start
+            requests_made = MockAPIHandler.stats["total"] - before.get("total", 0)
+            throttled = MockAPIHandler.stats["429"] - before.get("429", 0)
+            rows.append((name, done, unit, elapsed, requests_made, throttled))
+            print(f"✅ {name}: {done} {unit} in {elapsed:.1f}s")
+
+    server.shutdown()
+
+    print("\n" + "="*60)
+    print(f"{'Scenario':<10} {'Items':>6} {'Time':>8} {'Items/s':>8} {'Requests':>9} {'Req/s':>7} {'429s':>5}")
+    print("-"*60)
+    for name, done, unit, elapsed, requests_made, throttled in rows:
+        print(f"{name:<10} {done:>6} {elapsed:>7.1f}s {done / elapsed:>8.2f} {requests_made:>9} "
+              f"{requests_made / elapsed:>7.1f} {throttled:>5}")
+    print("="*60)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
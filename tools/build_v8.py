@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+V8 build - Minified (optionally bundled) copy of the V8 modules for deployment
+
+Never touches V8_modules: every module reachable from main.lk through
+include('...') is tokenized (string-aware, so '//' inside strings is kept),
+stripped of comments, indentation and blank lines, and written to build/.
+Line breaks are kept because LeekScript statements end at them.
+
+Outputs:
+    build/V8_modules/...   same layout as the sources, includes untouched
+    build/main.lk          with --bundle: every module inlined once, in
+                           include order, into a single AI
+
+--profile <build> specializes the AI for one leek build (see
+fold_weight_profiles) and defaults the output to build/<build>/.
+
+Usage:
+    python3 build_v8.py               # build/V8_modules
+    python3 build_v8.py --bundle      # build/main.lk
+    python3 build_v8.py --bundle --profile magic   # build/magic/main.lk
+    python3 upload_v8.py --build      # build, then upload the minified modules
+    python3 local_test.py 10 dummy_str --leek KurtGodel --build
+"""
+
+import argparse
+import re
+import shutil
+import sys
+from pathlib import Path
+
+from lk_includes import resolve_include
+
+SCRIPT_DIR = Path(__file__).parent
+PROJECT_DIR = SCRIPT_DIR.parent
+SOURCE_DIR = PROJECT_DIR / "V8_modules"
+BUILD_DIR = PROJECT_DIR / "build"
+ENTRY = "main.lk"
+WEIGHTS_MODULE = "weight_profiles.lk"
+# Profiles main.lk switches to in boss fights, whatever the build
+BOSS_PROFILES = ("BOSS_PUZZLE", "BOSS_COMBAT")
+
+TOKEN_PATTERN = re.compile(r"""
+    (?P<newline>\n)
+  | (?P<space>[ \t\r\f\v]+)
+  | (?P<comment>//[^\n]*|/\*.*?(?:\*/|\Z))
+  | (?P<string>'(?:[^'\\\n]|\\.)*'|"(?:[^"\\\n]|\\.)*")
+  | (?P<word>\w+)
+  | (?P<op>.)
+""", re.VERBOSE | re.DOTALL)
+
+
+def tokenize(code, name="<source>"):
+    """Split LeekScript source into (kind, text) tokens"""
+    tokens = []
+    for match in TOKEN_PATTERN.finditer(code):
+        kind, text = match.lastgroup, match.group()
+        if kind == "op" and text in "'\"":
+            line = code.count("\n", 0, match.start()) + 1
+            raise ValueError(f"{name}:{line}: unterminated string")
+        tokens.append((kind, text))
+    return tokens
+
+
+# Operator characters that can combine into a different token ('- -' vs '--')
+FUSING_OPERATORS = set("+-*/%=<>!&|^~?:.@")
+
+
+def _spacing_class(char):
+    """'word' for identifiers, numbers and strings, 'op' for fusing operators"""
+    if char.isalnum() or char in "_'\"":
+        return "word"
+    return "op" if char in FUSING_OPERATORS else None
+
+
+def minify(tokens):
+    """Drop comments, indentation and blank lines; keep one space only where
+    removing it would merge two tokens (words, or operators like '- -')"""
+    lines, line = [], []
+    previous = None
+    separated = False
+
+    for kind, text in tokens:
+        if kind == "newline" or (kind == "comment" and "\n" in text):
+            if line:
+                lines.append("".join(line))
+                line = []
+            previous = None
+            separated = False
+        elif kind in ("space", "comment"):
+            separated = True
+        else:
+            if (previous and separated and _spacing_class(text[0])
+                    and _spacing_class(previous[-1]) == _spacing_class(text[0])):
+                line.append(" ")
+            line.append(text)
+            previous = text
+            separated = False
+
+    if line:
+        lines.append("".join(line))
+    return "\n".join(lines) + "\n"
+
+
+def render(tokens):
+    """Tokens back to source, unchanged"""
+    return "".join(text for _, text in tokens)
+
+
+def find_includes(tokens):
+    """(start, end, target) of each include('...') statement, end exclusive
+    and covering an optional trailing ';'"""
+    significant = [i for i, (kind, _) in enumerate(tokens) if kind not in ("space", "comment", "newline")]
+    includes = []
+    for n, i in enumerate(significant):
+        window = [tokens[j] for j in significant[n:n + 4]]
+        if (len(window) == 4 and window[0] == ("word", "include") and window[1][1] == "("
+                and window[2][0] == "string" and window[3][1] == ")"):
+            end = significant[n + 3] + 1
+            if n + 4 < len(significant) and tokens[significant[n + 4]][1] == ";":
+                end = significant[n + 4] + 1
+            includes.append((i, end, window[2][1][1:-1]))
+    return includes
+
+
+def load_modules(source_dir=SOURCE_DIR, entry=ENTRY):
+    """Tokenize every module reachable from the entry point, keyed by relative path"""
+    source_dir = Path(source_dir)
+    modules = {}
+    pending = [entry]
+    while pending:
+        key = pending.pop()
+        if key in modules:
+            continue
+        path = source_dir / key
+        if not path.exists():
+            raise FileNotFoundError(f"{key} (included from the V8 sources) not found in {source_dir}")
+        with open(path, 'r', encoding='utf-8') as f:
+            modules[key] = tokenize(f.read(), key)
+        pending.extend(resolve_include(key, target) for _, _, target in find_includes(modules[key]))
+    return modules
+
+
+def bundle(modules, entry=ENTRY):
+    """Inline includes into one token stream; each module appears once, at its first include"""
+    seen = set()
+    output = []
+
+    def inline(key):
+        seen.add(key)
+        tokens = modules[key]
+        position = 0
+        for start, end, target in find_includes(tokens):
+            output.extend(tokens[position:start])
+            dependency = resolve_include(key, target)
+            if dependency not in seen:
+                output.append(("newline", "\n"))
+                inline(dependency)
+                output.append(("newline", "\n"))
+            position = end
+        output.extend(tokens[position:])
+
+    inline(entry)
+    return output
+
+
+def _significant(tokens):
+    """Indices of the tokens that are not whitespace or comments"""
+    return [i for i, (kind, _) in enumerate(tokens) if kind not in ("space", "comment", "newline")]
+
+
+def _matching(tokens, significant, n):
+    """Position in `significant` of the bracket closing the one at significant[n]"""
+    pairs = {"(": ")", "[": "]", "{": "}"}
+    opening = tokens[significant[n]][1]
+    depth = 0
+    for m in range(n, len(significant)):
+        text = tokens[significant[m]][1]
+        if text == opening:
+            depth += 1
+        elif text == pairs[opening]:
+            depth -= 1
+            if depth == 0:
+                return m
+    raise ValueError(f"unbalanced '{opening}'")
+
+
+def _number(tokens):
+    """Text of a (possibly negative) number literal, None for anything else"""
+    texts = [text for kind, text in tokens if kind not in ("space", "comment", "newline")]
+    literal = "".join(texts)
+    try:
+        float(literal)
+    except ValueError:
+        return None
+    return literal
+
+
+def parse_weight_profiles(tokens):
+    """{NAME: {key: number literal}} for each global NAME_WEIGHTS = [...] map literal"""
+    significant = _significant(tokens)
+    profiles = {}
+    for n, i in enumerate(significant[:-3]):
+        name = tokens[significant[n + 1]][1]
+        if (tokens[i] != ("word", "global") or not name.endswith("_WEIGHTS")
+                or tokens[significant[n + 3]][1] != "["):
+            continue
+        close = _matching(tokens, significant, n + 3)
+        entries = {}
+        m = n + 4
+        while m < close:
+            key = tokens[significant[m]]
+            end = m + 2
+            while end < close and tokens[significant[end]][1] != ",":
+                end += 1
+            if key[0] == "string" and tokens[significant[m + 1]][1] == ":":
+                entries[key[1][1:-1]] = _number(tokens[significant[m + 2]:significant[end - 1] + 1])
+            m = end + 1
+        profiles[name[:-len("_WEIGHTS")]] = entries
+    return profiles
+
+
+def written_map_keys(modules):
+    """String keys assigned anywhere with x['key'] = / += / *= ..."""
+    keys = set()
+    for tokens in modules.values():
+        significant = _significant(tokens)
+        texts = [tokens[i][1] for i in significant]
+        for n in range(len(texts) - 3):
+            if texts[n] != "[" or tokens[significant[n + 1]][0] != "string" or texts[n + 2] != "]":
+                continue
+            after = texts[n + 3:n + 5]
+            if (after[:1] == ["="] and after[1:] != ["="]) or (len(after) == 2 and after[0] in "+-*/%" and after[1] == "="):
+                keys.add(texts[n + 1][1:-1])
+    return keys
+
+
+def fold_weight_profiles(profile):
+    """Build pass specializing the AI for one build's weight profile
+
+    getWeightsForBuild() always returns <PROFILE>_WEIGHTS, so the other build
+    profiles become unreferenced and are dropped. A this.getWeight('key', d)
+    call is replaced by a constant only when every map a scorer can hold
+    agrees on it: the chosen profile, the boss profiles, and no map at all
+    (scorers built with null weights, which answer d). Keys that
+    adaptWeightsToSituation() or anything else writes at runtime are never
+    folded.
+    """
+    profile = profile.upper()
+
+    def fold(modules):
+        if WEIGHTS_MODULE not in modules:
+            raise ValueError(f"{WEIGHTS_MODULE} is not included from {ENTRY}")
+        profiles = parse_weight_profiles(modules[WEIGHTS_MODULE])
+        if profile not in profiles:
+            names = ", ".join(name.lower() for name in profiles if name not in BOSS_PROFILES)
+            raise ValueError(f"unknown profile '{profile.lower()}' (available: {names})")
+
+        candidates = [profiles[profile]] + [profiles[name] for name in BOSS_PROFILES if name in profiles] + [{}]
+        written = written_map_keys(modules)
+        folded = {}
+        modules = dict(modules)
+
+        # 1. Replace this.getWeight('key', default) calls that can only have one value
+        for key_path, tokens in modules.items():
+            significant = _significant(tokens)
+            output = []
+            position = 0
+            for n in range(2, len(significant) - 3):
+                if (tokens[significant[n]] != ("word", "getWeight") or tokens[significant[n - 1]][1] != "."
+                        or tokens[significant[n - 2]] != ("word", "this") or tokens[significant[n + 1]][1] != "("
+                        or tokens[significant[n + 2]][0] != "string" or tokens[significant[n + 3]][1] != ","):
+                    continue
+                if significant[n - 2] < position:
+                    continue
+                key = tokens[significant[n + 2]][1][1:-1]
+                if key in written:
+                    continue
+                close = _matching(tokens, significant, n + 1)
+                default_tokens = tokens[significant[n + 4]:significant[close]]
+                default = _number(default_tokens)
+                if any(key in weights and weights[key] is None for weights in candidates):
+                    continue
+                values = {weights.get(key, default) for weights in candidates}
+                if len(values) != 1:
+                    continue
+                value = values.pop()
+                replacement = [("word", value)] if value is not None else default_tokens
+                output.extend(tokens[position:significant[n - 2]])
+                output.extend([("op", "(")] + replacement + [("op", ")")])
+                position = significant[close] + 1
+                folded[key] = folded.get(key, 0) + 1
+            if position:
+                modules[key_path] = output + tokens[position:]
+
+        # 2. getWeightsForBuild() only ever answers the chosen profile
+        tokens = modules[WEIGHTS_MODULE]
+        significant = _significant(tokens)
+        for n in range(len(significant) - 2):
+            if tokens[significant[n]] == ("word", "function") and tokens[significant[n + 1]] == ("word", "getWeightsForBuild"):
+                body = next(m for m in range(n + 2, len(significant)) if tokens[significant[m]][1] == "{")
+                close = _matching(tokens, significant, body)
+                tokens = (tokens[:significant[body] + 1]
+                          + [("newline", "\n"), ("word", "return"), ("space", " "), ("word", f"{profile}_WEIGHTS"), ("newline", "\n")]
+                          + tokens[significant[close]:])
+                break
+
+        # 3. Drop profile globals nothing references any more
+        def references(name):
+            return sum(1 for module in modules.values() for token in module if token == ("word", name))
+
+        modules[WEIGHTS_MODULE] = tokens
+        dropped = []
+        for name in profiles:
+            variable = f"{name}_WEIGHTS"
+            tokens = modules[WEIGHTS_MODULE]
+            if references(variable) != 1:
+                continue
+            significant = _significant(tokens)
+            n = next(n for n in range(len(significant) - 1)
+                     if tokens[significant[n]] == ("word", "global") and tokens[significant[n + 1]] == ("word", variable))
+            close = _matching(tokens, significant, n + 3)
+            modules[WEIGHTS_MODULE] = tokens[:significant[n]] + tokens[significant[close] + 1:]
+            dropped.append(name.lower())
+
+        print(f"⚖️  Profile {profile.lower()}: folded {sum(folded.values())} getWeight calls "
+              f"({', '.join(sorted(folded)) or 'none'}), dropped {len(dropped)} profiles")
+        return modules
+
+    return fold
+
+
+def build(source_dir=SOURCE_DIR, out_dir=BUILD_DIR, bundled=False, minified=True, passes=(), entry=ENTRY):
+    """Build the V8 AI into out_dir and return (entry path, stats)
+
+    passes are callables taking and returning the {module: tokens} dict,
+    applied before bundling/minifying.
+    """
+    out_dir = Path(out_dir)
+    modules = load_modules(source_dir, entry)
+    bytes_in = sum(len(render(tokens).encode('utf-8')) for tokens in modules.values())
+    for build_pass in passes:
+        modules = build_pass(modules)
+
+    emit = minify if minified else render
+    if bundled:
+        outputs = {entry: emit(bundle(modules, entry))}
+        target_dir = out_dir
+    else:
+        outputs = {key: emit(tokens) for key, tokens in modules.items()}
+        target_dir = out_dir / "V8_modules"
+        # Start clean so deleted sources don't linger in the build
+        shutil.rmtree(target_dir, ignore_errors=True)
+
+    for key, code in outputs.items():
+        path = target_dir / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(code)
+
+    stats = {
+        "modules": len(modules),
+        "files": len(outputs),
+        "bytes_in": bytes_in,
+        "bytes_out": sum(len(code.encode('utf-8')) for code in outputs.values()),
+    }
+    return target_dir / entry, stats
+
+
+def print_stats(entry_path, stats):
+    saved = 1 - stats["bytes_out"] / stats["bytes_in"] if stats["bytes_in"] else 0.0
+    print(f"🔨 Built {stats['modules']} modules into {stats['files']} file(s): {entry_path}")
+    print(f"   {stats['bytes_in'] / 1024:.1f} KB -> {stats['bytes_out'] / 1024:.1f} KB ({saved:.0%} smaller)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build minified V8 modules for deployment')
+    parser.add_argument('--src', default=str(SOURCE_DIR), help='Source modules (default: V8_modules)')
+    parser.add_argument('--out', default=None, help='Output directory (default: build)')
+    parser.add_argument('--bundle', action='store_true', help='Inline every include into a single main.lk')
+    parser.add_argument('--no-minify', action='store_true', help='Keep comments and formatting')
+    parser.add_argument('--profile', default=None,
+                        help='Specialize for one build weight profile, e.g. strength or magic (output: build/<profile>)')
+    args = parser.parse_args()
+
+    passes = [fold_weight_profiles(args.profile)] if args.profile else []
+    out_dir = args.out or (BUILD_DIR / args.profile.lower() if args.profile else BUILD_DIR)
+
+    try:
+        entry_path, stats = build(args.src, out_dir, bundled=args.bundle, minified=not args.no_minify, passes=passes)
+    except (OSError, ValueError) as e:
+        print(f"❌ Build failed: {e}")
+        return 1
+
+    print_stats(entry_path, stats)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
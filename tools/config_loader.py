@@ -10,6 +10,16 @@ Usage:
 
     # Load specific account
     email, password = load_credentials(account="cure")
+
+    # All configured account names
+    accounts = list_accounts()
+
+    # API endpoints (LEEKWARS_API_URL / LEEKWARS_WS_URL or config.json
+    # "api_url" / "ws_url" override the real server, e.g. for mock_leekwars_api.py)
+    BASE_URL = get_api_url()
+
+    # Unified fight database (LEEKWARS_FIGHT_DB or config.json "fight_db")
+    db_path = get_fight_db_path()
 """
 
 import json
@@ -18,6 +28,11 @@ import sys
 from pathlib import Path
 
 
+DEFAULT_API_URL = "https://leekwars.com/api"
+DEFAULT_WS_URL = "wss://leekwars.com/ws"
+DEFAULT_FIGHT_DB = str(Path(__file__).parent.parent / "data" / "fight_history.db")
+
+
 def get_config_path():
     """Get the path to config.json"""
     # Get the tools directory (where this script is located)
@@ -87,6 +102,53 @@ def load_credentials(account="main"):
     return email, password
 
 
+def list_accounts():
+    """List the account names configured in config.json
+
+    Returns:
+        list: Account names in config order (e.g. ["main", "cure"])
+    """
+    config = load_config()
+
+    if "accounts" not in config:
+        print("❌ Missing 'accounts' section in config.json")
+        sys.exit(1)
+
+    return list(config["accounts"].keys())
+
+
+def _endpoint(env_var, config_key, default):
+    """Environment variable, then optional config.json key, then the real server"""
+    value = os.environ.get(env_var)
+    if value:
+        return value.rstrip("/")
+    config_path = get_config_path()
+    if config_path.exists():
+        try:
+            with open(config_path, 'r') as f:
+                value = json.load(f).get(config_key)
+        except (OSError, json.JSONDecodeError):
+            value = None
+        if value:
+            return value.rstrip("/")
+    return default
+
+
+def get_api_url():
+    """Base URL of the LeekWars API (LEEKWARS_API_URL or config.json "api_url")"""
+    return _endpoint("LEEKWARS_API_URL", "api_url", DEFAULT_API_URL)
+
+
+def get_ws_url():
+    """URL of the LeekWars WebSocket (LEEKWARS_WS_URL or config.json "ws_url")"""
+    return _endpoint("LEEKWARS_WS_URL", "ws_url", DEFAULT_WS_URL)
+
+
+def get_fight_db_path():
+    """Path of the fight database shared by all leeks (LEEKWARS_FIGHT_DB or config.json "fight_db")"""
+    return os.path.expanduser(_endpoint("LEEKWARS_FIGHT_DB", "fight_db", DEFAULT_FIGHT_DB))
+
+
 if __name__ == "__main__":
     # Test the config loader
     print("Testing config loader...")
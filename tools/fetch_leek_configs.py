@@ -5,34 +5,39 @@ Fetch leek configurations from the LeekWars API and save to leek_configs.json.
 Retrieves exact stats (HP, TP, MP, all stats, weapon IDs, chip IDs) for each
 leek in the account. Also defines dummy opponents for local testing.
 
+Leek details go through the metadata cache (data/cache/leek_<id>.json, 1h
+TTL, conditional revalidation) and are fetched concurrently.
+
 Usage:
-    python3 tools/fetch_leek_configs.py [--account main]
+    python3 tools/fetch_leek_configs.py [--account main] [--force]
 """
 
 import json
 import sys
-import time
 import argparse
-import requests
 from pathlib import Path
-from config_loader import load_credentials
+from config_loader import load_credentials, get_api_url
+from metadata_cache import MetadataCache
+from rate_limiter import RateLimiter, RateLimitedSession
 
 
-BASE_URL = "https://leekwars.com/api"
+BASE_URL = get_api_url()
 SCRIPT_DIR = Path(__file__).parent
 OUTPUT_FILE = SCRIPT_DIR / "leek_configs.json"
 
 
 
-def fetch_leek_details(session, leek_id):
-    """Fetch full leek details including weapons and chips."""
-    url = f"{BASE_URL}/leek/get/{leek_id}"
-    resp = session.get(url)
-    if resp.status_code != 200:
-        print(f"  WARNING: Failed to fetch leek {leek_id}: HTTP {resp.status_code}")
-        return None
-    data = resp.json()
-    return data.get("leek", data)
+def fetch_leek_details(cache, leek_ids):
+    """Fetch full leek details (weapons, chips, stats) for all leeks concurrently."""
+    results = cache.get_many({f"leek_{leek_id}": f"{BASE_URL}/leek/get/{leek_id}" for leek_id in leek_ids})
+    details = {}
+    for leek_id in leek_ids:
+        data, _ = results[f"leek_{leek_id}"]
+        if data is None:
+            print(f"  WARNING: Failed to fetch leek {leek_id}")
+            continue
+        details[leek_id] = data.get("leek", data)
+    return details
 
 
 def extract_weapon_ids(weapons_list):
@@ -69,11 +74,12 @@ def extract_chip_ids(chips_list):
 def main():
     parser = argparse.ArgumentParser(description="Fetch leek configs from LeekWars API")
     parser.add_argument("--account", default="main", help="Account name (default: main)")
+    parser.add_argument("--force", action="store_true", help="Revalidate cached leek details now")
     args = parser.parse_args()
 
     email, password = load_credentials(account=args.account)
 
-    session = requests.Session()
+    session = RateLimitedSession(RateLimiter(4.0))
     print(f"Logging in as {args.account}...")
     resp = session.post(f"{BASE_URL}/farmer/login-token", data={
         "login": email,
@@ -99,15 +105,17 @@ def main():
 
     print(f"Found {len(leeks_map)} leek(s), fetching details...")
 
+    cache = MetadataCache(session, force=args.force)
+    details = fetch_leek_details(cache, list(leeks_map))
+    print(f"  {cache.summary()}")
+
     leek_configs = {}
     for leek_id, leek_summary in leeks_map.items():
         name = leek_summary.get("name", f"Leek_{leek_id}")
-        print(f"  Fetching {name} (ID: {leek_id})...")
-
-        detail = fetch_leek_details(session, leek_id)
+        detail = details.get(leek_id)
         if not detail:
             continue
-        time.sleep(0.5)  # Rate limit protection
+        print(f"  {name} (ID: {leek_id})")
 
         # Convert API format to generator IDs
         raw_weapons = detail.get("weapons", [])
@@ -3,8 +3,13 @@
 Fetch weapons and chips data from LeekWars market API
 Saves comprehensive data to JSON file for reference
 
+Responses are cached in data/cache (see metadata_cache.py): within the TTL
+nothing is requested (not even a login), afterwards the data is revalidated
+with conditional requests and market_data.json is only rewritten when it
+actually changed.
+
 Usage:
-    python3 fetch_market_data.py [--account <name>]
+    python3 fetch_market_data.py [--account <name>] [--force]
 """
 
 import requests
@@ -12,9 +17,10 @@ import json
 import sys
 import argparse
 from pathlib import Path
-from config_loader import load_credentials
+from config_loader import load_credentials, get_api_url
+from metadata_cache import MetadataCache
 
-BASE_URL = "https://leekwars.com/api"
+BASE_URL = get_api_url()
 
 def login(email, password):
     """Login to LeekWars and return session + token"""
@@ -35,33 +41,17 @@ def login(email, password):
     print("❌ Login failed")
     return None, None
 
-def fetch_weapons(session, token):
-    """Fetch all weapons data"""
-    print("\n📥 Fetching weapons data...")
+def fetch_item_data(cache, token, kind):
+    """Fetch all weapons or chips data through the cache; returns (data, changed)"""
+    print(f"\n📥 Fetching {kind} data...")
     headers = {"Authorization": f"Bearer {token}"}
-    response = session.get(f"{BASE_URL}/weapon/get-all", headers=headers)
+    data, changed = cache.get(kind, f"{BASE_URL}/{kind[:-1]}/get-all", headers=headers)
 
-    if response.status_code == 200:
-        data = response.json()
-        print(f"   ✅ Retrieved weapons data")
-        return data.get("weapons", {})
-    else:
-        print(f"   ❌ Failed: {response.status_code}")
-        return {}
-
-def fetch_chips(session, token):
-    """Fetch all chips data"""
-    print("\n📥 Fetching chips data...")
-    headers = {"Authorization": f"Bearer {token}"}
-    response = session.get(f"{BASE_URL}/chip/get-all", headers=headers)
-
-    if response.status_code == 200:
-        data = response.json()
-        print(f"   ✅ Retrieved chips data")
-        return data.get("chips", {})
-    else:
-        print(f"   ❌ Failed: {response.status_code}")
-        return {}
+    if data is None:
+        print(f"   ❌ Failed to retrieve {kind} data")
+        return {}, False
+    print(f"   ✅ Retrieved {kind} data" + ("" if changed else " (unchanged)"))
+    return data.get(kind, {}), changed
 
 def format_weapon_data(weapon):
     """Format weapon data for easy reference"""
@@ -105,6 +95,8 @@ def main():
     parser = argparse.ArgumentParser(description='Fetch LeekWars market data')
     parser.add_argument('--account', default='main', choices=['main', 'cure'],
                         help='Account to use (main or cure, default: main)')
+    parser.add_argument('--force', action='store_true',
+                        help='Revalidate cached data even if its TTL has not expired')
     args = parser.parse_args()
 
     print("="*60)
@@ -112,22 +104,36 @@ def main():
     print("="*60)
     print(f"👤 Account: {args.account}")
 
+    script_dir = Path(__file__).parent.parent
+    output_file = script_dir / "data" / "market_data.json"
+    cache = MetadataCache(force=args.force)
+
+    if output_file.exists() and cache.is_fresh("weapons") and cache.is_fresh("chips"):
+        print(f"\n✅ Market data is fresh (cached) - {output_file} kept")
+        print("   Use --force to revalidate now")
+        return
+
     # Login
     email, password = load_credentials(account=args.account)
     session, token = login(email, password)
 
     if not session:
         sys.exit(1)
+    cache.session = session
 
     try:
         # Fetch weapons and chips separately
-        weapons_data = fetch_weapons(session, token)
-        chips_data = fetch_chips(session, token)
+        weapons_data, weapons_changed = fetch_item_data(cache, token, "weapons")
+        chips_data, chips_changed = fetch_item_data(cache, token, "chips")
 
         if not weapons_data and not chips_data:
             print("❌ Failed to fetch any data")
             sys.exit(1)
 
+        if output_file.exists() and not weapons_changed and not chips_changed:
+            print(f"\n⏭️  Market data unchanged ({cache.summary()}) - {output_file} kept")
+            return
+
         # Process and format data
         print("\n📊 Processing data...")
 
@@ -151,15 +157,12 @@ def main():
         print(f"   ✅ Processed {len(formatted_data['chips'])} chips")
 
         # Save to file in data/ folder
-        script_dir = Path(__file__).parent.parent
-        data_dir = script_dir / "data"
-        data_dir.mkdir(exist_ok=True)
-
-        output_file = data_dir / "market_data.json"
+        output_file.parent.mkdir(exist_ok=True)
         with open(output_file, 'w', encoding='utf-8') as f:
             json.dump(formatted_data, f, indent=2, ensure_ascii=False)
 
         print(f"\n💾 Data saved to: {output_file}")
+        print("   Run generate_item_database.py to refresh item_database.lk")
 
         # Print summary
         print("\n" + "="*60)
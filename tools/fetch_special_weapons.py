@@ -1,32 +1,23 @@
 #!/usr/bin/env python3
 """
 Fetch weapon data for special/seasonal weapons not in market API.
-Uses the LeekWars game constants API.
+Uses the LeekWars game constants API (cached in data/cache, see metadata_cache.py).
 """
 
 import json
 import requests
-from config_loader import load_credentials
+from pathlib import Path
+from config_loader import load_credentials, get_api_url
+from metadata_cache import MetadataCache
 
-def fetch_special_weapons():
-    """Fetch weapon data from LeekWars constants API"""
-    print("=" * 60)
-    print("LEEKWARS SPECIAL WEAPONS FETCHER")
-    print("=" * 60)
-
-    # Missing weapon IDs from KurtGodel
-    missing_ids = [41, 42, 43, 44, 45, 46, 47, 48, 60, 107, 108, 109,
-                   115, 116, 117, 118, 119, 151, 153, 175, 180, 182,
-                   184, 187, 225, 226, 277, 278, 408, 409, 410, 428]
-
-    print(f"\n📥 Fetching data for {len(missing_ids)} special weapons...")
+MARKET_DATA_PATH = Path(__file__).parent.parent / "data" / "market_data.json"
 
-    # Load credentials
+def fetch_constants(cache, constants_url):
+    """Log in and fetch the game constants through the cache"""
     email, password = load_credentials(account='main')
 
-    # Login
     session = requests.Session()
-    base_url = "https://leekwars.com/api"
+    base_url = get_api_url()
 
     print("🔐 Logging in...")
     login_response = session.post(
@@ -41,15 +32,38 @@ def fetch_special_weapons():
     farmer = login_response.json().get('farmer', {})
     print(f"✅ Logged in as: {farmer.get('login')}")
 
-    # Fetch constants
     print("\n📥 Fetching game constants...")
-    constants_response = session.get(f"{base_url}/constant/get-all")
-
-    if constants_response.status_code != 200:
+    cache.session = session
+    constants, _ = cache.get("constants", constants_url)
+    if constants is None:
         print("❌ Failed to fetch constants")
-        return None
+    return constants
+
+def fetch_special_weapons(force=False):
+    """Fetch weapon data from LeekWars constants API"""
+    print("=" * 60)
+    print("LEEKWARS SPECIAL WEAPONS FETCHER")
+    print("=" * 60)
+
+    # Missing weapon IDs from KurtGodel
+    missing_ids = [41, 42, 43, 44, 45, 46, 47, 48, 60, 107, 108, 109,
+                   115, 116, 117, 118, 119, 151, 153, 175, 180, 182,
+                   184, 187, 225, 226, 277, 278, 408, 409, 410, 428]
+
+    print(f"\n📥 Fetching data for {len(missing_ids)} special weapons...")
 
-    constants = constants_response.json()
+    base_url = get_api_url()
+    cache = MetadataCache(force=force)
+    constants_url = f"{base_url}/constant/get-all"
+
+    # Constants only need a login when the cached copy has expired
+    if cache.is_fresh("constants"):
+        print("\n📥 Using cached game constants...")
+        constants, _ = cache.get("constants", constants_url)
+    else:
+        constants = fetch_constants(cache, constants_url)
+    if constants is None:
+        return None
 
     # Navigate nested structure
     if 'constants' in constants:
@@ -90,23 +104,28 @@ def fetch_special_weapons():
         print(f"⚠️  Still missing: {sorted(missing_from_api)}")
 
     # Load existing market data
-    market_data_path = '/home/ubuntu/LeekWars-AI/data/market_data.json'
-    with open(market_data_path, 'r') as f:
+    with open(MARKET_DATA_PATH, 'r') as f:
         market_data = json.load(f)
 
-    # Merge special weapons
+    # Merge special weapons, rewriting the file only if something changed
     original_count = len(market_data['weapons'])
+    if all(market_data['weapons'].get(weapon_id) == data for weapon_id, data in special_weapons.items()):
+        print("\n⏭️  market_data.json already up to date")
+        return special_weapons
     market_data['weapons'].update(special_weapons)
     new_count = len(market_data['weapons'])
 
     # Save updated data
-    with open(market_data_path, 'w') as f:
+    with open(MARKET_DATA_PATH, 'w') as f:
         json.dump(market_data, f, indent=2)
 
-    print(f"\n💾 Updated market_data.json")
+    print("\n💾 Updated market_data.json")
     print(f"   Weapons: {original_count} → {new_count} (+{new_count - original_count})")
 
     return special_weapons
 
 if __name__ == '__main__':
-    fetch_special_weapons()
+    import argparse
+    parser = argparse.ArgumentParser(description='Merge special weapons from the constants API into market_data.json')
+    parser.add_argument('--force', action='store_true', help='Revalidate cached constants now')
+    fetch_special_weapons(force=parser.parse_args().force)
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Fight Archive - Compressed append-only storage for fight data and logs
+
+Replaces the two pretty-printed JSON files per fight under fight_logs/ with
+a handful of segment files. Every document is appended as its own compressed
+member (gzip, or a zstd frame when the `zstandard` package is installed), and
+an append-only index maps (fight_id, kind) to (segment, offset, length) for
+random access.
+
+Layout (default root: fight_logs/archive):
+    index.tsv            fight_id  kind  group  segment  offset  length
+    segment_00001.gz     concatenated gzip members
+    segment_00002.zst    ... (one codec per segment, chosen at creation)
+
+Usage:
+    from fight_archive import FightArchive
+
+    archive = FightArchive()
+    archive.put(fight_id, "data", fight_data, group="team_composition_123")
+    fight_data = archive.get(fight_id, "data")
+
+CLI:
+    python3 fight_archive.py import fight_logs [--remove]
+    python3 fight_archive.py get <fight_id> [--kind logs]
+    python3 fight_archive.py stats
+"""
+
+import argparse
+import gzip
+import json
+import os
+import re
+import sys
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+DEFAULT_ROOT = "fight_logs/archive"
+SEGMENT_SIZE = 64 * 1024 * 1024  # Roll over to a new segment after 64 MB
+INDEX_FILE = "index.tsv"
+LOCK_FILE = ".lock"
+
+FIGHT_FILE_PATTERN = re.compile(r"^(\d+)_(data|logs)\.json$")
+
+
+class FightArchive:
+    def __init__(self, root=DEFAULT_ROOT, segment_size=SEGMENT_SIZE, codec=None):
+        """Open (or create) an archive; codec is 'zst' or 'gz' (default: zst if available)"""
+        self.root = root
+        self.segment_size = segment_size
+        self.codec = codec or ("zst" if zstandard else "gz")
+        if self.codec == "zst" and zstandard is None:
+            print("   ⚠️ zstandard not installed - using gzip segments")
+            self.codec = "gz"
+
+        os.makedirs(root, exist_ok=True)
+        self.index_path = os.path.join(root, INDEX_FILE)
+        self.lock = threading.Lock()
+        self.index = {}
+        self.index_position = 0
+        self.index_stat = None
+        self.segments = []
+        self._load_segments()
+        self.refresh()
+
+    # ---------- index ----------
+
+    def _load_segments(self):
+        names = [n for n in os.listdir(self.root) if n.startswith("segment_")]
+        self.segments = sorted(names)
+
+    def _stat_index(self):
+        """(inode, mtime, size) of index.tsv, or None if it does not exist yet"""
+        try:
+            stat = os.stat(self.index_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def refresh(self):
+        """Read index lines appended since the last refresh (e.g. by another process)"""
+        previous, self.index_stat = self.index_stat, self._stat_index()
+        if self.index_stat is None:
+            return
+        if (previous and previous[0] != self.index_stat[0]) or self.index_stat[2] < self.index_position:
+            # The index was replaced or truncated rather than appended to: read it again
+            self.index = {}
+            self.index_position = 0
+        with open(self.index_path, "rb") as f:
+            f.seek(self.index_position)
+            while True:
+                line = f.readline()
+                if not line.endswith(b"\n"):
+                    break  # Partial line from a concurrent writer - re-read next time
+                self.index_position = f.tell()
+                parts = line.decode("utf-8").rstrip("\n").split("\t")
+                if len(parts) != 6:
+                    continue
+                fight_id, kind, group, segment, offset, length = parts
+                # Later entries win, so re-archived fights point at the newest copy
+                self.index[(int(fight_id), kind)] = (group, segment, int(offset), int(length))
+
+    # ---------- compression ----------
+
+    def _compress(self, raw, codec):
+        if codec == "zst":
+            return zstandard.ZstdCompressor(level=10).compress(raw)
+        return gzip.compress(raw, compresslevel=6)
+
+    def _decompress(self, blob, codec):
+        if codec == "zst":
+            if zstandard is None:
+                raise RuntimeError("zstandard is required to read .zst segments")
+            return zstandard.ZstdDecompressor().decompress(blob)
+        return gzip.decompress(blob)
+
+    @staticmethod
+    def _segment_codec(segment):
+        return "zst" if segment.endswith(".zst") else "gz"
+
+    # ---------- writing ----------
+
+    def _current_segment(self, incoming):
+        """Segment to append to, rolling over when full or on codec change"""
+        if self.segments:
+            segment = self.segments[-1]
+            path = os.path.join(self.root, segment)
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            if self._segment_codec(segment) == self.codec and size + incoming <= self.segment_size:
+                return segment
+            number = int(segment.split("_")[1].split(".")[0]) + 1
+        else:
+            number = 1
+        segment = f"segment_{number:05d}.{self.codec}"
+        self.segments.append(segment)
+        return segment
+
+    def put(self, fight_id, kind, document, group=""):
+        """Append one document (kind: 'data' or 'logs'); returns its index entry"""
+        raw = json.dumps(document, separators=(",", ":")).encode("utf-8")
+        blob = self._compress(raw, self.codec)
+        group = str(group).replace("\t", " ")
+
+        with self.lock, open(os.path.join(self.root, LOCK_FILE), "a") as lock_file:
+            if fcntl:
+                # Serialize appends across processes sharing the archive
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self.refresh()
+                self._load_segments()
+                segment = self._current_segment(len(blob))
+                with open(os.path.join(self.root, segment), "ab") as f:
+                    offset = f.tell()
+                    f.write(blob)
+                entry = (group, segment, offset, len(blob))
+                line = f"{int(fight_id)}\t{kind}\t{group}\t{segment}\t{offset}\t{len(blob)}\n"
+                with open(self.index_path, "ab") as f:
+                    f.write(line.encode("utf-8"))
+                    self.index_position = f.tell()
+                self.index_stat = self._stat_index()
+                self.index[(int(fight_id), kind)] = entry
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+        return entry
+
+    # ---------- reading ----------
+
+    def _entry(self, fight_id, kind):
+        """Index entry of a document, re-reading index.tsv on a miss if it changed on disk"""
+        key = (int(fight_id), kind)
+        entry = self.index.get(key)
+        if entry is None and self._stat_index() != self.index_stat:
+            with self.lock:
+                self.refresh()
+            entry = self.index.get(key)
+        return entry
+
+    def has(self, fight_id, kind="data"):
+        return self._entry(fight_id, kind) is not None
+
+    def get(self, fight_id, kind="data"):
+        """Random-access read of one document; None if not archived"""
+        entry = self._entry(fight_id, kind)
+        if entry is None:
+            return None
+        group, segment, offset, length = entry
+        with open(os.path.join(self.root, segment), "rb") as f:
+            f.seek(offset)
+            blob = f.read(length)
+        return json.loads(self._decompress(blob, self._segment_codec(segment)))
+
+    def fight_ids(self, kind="data", group=None):
+        """Sorted ids of archived fights, optionally limited to one group"""
+        return sorted(fid for (fid, k), entry in self.index.items()
+                      if k == kind and (group is None or entry[0] == group))
+
+    def iter_fights(self, kind="data", group=None):
+        """Yield (fight_id, document) in fight id order"""
+        for fight_id in self.fight_ids(kind, group):
+            yield fight_id, self.get(fight_id, kind)
+
+    def stats(self):
+        """Counts and on-disk size of the archive"""
+        size = sum(os.path.getsize(os.path.join(self.root, s))
+                   for s in self.segments if os.path.exists(os.path.join(self.root, s)))
+        groups = {}
+        for (fid, kind), entry in self.index.items():
+            if kind == "data":
+                groups[entry[0]] = groups.get(entry[0], 0) + 1
+        return {
+            "fights": sum(1 for (fid, kind) in self.index if kind == "data"),
+            "logs": sum(1 for (fid, kind) in self.index if kind == "logs"),
+            "segments": len(self.segments),
+            "bytes": size,
+            "groups": groups
+        }
+
+    # ---------- migration ----------
+
+    def import_directory(self, directory, remove=False, verbose=True):
+        """Import <fight>_data.json / <fight>_logs.json files found under directory
+
+        The group of each fight is its directory relative to `directory`
+        (e.g. "team_composition_123" or "boss_2/4567"). Files already in the
+        archive are skipped; with remove=True imported files are deleted.
+        """
+        archive_root = os.path.abspath(self.root)
+        imported = skipped = failed = 0
+        saved_bytes = 0
+
+        for dirpath, dirnames, filenames in os.walk(directory):
+            if os.path.abspath(dirpath).startswith(archive_root):
+                dirnames[:] = []
+                continue
+            group = os.path.relpath(dirpath, directory)
+            group = "" if group == "." else group.replace(os.sep, "/")
+
+            for filename in sorted(filenames):
+                match = FIGHT_FILE_PATTERN.match(filename)
+                if not match:
+                    continue
+                fight_id, kind = int(match.group(1)), match.group(2)
+                path = os.path.join(dirpath, filename)
+
+                if self.has(fight_id, kind):
+                    skipped += 1
+                else:
+                    try:
+                        with open(path, "r") as f:
+                            document = json.load(f)
+                    except (OSError, json.JSONDecodeError) as e:
+                        if verbose:
+                            print(f"   ⚠️ Skipping {path}: {e}")
+                        failed += 1
+                        continue
+                    entry = self.put(fight_id, kind, document, group)
+                    saved_bytes += os.path.getsize(path) - entry[3]
+                    imported += 1
+                    if verbose and imported % 1000 == 0:
+                        print(f"   Progress: {imported} files imported")
+
+                if remove:
+                    os.remove(path)
+
+        if remove:
+            # Drop the directories we emptied
+            for dirpath, dirnames, filenames in os.walk(directory, topdown=False):
+                if os.path.abspath(dirpath).startswith(archive_root) or os.path.abspath(dirpath) == os.path.abspath(directory):
+                    continue
+                if not os.listdir(dirpath):
+                    os.rmdir(dirpath)
+
+        return {"imported": imported, "skipped": skipped, "failed": failed, "saved_bytes": saved_bytes}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compressed fight archive')
+    parser.add_argument('--root', default=DEFAULT_ROOT, help=f'Archive directory (default: {DEFAULT_ROOT})')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = subparsers.add_parser('import', help='Import existing *_data.json / *_logs.json files')
+    import_parser.add_argument('directory', nargs='?', default='fight_logs', help='Directory to scan (default: fight_logs)')
+    import_parser.add_argument('--remove', action='store_true', help='Delete the JSON files once archived')
+
+    get_parser = subparsers.add_parser('get', help='Print one archived document')
+    get_parser.add_argument('fight_id', type=int)
+    get_parser.add_argument('--kind', choices=['data', 'logs'], default='data')
+
+    subparsers.add_parser('stats', help='Show archive statistics')
+
+    args = parser.parse_args()
+    archive = FightArchive(args.root)
+
+    if args.command == 'import':
+        print(f"📦 Importing {args.directory}/ into {args.root}/ ({archive.codec})...")
+        result = archive.import_directory(args.directory, remove=args.remove)
+        print(f"✅ Imported: {result['imported']} files")
+        print(f"   Already archived: {result['skipped']}")
+        if result['failed']:
+            print(f"   ❌ Unreadable: {result['failed']}")
+        print(f"   💾 Saved: {result['saved_bytes'] / (1024 * 1024):.1f} MB")
+
+    elif args.command == 'get':
+        document = archive.get(args.fight_id, args.kind)
+        if document is None:
+            print(f"❌ Fight {args.fight_id} ({args.kind}) not in archive")
+            return 1
+        json.dump(document, sys.stdout, indent=2)
+        print()
+
+    elif args.command == 'stats':
+        stats = archive.stats()
+        print(f"📦 Archive: {args.root}/")
+        print(f"   Fights: {stats['fights']} (with logs: {stats['logs']})")
+        print(f"   Segments: {stats['segments']} ({stats['bytes'] / (1024 * 1024):.1f} MB)")
+        for group, count in sorted(stats['groups'].items()):
+            print(f"   - {group or '(root)'}: {count}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
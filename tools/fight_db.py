@@ -2,22 +2,162 @@
 """
 FightDatabase - SQLite-based fight tracking system for LeekWars
 Tracks opponent statistics, win rates, and provides smart opponent selection
+
+All leeks share one database (data/fight_history.db by default, see
+config_loader.get_fight_db_path); every row carries its leek_id, so
+FightDatabase(leek_id) is a per-leek view and the cross-leek queries compare
+our leeks against the same opponent. Old fight_history_<leek_id>.db files are
+imported with migrate_fight_dbs.py.
+
+Per-leek rollups (fights per day, per opponent level bucket, opponents per
+status) are kept up to date in the same transaction as each recorded fight,
+so overview stats cost the same however long the history is.
+
+Databases run in WAL mode so readers (opponent selection) never block the
+writer. Concurrent harvesters should not write directly: they feed one
+FightDatabaseWriter thread, which records each drained batch per leek in a
+single transaction (record_fights).
 """
 
+import json
+import queue
 import sqlite3
 import os
+import threading
+import time
 from datetime import datetime
 
+from config_loader import get_fight_db_path
+
+DB_FILENAME = "fight_history.db"
+
+# WAL with synchronous=NORMAL only fsyncs at checkpoints; a power loss can
+# drop the last transactions but never corrupts the DB. Use FULL to fsync
+# every commit, OFF for throwaway/benchmark DBs.
+DEFAULT_SYNCHRONOUS = os.environ.get("LEEKWARS_DB_SYNCHRONOUS", "NORMAL").upper()
+SYNCHRONOUS_LEVELS = ("OFF", "NORMAL", "FULL", "EXTRA")
+
+# Opponent difficulty model: a Beta(PRIOR_WINS, PRIOR_LOSSES) prior updated
+# with exponentially decayed results. A fight DIFFICULTY_HALF_LIFE_DAYS old
+# counts half as much as one fought today, since opponents level up and
+# rebuild; an opponent whose evidence has decayed below MIN_EVIDENCE is
+# treated as unknown again.
+DIFFICULTY_HALF_LIFE_DAYS = 14.0
+PRIOR_WINS = 1.0
+PRIOR_LOSSES = 1.0
+MIN_EVIDENCE = 1.5
+CONFIDENT_EVIDENCE = 4.0
+BEATABLE_RATE = 0.65
+DANGEROUS_RATE = 0.35
+
+# `predicted` strategy: skip opponents the model gives less than this chance
+PREDICTED_MIN_WIN_RATE = 0.4
+
+# How much of a win/loss each result is worth
+WIN_SHARE = {'WIN': 1.0, 'DRAW': 0.5}
+LOSS_SHARE = {'LOSS': 1.0, 'DRAW': 0.5}
+
+# Opponent levels per leek_level_stats bucket
+LEVEL_BUCKET = 10
+
+
+def to_epoch(timestamp):
+    """Seconds since the epoch for a fight timestamp (datetime, ISO string or number)"""
+    if timestamp is None:
+        return time.time()
+    if isinstance(timestamp, (int, float)):
+        return float(timestamp)
+    if isinstance(timestamp, str):
+        try:
+            timestamp = datetime.fromisoformat(timestamp)
+        except ValueError:
+            return time.time()
+    return timestamp.timestamp()
+
+
+def decay_factor(age_seconds):
+    """Weight left after age_seconds of exponential decay"""
+    return 0.5 ** (max(age_seconds, 0.0) / (DIFFICULTY_HALF_LIFE_DAYS * 86400))
+
+
+def add_evidence(decayed_wins, decayed_losses, decayed_at, result, fought_at, weight=1.0):
+    """Fold one result into decayed (wins, losses, at) evidence; weight=-1 removes it
+
+    Evidence is kept as of the latest fight seen, so a late-synced older fight
+    is decayed to that time before it is added.
+    """
+    if decayed_at is None:
+        decayed_wins, decayed_losses, decayed_at = 0.0, 0.0, fought_at
+    reference = max(decayed_at, fought_at)
+    carried = decay_factor(reference - decayed_at)
+    added = weight * decay_factor(reference - fought_at)
+    return (max(0.0, (decayed_wins or 0.0) * carried + added * WIN_SHARE.get(result, 0.0)),
+            max(0.0, (decayed_losses or 0.0) * carried + added * LOSS_SHARE.get(result, 0.0)),
+            reference)
+
+
+def fight_day(timestamp):
+    """Local calendar day (YYYY-MM-DD) of a fight timestamp"""
+    return datetime.fromtimestamp(to_epoch(timestamp)).strftime('%Y-%m-%d')
+
+
+def level_bucket(opponent_level):
+    """First level of the opponent's LEVEL_BUCKET (-1 if unknown)"""
+    return -1 if opponent_level is None else opponent_level // LEVEL_BUCKET * LEVEL_BUCKET
+
+
+def classify(expected, evidence):
+    """Opponent status from the posterior's mean and evidence"""
+    if evidence < MIN_EVIDENCE:
+        return 'unknown'
+    if expected >= BEATABLE_RATE:
+        return 'beatable'
+    if expected <= DANGEROUS_RATE:
+        return 'dangerous'
+    return 'even'
+
+
+def posterior(decayed_wins, decayed_losses, decayed_at, now=None):
+    """(expected win rate, evidence in fights) of the decayed Beta posterior as of now"""
+    if decayed_at is None:
+        return PRIOR_WINS / (PRIOR_WINS + PRIOR_LOSSES), 0.0
+    factor = decay_factor((now or time.time()) - decayed_at)
+    wins = (decayed_wins or 0.0) * factor
+    losses = (decayed_losses or 0.0) * factor
+    return (PRIOR_WINS + wins) / (PRIOR_WINS + PRIOR_LOSSES + wins + losses), wins + losses
+
+
 class FightDatabase:
-    def __init__(self, leek_id):
-        """Initialize database for a specific leek"""
-        self.leek_id = leek_id
-        self.db_path = f"fight_history_{leek_id}.db"
-        self.conn = sqlite3.connect(self.db_path)
+    def __init__(self, leek_id=None, db_dir=None, synchronous=None, db_path=None):
+        """Open the fight database as seen by one leek (leek_id=None for cross-leek use)
+
+        Location: db_path, else db_dir/fight_history.db, else the configured path.
+        """
+        self.leek_id = int(leek_id) if leek_id is not None else None
+        if db_path:
+            self.db_path = db_path
+        elif db_dir:
+            self.db_path = os.path.join(db_dir, DB_FILENAME)
+        else:
+            self.db_path = get_fight_db_path()
+        if os.path.dirname(self.db_path):
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        # Wait for a concurrent writer instead of failing with "database is locked"
+        self.conn = sqlite3.connect(self.db_path, timeout=30)
         self.conn.row_factory = sqlite3.Row  # Enable dict-like access
         self.cursor = self.conn.cursor()
+        self._type_win_rates = None
+        self._model = None
+        self._configure(synchronous or DEFAULT_SYNCHRONOUS)
         self._create_tables()
 
+    def _configure(self, synchronous):
+        """Journaling and durability settings for this connection"""
+        if synchronous not in SYNCHRONOUS_LEVELS:
+            raise ValueError(f"synchronous must be one of {', '.join(SYNCHRONOUS_LEVELS)}, got {synchronous!r}")
+        self.cursor.execute('PRAGMA journal_mode=WAL')
+        self.cursor.execute(f'PRAGMA synchronous={synchronous}')
+
     def _create_tables(self):
         """Create database tables if they don't exist"""
         # Leek info table
@@ -30,10 +170,11 @@ class FightDatabase:
             )
         ''')
 
-        # Fight history table
+        # Fight history table (a fight between two of our leeks has a row for each)
         self.cursor.execute('''
             CREATE TABLE IF NOT EXISTS fight_history (
-                fight_id INTEGER PRIMARY KEY,
+                leek_id INTEGER NOT NULL,
+                fight_id INTEGER NOT NULL,
                 opponent_id INTEGER,
                 opponent_name TEXT,
                 opponent_level INTEGER,
@@ -41,14 +182,29 @@ class FightDatabase:
                 duration INTEGER,
                 actions_count INTEGER,
                 fight_url TEXT,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                recorded_seq INTEGER,
+                PRIMARY KEY (leek_id, fight_id)
             )
         ''')
 
+        # Monotonic counters; recorded_seq is bumped for every row written to
+        # fight_history / fight_summary, so incremental readers (fight_export.py,
+        # opponent_model.py) see re-recorded fights. Unlike rowid it is never
+        # reused and survives VACUUM.
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS counters (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            )
+        ''')
+        self.cursor.execute("INSERT OR IGNORE INTO counters (name, value) VALUES ('recorded_seq', 0)")
+
         # Opponent stats table (cached)
         self.cursor.execute('''
             CREATE TABLE IF NOT EXISTS opponent_stats (
-                opponent_id INTEGER PRIMARY KEY,
+                leek_id INTEGER NOT NULL,
+                opponent_id INTEGER NOT NULL,
                 opponent_name TEXT,
                 opponent_level INTEGER,
                 wins INTEGER DEFAULT 0,
@@ -57,41 +213,241 @@ class FightDatabase:
                 total_fights INTEGER DEFAULT 0,
                 win_rate REAL DEFAULT 0.0,
                 last_fought TIMESTAMP,
-                last_updated TIMESTAMP
+                last_updated TIMESTAMP,
+                decayed_wins REAL DEFAULT 0.0,
+                decayed_losses REAL DEFAULT 0.0,
+                decayed_at REAL,
+                status TEXT,
+                PRIMARY KEY (leek_id, opponent_id)
+            )
+        ''')
+
+        # Rollups maintained by _record; status is as of each opponent's last fight
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS leek_daily_stats (
+                leek_id INTEGER NOT NULL,
+                day TEXT NOT NULL,
+                wins INTEGER DEFAULT 0,
+                losses INTEGER DEFAULT 0,
+                draws INTEGER DEFAULT 0,
+                fights INTEGER DEFAULT 0,
+                PRIMARY KEY (leek_id, day)
+            )
+        ''')
+
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS leek_level_stats (
+                leek_id INTEGER NOT NULL,
+                level_bucket INTEGER NOT NULL,
+                wins INTEGER DEFAULT 0,
+                losses INTEGER DEFAULT 0,
+                draws INTEGER DEFAULT 0,
+                fights INTEGER DEFAULT 0,
+                PRIMARY KEY (leek_id, level_bucket)
+            )
+        ''')
+
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS leek_status_counts (
+                leek_id INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                opponents INTEGER DEFAULT 0,
+                PRIMARY KEY (leek_id, status)
             )
         ''')
 
-        # Create indexes for faster queries
+        # Scouted opponent builds (filled in the background by opponent_scout.py)
         self.cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_opponent_id
-            ON fight_history(opponent_id)
+            CREATE TABLE IF NOT EXISTS opponent_builds (
+                opponent_id INTEGER PRIMARY KEY,
+                opponent_name TEXT,
+                opponent_level INTEGER,
+                life INTEGER,
+                tp INTEGER,
+                mp INTEGER,
+                strength INTEGER,
+                agility INTEGER,
+                wisdom INTEGER,
+                resistance INTEGER,
+                science INTEGER,
+                magic INTEGER,
+                frequency INTEGER,
+                weapons TEXT,
+                chips TEXT,
+                build_type TEXT,
+                threat INTEGER,
+                fetched_at REAL
+            )
+        ''')
+
+        # Learned opponent selection model (opponent_model.py)
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS opponent_model (
+                name TEXT PRIMARY KEY,
+                weights TEXT,
+                trained_seq INTEGER,
+                samples INTEGER,
+                updated_at REAL
+            )
         ''')
 
+        # Combat aggregates parsed from the fight actions (fight_harvester.summarize_fight),
+        # per fight and per turn, from the leek's side
         self.cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_result
-            ON fight_history(result)
+            CREATE TABLE IF NOT EXISTS fight_summary (
+                leek_id INTEGER NOT NULL,
+                fight_id INTEGER NOT NULL,
+                turns INTEGER,
+                damage_dealt INTEGER,
+                damage_taken INTEGER,
+                healing INTEGER,
+                enemy_healing INTEGER,
+                weapon_uses INTEGER,
+                chip_uses INTEGER,
+                enemy_weapon_uses INTEGER,
+                enemy_chip_uses INTEGER,
+                deaths INTEGER,
+                enemy_deaths INTEGER,
+                recorded_seq INTEGER,
+                PRIMARY KEY (leek_id, fight_id)
+            )
         ''')
 
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS fight_turns (
+                leek_id INTEGER NOT NULL,
+                fight_id INTEGER NOT NULL,
+                turn INTEGER NOT NULL,
+                damage_dealt INTEGER,
+                damage_taken INTEGER,
+                weapon_uses INTEGER,
+                chip_uses INTEGER,
+                enemy_weapon_uses INTEGER,
+                enemy_chip_uses INTEGER,
+                deaths INTEGER,
+                enemy_deaths INTEGER,
+                PRIMARY KEY (leek_id, fight_id, turn)
+            )
+        ''')
+
+        # Covering indexes: per-leek history against an opponent, recent
+        # fights of a leek, and every leek's results against an opponent
+        self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_history_leek_opponent
+            ON fight_history(leek_id, opponent_id, timestamp, result)
+        ''')
+
+        self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_history_leek_time
+            ON fight_history(leek_id, timestamp, result)
+        ''')
+
+        self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_history_opponent
+            ON fight_history(opponent_id, leek_id, result)
+        ''')
+
+        self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_opponent_stats_opponent
+            ON opponent_stats(opponent_id)
+        ''')
+
+        # Most fought opponents, and best/worst matchups with enough fights
+        self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_opponent_stats_fights
+            ON opponent_stats(leek_id, total_fights)
+        ''')
+
+        self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_opponent_stats_matchups
+            ON opponent_stats(leek_id, win_rate, total_fights) WHERE total_fights >= 3
+        ''')
+
+        # Turn-range scans ("damage taken on turns 1-3") joined to fight_history
+        self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_fight_turns_turn
+            ON fight_turns(turn, leek_id, fight_id, damage_taken, damage_dealt)
+        ''')
+
+        # Incremental readers follow recorded_seq
+        for table in ('fight_history', 'fight_summary'):
+            self.cursor.execute(f'''
+                CREATE INDEX IF NOT EXISTS idx_{table}_seq ON {table}(recorded_seq)
+            ''')
+
         self.conn.commit()
 
-    def update_leek_info(self, leek_name, leek_level):
+    def _assign_missing_seqs(self, table):
+        """Number rows without a recorded_seq after every existing one, in rowid order"""
+        self.cursor.execute(f'''
+            UPDATE {table} SET recorded_seq = (SELECT value FROM counters WHERE name = 'recorded_seq') + rowid
+            WHERE recorded_seq IS NULL
+        ''')
+        self.cursor.execute(f'''
+            UPDATE counters SET value = MAX(value, (SELECT COALESCE(MAX(recorded_seq), 0) FROM {table}))
+            WHERE name = 'recorded_seq'
+        ''')
+
+    def _next_seq(self):
+        """Next recorded_seq (inside the caller's transaction)"""
+        self.cursor.execute("UPDATE counters SET value = value + 1 WHERE name = 'recorded_seq'")
+        self.cursor.execute("SELECT value FROM counters WHERE name = 'recorded_seq'")
+        return self.cursor.fetchone()[0]
+
+    def update_leek_info(self, leek_name, leek_level, leek_id=None):
         """Update leek information"""
         self.cursor.execute('''
             INSERT OR REPLACE INTO leek_info
             (leek_id, leek_name, leek_level, last_updated)
             VALUES (?, ?, ?, ?)
-        ''', (self.leek_id, leek_name, leek_level, datetime.now()))
+        ''', (leek_id or self.leek_id, leek_name, leek_level, datetime.now()))
         self.conn.commit()
 
     def record_fight(self, fight_data):
         """Record a fight result and update opponent stats"""
+        self.record_fights([fight_data])
+
+    def record_fights(self, batch):
+        """Record several fights in one transaction (all or nothing); returns the count"""
+        try:
+            for fight_data in batch:
+                self._record(fight_data)
+        except Exception:
+            self.conn.rollback()
+            raise
+        self.conn.commit()
+        return len(batch)
+
+    def _record(self, fight_data):
+        """Insert one fight and update its opponent stats, without committing
+
+        The fight belongs to fight_data['leek_id'] if given, else to this view's leek.
+        """
+        leek_id = fight_data.get('leek_id', self.leek_id)
+        timestamp = fight_data.get('timestamp') or datetime.now()
+
+        # A re-recorded fight must not be counted twice
+        self.cursor.execute('''
+            SELECT opponent_id, opponent_level, result, timestamp FROM fight_history
+            WHERE leek_id = ? AND fight_id = ?
+        ''', (leek_id, fight_data['fight_id']))
+        previous = self.cursor.fetchone()
+        if previous:
+            self.cursor.execute('DELETE FROM fight_history WHERE leek_id = ? AND fight_id = ?',
+                                (leek_id, fight_data['fight_id']))
+            self._update_opponent_stats(leek_id, previous['opponent_id'], previous['result'], -1,
+                                        timestamp=previous['timestamp'])
+            self._update_rollups(leek_id, previous['result'], previous['opponent_level'],
+                                 previous['timestamp'], -1)
+
         # Insert fight record
         self.cursor.execute('''
-            INSERT OR REPLACE INTO fight_history
-            (fight_id, opponent_id, opponent_name, opponent_level,
-             result, duration, actions_count, fight_url, timestamp)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            INSERT INTO fight_history
+            (leek_id, fight_id, opponent_id, opponent_name, opponent_level,
+             result, duration, actions_count, fight_url, timestamp, recorded_seq)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         ''', (
+            leek_id,
             fight_data['fight_id'],
             fight_data['opponent_id'],
             fight_data['opponent_name'],
@@ -100,103 +456,499 @@ class FightDatabase:
             fight_data.get('duration'),
             fight_data.get('actions_count', 0),
             fight_data['fight_url'],
-            datetime.now()
+            timestamp,
+            self._next_seq()
         ))
 
-        # Update opponent stats
-        self._update_opponent_stats(fight_data['opponent_id'])
+        # Update opponent stats and rollups
+        self._update_opponent_stats(leek_id, fight_data['opponent_id'], fight_data['result'], 1,
+                                    fight_data['opponent_name'], fight_data['opponent_level'], timestamp)
+        self._update_rollups(leek_id, fight_data['result'], fight_data['opponent_level'], timestamp, 1)
 
-        self.conn.commit()
+        if fight_data.get('summary'):
+            self._save_summary(leek_id, fight_data['fight_id'], fight_data['summary'], fight_data.get('turns') or [])
 
-    def _update_opponent_stats(self, opponent_id):
-        """Recalculate opponent statistics from fight history"""
-        # Get all fights against this opponent
-        self.cursor.execute('''
-            SELECT result, opponent_name, opponent_level, MAX(timestamp) as last_fought
-            FROM fight_history
-            WHERE opponent_id = ?
-            GROUP BY opponent_id
-        ''', (opponent_id,))
+    def _update_rollups(self, leek_id, result, opponent_level, timestamp, delta):
+        """Add (delta=1) or remove (delta=-1) one fight from the daily and level bucket rollups"""
+        counts = (delta if result == 'WIN' else 0, delta if result == 'LOSS' else 0,
+                  delta if result == 'DRAW' else 0, delta)
+        for table, column, key in (('leek_daily_stats', 'day', fight_day(timestamp)),
+                                   ('leek_level_stats', 'level_bucket', level_bucket(opponent_level))):
+            self.cursor.execute(f'''
+                INSERT INTO {table} (leek_id, {column}, wins, losses, draws, fights)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(leek_id, {column}) DO UPDATE SET
+                    wins = wins + excluded.wins,
+                    losses = losses + excluded.losses,
+                    draws = draws + excluded.draws,
+                    fights = fights + excluded.fights
+            ''', (leek_id, key, *counts))
 
-        row = self.cursor.fetchone()
-        if not row:
+    def _update_status_count(self, leek_id, old_status, new_status):
+        """Move one opponent between leek_status_counts buckets (None = not tracked)"""
+        if old_status == new_status:
             return
+        for status, delta in ((old_status, -1), (new_status, 1)):
+            if status is not None:
+                self.cursor.execute('''
+                    INSERT INTO leek_status_counts (leek_id, status, opponents) VALUES (?, ?, ?)
+                    ON CONFLICT(leek_id, status) DO UPDATE SET opponents = opponents + excluded.opponents
+                ''', (leek_id, status, delta))
 
-        # Count wins/losses/draws
+    def _save_summary(self, leek_id, fight_id, summary, turns):
+        """Replace a fight's combat aggregates, without committing"""
         self.cursor.execute('''
-            SELECT
-                SUM(CASE WHEN result = 'WIN' THEN 1 ELSE 0 END) as wins,
-                SUM(CASE WHEN result = 'LOSS' THEN 1 ELSE 0 END) as losses,
-                SUM(CASE WHEN result = 'DRAW' THEN 1 ELSE 0 END) as draws,
-                COUNT(*) as total_fights
-            FROM fight_history
-            WHERE opponent_id = ?
-        ''', (opponent_id,))
+            INSERT OR REPLACE INTO fight_summary
+            (leek_id, fight_id, turns, damage_dealt, damage_taken, healing, enemy_healing,
+             weapon_uses, chip_uses, enemy_weapon_uses, enemy_chip_uses, deaths, enemy_deaths, recorded_seq)
+            VALUES (:leek_id, :fight_id, :turns, :damage_dealt, :damage_taken, :healing, :enemy_healing,
+                    :weapon_uses, :chip_uses, :enemy_weapon_uses, :enemy_chip_uses, :deaths, :enemy_deaths,
+                    :recorded_seq)
+        ''', dict(summary, leek_id=leek_id, fight_id=fight_id, recorded_seq=self._next_seq()))
+        self.cursor.execute('DELETE FROM fight_turns WHERE leek_id = ? AND fight_id = ?', (leek_id, fight_id))
+        self.cursor.executemany('''
+            INSERT INTO fight_turns
+            (leek_id, fight_id, turn, damage_dealt, damage_taken, weapon_uses, chip_uses,
+             enemy_weapon_uses, enemy_chip_uses, deaths, enemy_deaths)
+            VALUES (:leek_id, :fight_id, :turn, :damage_dealt, :damage_taken, :weapon_uses, :chip_uses,
+                    :enemy_weapon_uses, :enemy_chip_uses, :deaths, :enemy_deaths)
+        ''', [dict(turn, leek_id=leek_id, fight_id=fight_id) for turn in turns])
+
+    def save_fight_summaries(self, summaries):
+        """Store (leek_id, fight_id, summary, turns) for already recorded fights in one transaction"""
+        try:
+            for leek_id, fight_id, summary, turns in summaries:
+                self._save_summary(leek_id, fight_id, summary, turns)
+        except Exception:
+            self.conn.rollback()
+            raise
+        self.conn.commit()
+        return len(summaries)
+
+    def has_fight(self, fight_id):
+        """Check whether a fight is already recorded"""
+        self.cursor.execute('SELECT 1 FROM fight_history WHERE leek_id = ? AND fight_id = ?',
+                            (self.leek_id, fight_id))
+        return self.cursor.fetchone() is not None
 
-        stats = self.cursor.fetchone()
-        wins = stats['wins'] or 0
-        losses = stats['losses'] or 0
-        draws = stats['draws'] or 0
-        total = stats['total_fights'] or 0
+    def _update_opponent_stats(self, leek_id, opponent_id, result, delta, opponent_name=None,
+                               opponent_level=None, timestamp=None):
+        """Add (delta=1) or remove (delta=-1) one fight from the opponent's stats row
+
+        Constant time however long the history is: counters are bumped in
+        place and win_rate is recomputed from them, and the fight is folded
+        into the row's decayed evidence. Name and level follow the most
+        recent fight; status (and leek_status_counts) is classified as of it.
+        Removing a fight (already deleted from fight_history) replays the
+        opponent's remaining fights instead, so the row (evidence, name, level
+        and last fight) matches a rebuild.
+        """
+        wins = delta if result == 'WIN' else 0
+        losses = delta if result == 'LOSS' else 0
+        draws = delta if result == 'DRAW' else 0
+
+        self.cursor.execute('''
+            SELECT decayed_wins, decayed_losses, decayed_at, total_fights, status FROM opponent_stats
+            WHERE leek_id = ? AND opponent_id = ?
+        ''', (leek_id, opponent_id))
+        row = self.cursor.fetchone()
+        if delta > 0:
+            evidence = add_evidence(*(tuple(row)[:3] if row else (0.0, 0.0, None)),
+                                    result, to_epoch(timestamp))
+        else:
+            evidence, latest = (0.0, 0.0, None), None
+            self.cursor.execute('''
+                SELECT opponent_name, opponent_level, result, timestamp FROM fight_history
+                WHERE leek_id = ? AND opponent_id = ? ORDER BY timestamp
+            ''', (leek_id, opponent_id))
+            for latest in self.cursor.fetchall():
+                evidence = add_evidence(*evidence, latest['result'], to_epoch(latest['timestamp']))
+        # No status once no fights are left against this opponent
+        status = classify(*posterior(*evidence, now=evidence[2])) if evidence[2] is not None else None
+        self._update_status_count(leek_id, row['status'] if row else None, status)
 
-        # Calculate win rate
-        win_rate = wins / total if total > 0 else 0.0
+        if delta < 0 and status is None:
+            self.cursor.execute('DELETE FROM opponent_stats WHERE leek_id = ? AND opponent_id = ?',
+                                (leek_id, opponent_id))
+            return
+        if delta < 0:
+            self.cursor.execute('''
+                UPDATE opponent_stats SET
+                    opponent_name = ?,
+                    opponent_level = ?,
+                    last_fought = ?,
+                    wins = wins + ?,
+                    losses = losses + ?,
+                    draws = draws + ?,
+                    total_fights = total_fights - 1,
+                    win_rate = CASE WHEN total_fights > 1
+                                    THEN CAST(wins + ? AS REAL) / (total_fights - 1)
+                                    ELSE 0.0 END,
+                    last_updated = ?,
+                    decayed_wins = ?,
+                    decayed_losses = ?,
+                    decayed_at = ?,
+                    status = ?
+                WHERE leek_id = ? AND opponent_id = ?
+            ''', (latest['opponent_name'], latest['opponent_level'], latest['timestamp'],
+                  wins, losses, draws, wins, datetime.now(), *evidence, status, leek_id, opponent_id))
+            return
 
-        # Update opponent stats table
         self.cursor.execute('''
-            INSERT OR REPLACE INTO opponent_stats
-            (opponent_id, opponent_name, opponent_level, wins, losses, draws,
-             total_fights, win_rate, last_fought, last_updated)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            INSERT INTO opponent_stats
+            (leek_id, opponent_id, opponent_name, opponent_level, wins, losses, draws,
+             total_fights, win_rate, last_fought, last_updated,
+             decayed_wins, decayed_losses, decayed_at, status)
+            VALUES (?, ?, ?, ?, ?, ?, ?, 1, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(leek_id, opponent_id) DO UPDATE SET
+                opponent_name = CASE WHEN last_fought IS NULL OR excluded.last_fought >= last_fought
+                                     THEN excluded.opponent_name ELSE opponent_name END,
+                opponent_level = CASE WHEN last_fought IS NULL OR excluded.last_fought >= last_fought
+                                      THEN excluded.opponent_level ELSE opponent_level END,
+                wins = wins + excluded.wins,
+                losses = losses + excluded.losses,
+                draws = draws + excluded.draws,
+                total_fights = total_fights + 1,
+                win_rate = CAST(wins + excluded.wins AS REAL) / (total_fights + 1),
+                last_fought = MAX(COALESCE(last_fought, excluded.last_fought), excluded.last_fought),
+                last_updated = excluded.last_updated,
+                decayed_wins = excluded.decayed_wins,
+                decayed_losses = excluded.decayed_losses,
+                decayed_at = excluded.decayed_at,
+                status = excluded.status
         ''', (
+            leek_id,
             opponent_id,
-            row['opponent_name'],
-            row['opponent_level'],
+            opponent_name,
+            opponent_level,
             wins,
             losses,
             draws,
-            total,
-            win_rate,
-            row['last_fought'],
-            datetime.now()
+            float(wins),
+            timestamp,
+            datetime.now(),
+            *evidence,
+            status
         ))
 
-    def get_opponent_stats(self, opponent_id):
-        """Get statistics for a specific opponent"""
+    def rebuild_stats(self):
+        """Recompute opponent_stats and the rollups from fight_history (maintenance / consistency check)
+
+        Covers this view's leek, or every leek when opened with leek_id=None.
+        Returns the number of rows whose incrementally maintained counters
+        differed from the recomputed ones.
+        """
+        return self._rebuild_stats(self.leek_id)
+
+    def _rebuild_stats(self, leek_id):
+        """rebuild_stats for one leek, or all leeks if leek_id is None"""
+        where, params = ('WHERE leek_id = ?', (leek_id,)) if leek_id is not None else ('', ())
+        self.cursor.execute(f'''
+            SELECT
+                leek_id,
+                opponent_id,
+                SUM(CASE WHEN result = 'WIN' THEN 1 ELSE 0 END) as wins,
+                SUM(CASE WHEN result = 'LOSS' THEN 1 ELSE 0 END) as losses,
+                SUM(CASE WHEN result = 'DRAW' THEN 1 ELSE 0 END) as draws,
+                COUNT(*) as total_fights,
+                MAX(timestamp) as last_fought
+            FROM fight_history {where}
+            GROUP BY leek_id, opponent_id
+        ''', params)
+        expected = {(row['leek_id'], row['opponent_id']): row for row in self.cursor.fetchall()}
+
+        # Decayed evidence, replayed in fight order
+        evidence = {}
+        self.cursor.execute(f'''
+            SELECT leek_id, opponent_id, result, timestamp FROM fight_history {where}
+            ORDER BY timestamp
+        ''', params)
+        for row in self.cursor.fetchall():
+            key = (row['leek_id'], row['opponent_id'])
+            evidence[key] = add_evidence(*evidence.get(key, (0.0, 0.0, None)),
+                                         row['result'], to_epoch(row['timestamp']))
+
+        self.cursor.execute(f'''
+            SELECT leek_id, opponent_id, wins, losses, draws, total_fights FROM opponent_stats {where}
+        ''', params)
+        current = {(row['leek_id'], row['opponent_id']): tuple(row)[2:] for row in self.cursor.fetchall()}
+
+        mismatches = 0
+        for key in set(expected) | set(current):
+            row = expected.get(key)
+            if row is None or current.get(key) != (row['wins'], row['losses'], row['draws'], row['total_fights']):
+                mismatches += 1
+
+        self.cursor.execute(f'DELETE FROM opponent_stats {where}', params)
+        now = datetime.now()
+        for (row_leek_id, opponent_id), row in expected.items():
+            # Name and level of the most recent fight
+            self.cursor.execute('''
+                SELECT opponent_name, opponent_level FROM fight_history
+                WHERE leek_id = ? AND opponent_id = ? ORDER BY timestamp DESC LIMIT 1
+            ''', (row_leek_id, opponent_id))
+            latest = self.cursor.fetchone()
+            self.cursor.execute('''
+                INSERT INTO opponent_stats
+                (leek_id, opponent_id, opponent_name, opponent_level, wins, losses, draws,
+                 total_fights, win_rate, last_fought, last_updated,
+                 decayed_wins, decayed_losses, decayed_at, status)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                row_leek_id,
+                opponent_id,
+                latest['opponent_name'],
+                latest['opponent_level'],
+                row['wins'],
+                row['losses'],
+                row['draws'],
+                row['total_fights'],
+                row['wins'] / row['total_fights'],
+                row['last_fought'],
+                now,
+                *evidence[(row_leek_id, opponent_id)],
+                classify(*posterior(*evidence[(row_leek_id, opponent_id)],
+                                    now=evidence[(row_leek_id, opponent_id)][2]))
+            ))
+
+        mismatches += self._rebuild_rollups(where, params)
+        self.conn.commit()
+        return mismatches
+
+    def _rebuild_rollups(self, where, params):
+        """Recompute the rollup tables (without committing); returns the number of rows that differed"""
+        daily, levels = {}, {}
+        self.cursor.execute(f'''
+            SELECT leek_id, result, opponent_level, timestamp FROM fight_history {where}
+        ''', params)
+        for row in self.cursor.fetchall():
+            counts = (row['result'] == 'WIN', row['result'] == 'LOSS', row['result'] == 'DRAW', 1)
+            for rollup, key in ((daily, fight_day(row['timestamp'])), (levels, level_bucket(row['opponent_level']))):
+                previous = rollup.get((row['leek_id'], key), (0, 0, 0, 0))
+                rollup[(row['leek_id'], key)] = tuple(a + b for a, b in zip(previous, counts))
+
+        self.cursor.execute(f'''
+            SELECT leek_id, status, COUNT(*) AS opponents FROM opponent_stats {where} GROUP BY leek_id, status
+        ''', params)
+        statuses = {(row['leek_id'], row['status']): (row['opponents'],) for row in self.cursor.fetchall()}
+
+        mismatches = 0
+        for table, column, expected in (('leek_daily_stats', 'day', daily),
+                                        ('leek_level_stats', 'level_bucket', levels),
+                                        ('leek_status_counts', 'status', statuses)):
+            values = 'opponents' if table == 'leek_status_counts' else 'wins, losses, draws, fights'
+            self.cursor.execute(f'SELECT leek_id, {column}, {values} FROM {table} {where}', params)
+            # Rows counted down to zero are equivalent to missing ones
+            current = {(row[0], row[1]): tuple(row)[2:] for row in self.cursor.fetchall() if any(tuple(row)[2:])}
+            mismatches += sum(1 for key in set(expected) | set(current) if expected.get(key) != current.get(key))
+
+            self.cursor.execute(f'DELETE FROM {table} {where}', params)
+            placeholders = ', '.join('?' * (2 + len(values.split(','))))
+            self.cursor.executemany(f'INSERT INTO {table} (leek_id, {column}, {values}) VALUES ({placeholders})',
+                                    [key + counts for key, counts in expected.items()])
+        return mismatches
+
+    def import_legacy_db(self, legacy_path, leek_id):
+        """Copy a per-leek fight_history_<leek_id>.db into this database
+
+        Fights already present are kept; the leek's opponent stats are then
+        rebuilt from the merged history. Returns the number of fights added.
+        """
+        self.conn.commit()
+        self.cursor.execute('ATTACH DATABASE ? AS legacy', (legacy_path,))
+        try:
+            self.cursor.execute("SELECT name FROM legacy.sqlite_master WHERE type = 'table'")
+            tables = {row['name'] for row in self.cursor.fetchall()}
+
+            before = self.conn.total_changes
+            if 'fight_history' in tables:
+                self.cursor.execute('''
+                    INSERT OR IGNORE INTO fight_history
+                    (leek_id, fight_id, opponent_id, opponent_name, opponent_level,
+                     result, duration, actions_count, fight_url, timestamp)
+                    SELECT ?, fight_id, opponent_id, opponent_name, opponent_level,
+                           result, duration, actions_count, fight_url, timestamp
+                    FROM legacy.fight_history
+                ''', (leek_id,))
+            added = self.conn.total_changes - before
+            self._assign_missing_seqs('fight_history')
+
+            if 'leek_info' in tables:
+                self.cursor.execute('''
+                    INSERT OR IGNORE INTO leek_info (leek_id, leek_name, leek_level, last_updated)
+                    SELECT leek_id, leek_name, leek_level, last_updated FROM legacy.leek_info
+                ''')
+            if 'opponent_builds' in tables:
+                # Keep whichever scouted build is newer
+                self.cursor.execute('''
+                    INSERT OR REPLACE INTO opponent_builds
+                    SELECT l.* FROM legacy.opponent_builds l
+                    LEFT JOIN opponent_builds b ON b.opponent_id = l.opponent_id
+                    WHERE b.opponent_id IS NULL OR l.fetched_at > b.fetched_at
+                ''')
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            self.cursor.execute('DETACH DATABASE legacy')
+
+        view = FightDatabase(leek_id, db_path=self.db_path)
+        view.rebuild_stats()
+        view.close()
+        return added
+
+    def save_opponent_builds(self, builds):
+        """Store scouted opponent builds (dicts from opponent_scout.parse_build) in one transaction"""
+        self.cursor.executemany('''
+            INSERT OR REPLACE INTO opponent_builds
+            (opponent_id, opponent_name, opponent_level, life, tp, mp, strength, agility,
+             wisdom, resistance, science, magic, frequency, weapons, chips, build_type,
+             threat, fetched_at)
+            VALUES (:opponent_id, :opponent_name, :opponent_level, :life, :tp, :mp, :strength, :agility,
+                    :wisdom, :resistance, :science, :magic, :frequency, :weapons, :chips, :build_type,
+                    :threat, :fetched_at)
+        ''', [dict(build, weapons=json.dumps(build['weapons']), chips=json.dumps(build['chips']))
+              for build in builds])
+        self.conn.commit()
+
+    def get_opponent_builds(self, opponent_ids):
+        """Scouted builds for several opponents at once: {opponent_id: build}"""
+        opponent_ids = list(opponent_ids)
+        if not opponent_ids:
+            return {}
+        placeholders = ','.join('?' * len(opponent_ids))
+        self.cursor.execute(f'''
+            SELECT * FROM opponent_builds WHERE opponent_id IN ({placeholders})
+        ''', opponent_ids)
+
+        builds = {}
+        for row in self.cursor.fetchall():
+            build = dict(row)
+            build['weapons'] = json.loads(build['weapons'] or '[]')
+            build['chips'] = json.loads(build['chips'] or '[]')
+            builds[build['opponent_id']] = build
+        return builds
+
+    def get_scouted_times(self):
+        """When each opponent build was last fetched: {opponent_id: fetched_at}"""
+        self.cursor.execute('SELECT opponent_id, fetched_at FROM opponent_builds')
+        return {row['opponent_id']: row['fetched_at'] for row in self.cursor.fetchall()}
+
+    def get_build_type_win_rates(self):
+        """Our win rate against each scouted build type: {build_type: (win_rate, fights)}"""
         self.cursor.execute('''
-            SELECT * FROM opponent_stats WHERE opponent_id = ?
-        ''', (opponent_id,))
+            SELECT b.build_type,
+                   SUM(CASE WHEN h.result = 'WIN' THEN 1 ELSE 0 END) as wins,
+                   COUNT(*) as total
+            FROM fight_history h
+            JOIN opponent_builds b ON b.opponent_id = h.opponent_id
+            WHERE h.leek_id = ?
+            GROUP BY b.build_type
+        ''', (self.leek_id,))
+        return {row['build_type']: (row['wins'] / row['total'], row['total'])
+                for row in self.cursor.fetchall()}
+
+    def get_turn_damage_by_build(self, first_turn=1, last_turn=3):
+        """Damage taken and dealt per fight over a turn range, by scouted build type
+
+        {build_type: {'fights', 'damage_taken', 'damage_dealt'}} (averages per fight) for
+        this view's leek, or all leeks when the view has none.
+        """
+        leek_filter = 'AND t.leek_id = ?' if self.leek_id is not None else ''
+        params = (first_turn, last_turn) + ((self.leek_id,) if self.leek_id is not None else ())
+        self.cursor.execute(f'''
+            SELECT b.build_type,
+                   COUNT(DISTINCT t.leek_id || ':' || t.fight_id) AS fights,
+                   SUM(t.damage_taken) AS damage_taken,
+                   SUM(t.damage_dealt) AS damage_dealt
+            FROM fight_turns t
+            JOIN fight_history h ON h.leek_id = t.leek_id AND h.fight_id = t.fight_id
+            JOIN opponent_builds b ON b.opponent_id = h.opponent_id
+            WHERE t.turn BETWEEN ? AND ? {leek_filter}
+            GROUP BY b.build_type
+        ''', params)
+        return {row['build_type']: {'fights': row['fights'],
+                                    'damage_taken': row['damage_taken'] / row['fights'],
+                                    'damage_dealt': row['damage_dealt'] / row['fights']}
+                for row in self.cursor.fetchall()}
+
+    def load_model_state(self, name):
+        """Stored model row {weights, trained_seq, samples, updated_at} or None"""
+        self.cursor.execute('SELECT * FROM opponent_model WHERE name = ?', (name,))
+        row = self.cursor.fetchone()
+        return dict(row) if row else None
+
+    def save_model_state(self, name, weights, trained_seq, samples):
+        """Store a model's weights (JSON) and the recorded_seq of the last fight it was trained on"""
+        self.cursor.execute('''
+            INSERT OR REPLACE INTO opponent_model (name, weights, trained_seq, samples, updated_at)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (name, weights, trained_seq, samples, time.time()))
+        self.conn.commit()
 
+    def get_opponent_model(self):
+        """Trained opponent model (reloaded at most once a minute), or None if not trained enough"""
+        from opponent_model import MIN_SAMPLES, OpponentModel
+
+        now = time.monotonic()
+        if self._model is None or now - self._model[0] > 60:
+            model = OpponentModel.load(self)
+            self._model = (now, model if model.samples >= MIN_SAMPLES else None)
+        return self._model[1]
+
+    def get_leek_level(self):
+        """Stored level of this view's leek (None if unknown)"""
+        self.cursor.execute('SELECT leek_level FROM leek_info WHERE leek_id = ?', (self.leek_id,))
         row = self.cursor.fetchone()
-        if not row:
-            return None
+        return row['leek_level'] if row else None
+
+    def get_opponent_stats(self, opponent_id):
+        """Get statistics for a specific opponent"""
+        return self.classify_opponents([opponent_id]).get(opponent_id)
+
+    def classify_opponents(self, opponent_ids):
+        """Stats, status and difficulty for many opponents with one query
+
+        Returns {opponent_id: stats} for the opponents we have fought;
+        never-fought opponents are absent.
+        """
+        opponent_ids = list(opponent_ids)
+        if not opponent_ids:
+            return {}
+        placeholders = ','.join('?' * len(opponent_ids))
+        self.cursor.execute(f'''
+            SELECT * FROM opponent_stats WHERE leek_id = ? AND opponent_id IN ({placeholders})
+        ''', [self.leek_id] + opponent_ids)
+        return {row['opponent_id']: self.stats_from_row(row) for row in self.cursor.fetchall()}
 
-        wins = row['wins']
-        losses = row['losses']
-        draws = row['draws']
+    @staticmethod
+    def stats_from_row(row, now=None):
+        """Stats dict (with status and difficulty) from an opponent_stats row
+
+        Status and difficulty come from the time-decayed Beta posterior:
+        expected_win_rate is its mean, evidence the decayed number of fights.
+        """
         total = row['total_fights']
         win_rate = row['win_rate']
+        expected, evidence = posterior(row['decayed_wins'], row['decayed_losses'], row['decayed_at'], now)
 
-        # Determine status
-        if total < 2:
-            status = 'unknown'
-        elif win_rate >= 0.7:
-            status = 'beatable'
-        elif win_rate <= 0.3:
-            status = 'dangerous'
-        else:
-            status = 'even'
+        status = classify(expected, evidence)
 
         return {
-            'opponent_id': opponent_id,
+            'opponent_id': row['opponent_id'],
             'opponent_name': row['opponent_name'],
             'opponent_level': row['opponent_level'],
-            'wins': wins,
-            'losses': losses,
-            'draws': draws,
+            'wins': row['wins'],
+            'losses': row['losses'],
+            'draws': row['draws'],
             'total_fights': total,
             'win_rate': win_rate,
+            'expected_win_rate': expected,
+            'evidence': evidence,
             'status': status,
+            # 0 = always win, 100 = always lose; little or old evidence stays near 50
+            'difficulty': int(round((1 - expected) * 100)),
             'last_fought': row['last_fought']
         }
 
@@ -205,89 +957,160 @@ class FightDatabase:
         stats = self.get_opponent_stats(opponent_id)
         if not stats:
             return 50  # Unknown difficulty
-
-        # Difficulty = 100 - (win_rate * 100)
-        # 0 = always win, 100 = always lose
-        win_rate = stats['win_rate']
-        total_fights = stats['total_fights']
-
-        # Adjust confidence based on number of fights
-        if total_fights < 2:
-            return 50  # Unknown
-        elif total_fights < 5:
-            # Less confident, pull toward 50
-            confidence = total_fights / 5
-            difficulty = (1 - win_rate) * 100
-            return int(difficulty * confidence + 50 * (1 - confidence))
-        else:
-            # High confidence
-            return int((1 - win_rate) * 100)
+        return stats['difficulty']
 
     def get_global_stats(self):
-        """Get overall statistics across all fights"""
-        # Total fights
-        self.cursor.execute('SELECT COUNT(*) as total FROM fight_history')
-        total_fights = self.cursor.fetchone()['total']
-
-        if total_fights == 0:
-            return {
-                'total_fights': 0,
-                'win_rate': 0.0,
-                'opponents_tracked': 0,
-                'beatable_opponents': 0,
-                'dangerous_opponents': 0
-            }
-
-        # Win rate
+        """Get overall statistics across all fights (from the rollups, constant time)
+
+        Opponent statuses are as of each opponent's last fight.
+        """
         self.cursor.execute('''
-            SELECT
-                SUM(CASE WHEN result = 'WIN' THEN 1 ELSE 0 END) as wins,
-                COUNT(*) as total
-            FROM fight_history
-        ''')
-        row = self.cursor.fetchone()
-        win_rate = row['wins'] / row['total'] if row['total'] > 0 else 0.0
+            SELECT COALESCE(SUM(wins), 0) AS wins, COALESCE(SUM(losses), 0) AS losses,
+                   COALESCE(SUM(draws), 0) AS draws, COALESCE(SUM(fights), 0) AS total
+            FROM leek_level_stats WHERE leek_id = ?
+        ''', (self.leek_id,))
+        totals = self.cursor.fetchone()
 
-        # Opponent counts
-        self.cursor.execute('SELECT COUNT(*) as total FROM opponent_stats')
-        opponents_tracked = self.cursor.fetchone()['total']
+        self.cursor.execute('SELECT status, opponents FROM leek_status_counts WHERE leek_id = ?', (self.leek_id,))
+        statuses = {row['status']: row['opponents'] for row in self.cursor.fetchall()}
 
+        return {
+            'total_fights': totals['total'],
+            'wins': totals['wins'],
+            'losses': totals['losses'],
+            'draws': totals['draws'],
+            'win_rate': totals['wins'] / totals['total'] if totals['total'] > 0 else 0.0,
+            'opponents_tracked': sum(statuses.values()),
+            'beatable_opponents': statuses.get('beatable', 0),
+            'dangerous_opponents': statuses.get('dangerous', 0),
+            'even_opponents': statuses.get('even', 0),
+            'unknown_opponents': statuses.get('unknown', 0)
+        }
+
+    def get_daily_stats(self, days=14):
+        """The leek's last `days` fighting days, newest first: [{day, wins, losses, draws, fights}]"""
         self.cursor.execute('''
-            SELECT COUNT(*) as total FROM opponent_stats
-            WHERE win_rate >= 0.7 AND total_fights >= 2
-        ''')
-        beatable_opponents = self.cursor.fetchone()['total']
+            SELECT day, wins, losses, draws, fights FROM leek_daily_stats
+            WHERE leek_id = ? AND fights > 0 ORDER BY day DESC LIMIT ?
+        ''', (self.leek_id, days))
+        return [dict(row) for row in self.cursor.fetchall()]
+
+    def get_level_stats(self):
+        """The leek's results per opponent level bucket: [{level_bucket, wins, losses, draws, fights}]"""
+        self.cursor.execute('''
+            SELECT level_bucket, wins, losses, draws, fights FROM leek_level_stats
+            WHERE leek_id = ? AND fights > 0 ORDER BY level_bucket
+        ''', (self.leek_id,))
+        return [dict(row) for row in self.cursor.fetchall()]
+
+    def get_leek_evidence(self, leek_id=None):
+        """A leek's decayed (wins, losses) over all its opponents, as of now"""
+        self.cursor.execute('''
+            SELECT decayed_wins, decayed_losses, decayed_at FROM opponent_stats WHERE leek_id = ?
+        ''', (leek_id if leek_id is not None else self.leek_id,))
+        now = time.time()
+        wins = losses = 0.0
+        for row in self.cursor.fetchall():
+            if row['decayed_at'] is not None:
+                factor = decay_factor(now - row['decayed_at'])
+                wins += (row['decayed_wins'] or 0.0) * factor
+                losses += (row['decayed_losses'] or 0.0) * factor
+        return wins, losses
+
+    def get_cross_leek_stats(self, opponent_ids):
+        """Every leek's record against each opponent, best first: {opponent_id: [stats, ...]}"""
+        opponent_ids = list(opponent_ids)
+        if not opponent_ids:
+            return {}
+        placeholders = ','.join('?' * len(opponent_ids))
+        self.cursor.execute(f'''
+            SELECT s.*, l.leek_name FROM opponent_stats s
+            LEFT JOIN leek_info l ON l.leek_id = s.leek_id
+            WHERE s.opponent_id IN ({placeholders})
+        ''', opponent_ids)
+
+        cross = {}
+        now = time.time()
+        for row in self.cursor.fetchall():
+            stats = self.stats_from_row(row, now)
+            stats['leek_id'] = row['leek_id']
+            stats['leek_name'] = row['leek_name']
+            cross.setdefault(row['opponent_id'], []).append(stats)
+        for records in cross.values():
+            records.sort(key=lambda stats: (stats['expected_win_rate'], stats['total_fights']), reverse=True)
+        return cross
+
+    def best_leek_against(self, opponent_id, min_fights=2):
+        """Our leek with the best expected win rate against an opponent (None if none has min_fights)"""
+        candidates = [stats for stats in self.get_cross_leek_stats([opponent_id]).get(opponent_id, [])
+                      if stats['total_fights'] >= min_fights]
+        return candidates[0] if candidates else None
 
+    def get_leeks(self):
+        """Leeks with fights in the database: [{leek_id, leek_name, leek_level, fights}]"""
         self.cursor.execute('''
-            SELECT COUNT(*) as total FROM opponent_stats
-            WHERE win_rate <= 0.3 AND total_fights >= 2
+            SELECT h.leek_id, l.leek_name, l.leek_level, COUNT(*) as fights
+            FROM fight_history h
+            LEFT JOIN leek_info l ON l.leek_id = h.leek_id
+            GROUP BY h.leek_id
+            ORDER BY fights DESC
         ''')
-        dangerous_opponents = self.cursor.fetchone()['total']
+        return [dict(row) for row in self.cursor.fetchall()]
 
-        return {
-            'total_fights': total_fights,
-            'win_rate': win_rate,
-            'opponents_tracked': opponents_tracked,
-            'beatable_opponents': beatable_opponents,
-            'dangerous_opponents': dangerous_opponents
-        }
+    def rank_unknown_opponents(self, opponents, builds):
+        """Order never-fought opponents by their scouted build
+
+        Opponents whose build type we usually beat come first, then weaker
+        builds (lower threat); unscouted opponents keep their API order at the end.
+        """
+        if not builds:
+            return opponents
+        # The aggregate scans our history, so reuse it for a minute
+        now = time.monotonic()
+        if self._type_win_rates is None or now - self._type_win_rates[0] > 60:
+            self._type_win_rates = (now, self.get_build_type_win_rates())
+        type_win_rates = self._type_win_rates[1]
+
+        def key(opp):
+            build = builds.get(opp['id'])
+            if not build:
+                return (1, 0, 0)
+            win_rate, fights = type_win_rates.get(build['build_type'], (0.5, 0))
+            # Pull the build-type win rate toward 50% until it has some fights behind it
+            confidence = min(fights / 10, 1.0)
+            expected = win_rate * confidence + 0.5 * (1 - confidence)
+            return (0, -expected, build['threat'] or 0)
+
+        return sorted(opponents, key=key)
+
+    def get_preferred_opponents(self, all_opponents, strategy='smart', classified=None):
+        """Filter opponents based on strategy
 
-    def get_preferred_opponents(self, all_opponents, strategy='smart'):
-        """Filter opponents based on strategy"""
+        Every strategy works on the decayed Beta posterior: opponents are
+        bucketed by its status and ordered by expected win rate within a
+        bucket. classified: result of classify_opponents() for these
+        opponents, if the caller already has it.
+        """
         if strategy == 'random':
             return all_opponents
 
+        # Attach scouted builds so callers (and the ordering below) can use them
+        builds = self.get_opponent_builds(opp['id'] for opp in all_opponents)
+        for opp in all_opponents:
+            opp['build'] = builds.get(opp['id'])
+
         # Categorize opponents
         beatable = []
         unknown = []
         even = []
         dangerous = []
 
+        if classified is None:
+            classified = self.classify_opponents(opp['id'] for opp in all_opponents)
         for opp in all_opponents:
-            opp_id = opp['id']
-            stats = self.get_opponent_stats(opp_id)
+            stats = classified.get(opp['id'])
 
-            if not stats or stats['total_fights'] < 2:
+            if not stats or stats['status'] == 'unknown':
                 unknown.append(opp)
             elif stats['status'] == 'beatable':
                 beatable.append(opp)
@@ -296,6 +1119,14 @@ class FightDatabase:
             else:
                 even.append(opp)
 
+        def expected_win_rate(opp):
+            return classified[opp['id']]['expected_win_rate']
+
+        beatable.sort(key=expected_win_rate, reverse=True)
+        even.sort(key=expected_win_rate, reverse=True)
+        dangerous.sort(key=expected_win_rate, reverse=True)
+        unknown = self.rank_unknown_opponents(unknown, builds)
+
         # Apply strategy
         if strategy == 'safe':
             # Only beatable and unknown
@@ -313,8 +1144,9 @@ class FightDatabase:
             # Check recent performance (last 10 fights)
             self.cursor.execute('''
                 SELECT result FROM fight_history
+                WHERE leek_id = ?
                 ORDER BY timestamp DESC LIMIT 10
-            ''')
+            ''', (self.leek_id,))
             recent = [row['result'] for row in self.cursor.fetchall()]
 
             if len(recent) >= 5:
@@ -334,14 +1166,22 @@ class FightDatabase:
                 return beatable + unknown + even[:len(even)//2]
 
         elif strategy == 'confident':
-            # Only fight opponents with high confidence (5+ fights)
-            confident = []
-            for opp in all_opponents:
-                stats = self.get_opponent_stats(opp['id'])
-                if stats and stats['total_fights'] >= 5 and stats['status'] == 'beatable':
-                    confident.append(opp)
+            # Only fight beatable opponents backed by plenty of recent evidence
+            confident = [opp for opp in beatable
+                         if classified[opp['id']]['evidence'] >= CONFIDENT_EVIDENCE]
             return confident if confident else beatable + unknown
 
+        elif strategy == 'predicted':
+            # Score every candidate with the model learned from fight history
+            model = self.get_opponent_model()
+            if model is None:
+                # Not trained yet, use smart strategy
+                return beatable + unknown + even[:len(even)//2]
+            ranked = model.rank(all_opponents, classified, self.get_leek_level())
+            # Skip likely losses, but always leave something to fight
+            likely = [opp for opp in ranked if opp['predicted_win_rate'] >= PREDICTED_MIN_WIN_RATE]
+            return likely or ranked[:3]
+
         else:
             # Default to smart
             return beatable + unknown + even[:len(even)//2]
@@ -351,3 +1191,80 @@ class FightDatabase:
         if self.conn:
             self.conn.commit()
             self.conn.close()
+
+
+class FightDatabaseWriter:
+    """Single writer thread owning the write connection to the fight DB
+
+    Harvester threads submit(leek_id, record); the writer drains whatever is
+    queued (up to max_batch records, any mix of leeks) and stores it with one
+    record_fights transaction, so concurrent harvesting costs one fsync per
+    batch instead of one per fight and never contends for the write lock.
+    """
+
+    def __init__(self, db_dir=None, leeks=None, synchronous=None, max_batch=200, db_path=None):
+        """leeks: {leek_id: leek dict} whose name/level are stored on first write"""
+        self.db_dir = db_dir
+        self.db_path = db_path
+        self.leeks = leeks or {}
+        self.synchronous = synchronous
+        self.max_batch = max_batch
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+        self.recorded = 0
+        self.failed = 0
+        self.batches = 0
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def submit(self, leek_id, record):
+        """Queue a fight record for one of our leeks"""
+        self.queue.put(dict(record, leek_id=leek_id))
+
+    def close(self):
+        """Write everything still queued, then stop the thread"""
+        self.queue.put(None)
+        self.thread.join()
+
+    def _write(self, db, records):
+        """Store one drained batch in a single transaction"""
+        try:
+            self.recorded += db.record_fights(records)
+            self.batches += 1
+        except Exception:
+            # Isolate the bad record(s) instead of losing the whole batch
+            for record in records:
+                try:
+                    db.record_fight(record)
+                    self.recorded += 1
+                except Exception as e:
+                    self.failed += 1
+                    print(f"   ⚠️ Failed to record fight {record.get('fight_id')}: {e}")
+
+    def _run(self):
+        db = FightDatabase(None, self.db_dir, self.synchronous, self.db_path)
+        try:
+            for leek_id, leek in self.leeks.items():
+                db.update_leek_info(leek['name'], leek.get('level', 1), leek_id)
+
+            done = False
+            while not done:
+                item = self.queue.get()
+                if item is None:
+                    break
+                records = [item]
+                while len(records) < self.max_batch:
+                    try:
+                        item = self.queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        done = True
+                        break
+                    records.append(item)
+                self._write(db, records)
+        finally:
+            db.close()
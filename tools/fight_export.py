@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Fight Export - Incremental columnar export of the fight database for analytics
+
+Turns fight_history, fight_summary (combat aggregates stored by the fight DB
+at harvest time) and opponent_stats into typed column files, so analyses over
+100k+ fights load in milliseconds and run vectorized instead of querying row
+by row or re-parsing JSON logs.
+
+Each export only appends a new part with the rows recorded since the last
+one (tracked in state.json by the fight DB's recorded_seq, which a
+re-recorded fight advances). Fights recorded without a summary (e.g. before
+the DB stored them) are summarized from the fight archive into the DB once
+they are archived. opponent_stats is small and changes in place,
+so it is rewritten whole. --compact merges the parts of each table into one.
+Files are Parquet when pyarrow is installed, otherwise NumPy .npz (numpy is
+required either way for loading).
+
+Layout (default root: data/analytics):
+    state.json
+    fight_history/part_00001.npz     leek_id fight_id opponent_id opponent_level result
+                                     duration actions_count timestamp
+    fight_summary/part_00001.npz     fight_id leek_id turns damage_dealt damage_taken
+                                     healing enemy_healing weapon_uses chip_uses
+                                     enemy_weapon_uses enemy_chip_uses deaths enemy_deaths
+    opponent_stats.npz
+
+Results are coded WIN=1, DRAW=0, LOSS=-1 (UNKNOWN=-2), missing integers as -1,
+timestamps as epoch seconds. A fight re-recorded after an export appears in
+two parts; load_table keeps the newest copy.
+
+Usage:
+    python3 fight_export.py [--compact] [--format npz|parquet] [--archive <dir>]
+
+    from fight_export import load_table
+    fights = load_table("fight_history")          # {column: numpy array}
+    win_rate = (fights["result"] == 1).mean()
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+from fight_archive import FightArchive, DEFAULT_ROOT as ARCHIVE_ROOT
+from fight_db import FightDatabase, to_epoch
+from fight_harvester import summarize_fight
+
+DEFAULT_ROOT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "analytics")
+STATE_FILE = "state.json"
+MAX_PENDING = 20000  # Recorded fights without a summary still waiting to be archived (sync_fight_logs.py)
+RESULT_CODES = {'WIN': 1, 'DRAW': 0, 'LOSS': -1}
+
+HISTORY_COLUMNS = {
+    'leek_id': 'int64', 'fight_id': 'int64', 'opponent_id': 'int64', 'opponent_level': 'int32',
+    'result': 'int8', 'duration': 'int32', 'actions_count': 'int32', 'timestamp': 'float64',
+}
+SUMMARY_COLUMNS = {
+    'fight_id': 'int64', 'leek_id': 'int64', 'turns': 'int32',
+    'damage_dealt': 'int64', 'damage_taken': 'int64', 'healing': 'int64', 'enemy_healing': 'int64',
+    'weapon_uses': 'int32', 'chip_uses': 'int32', 'enemy_weapon_uses': 'int32', 'enemy_chip_uses': 'int32',
+    'deaths': 'int16', 'enemy_deaths': 'int16',
+}
+OPPONENT_COLUMNS = {
+    'leek_id': 'int64', 'opponent_id': 'int64', 'opponent_name': 'str', 'opponent_level': 'int32',
+    'wins': 'int32', 'losses': 'int32', 'draws': 'int32', 'total_fights': 'int32', 'win_rate': 'float64',
+    'expected_win_rate': 'float64', 'evidence': 'float64', 'last_fought': 'float64',
+}
+
+
+def _int(value):
+    return -1 if value is None else int(value)
+
+
+def _array(values, dtype):
+    if dtype == 'str':
+        return np.array(['' if v is None else str(v) for v in values])
+    return np.array(values, dtype=dtype)
+
+
+def _extension(fmt):
+    return ".parquet" if fmt == "parquet" else ".npz"
+
+
+def write_columns(path, columns, dtypes, fmt):
+    """Write {column: list} as one typed file, atomically"""
+    tmp_path = path + ".tmp"
+    if fmt == "parquet":
+        table = pa.table({name: pa.array(values) if dtypes[name] == 'str'
+                          else pa.array(_array(values, dtypes[name])) for name, values in columns.items()})
+        pq.write_table(table, tmp_path)
+    else:
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(f, **{name: _array(values, dtypes[name]) for name, values in columns.items()})
+    os.replace(tmp_path, path)
+
+
+def read_columns(path):
+    """{column: numpy array} from a .npz or .parquet file"""
+    if path.endswith(".parquet"):
+        if pq is None:
+            raise RuntimeError(f"pyarrow is required to read {path}")
+        table = pq.read_table(path)
+        return {name: table.column(name).to_numpy() for name in table.column_names}
+    with np.load(path, allow_pickle=False) as data:
+        return {name: data[name] for name in data.files}
+
+
+def _parts(table_dir):
+    if not os.path.isdir(table_dir):
+        return []
+    return sorted(os.path.join(table_dir, name) for name in os.listdir(table_dir)
+                  if name.startswith("part_") and name.endswith((".npz", ".parquet")))
+
+
+def _latest_per_key(columns, key_columns):
+    """Keep the last row for each key (rows are in export order)"""
+    count = len(next(iter(columns.values()))) if columns else 0
+    if not count:
+        return columns
+    # One int64 per key (fight ids fit in 32 bits)
+    keys = np.zeros(count, dtype='int64')
+    for name in key_columns:
+        keys = (keys << 32) | columns[name].astype('int64')
+    # Unique on the reversed rows finds each key's last occurrence
+    _, first_reversed = np.unique(keys[::-1], return_index=True)
+    keep = np.sort(count - 1 - first_reversed)
+    return {name: values[keep] for name, values in columns.items()}
+
+
+def load_table(name, root=DEFAULT_ROOT):
+    """{column: numpy array} for an exported table (parts concatenated, newest copy of each fight)"""
+    if np is None:
+        raise RuntimeError("numpy is required to load exported tables")
+    if name == "opponent_stats":
+        for ext in (".parquet", ".npz"):
+            path = os.path.join(root, name + ext)
+            if os.path.exists(path):
+                return read_columns(path)
+        return {}
+
+    parts = [read_columns(path) for path in _parts(os.path.join(root, name))]
+    if not parts:
+        return {}
+    if len(parts) == 1:
+        return parts[0]  # A single part (fresh or compacted) has no duplicates
+    columns = {column: np.concatenate([part[column] for part in parts]) for column in parts[0]}
+    return _latest_per_key(columns, ('leek_id', 'fight_id'))
+
+
+class FightExporter:
+    def __init__(self, root=DEFAULT_ROOT, fmt=None, db=None, archive_root=ARCHIVE_ROOT):
+        """Exporter writing to root; fmt defaults to parquet when pyarrow is installed"""
+        if np is None:
+            raise RuntimeError("numpy is required for the columnar export (pip install numpy)")
+        self.root = root
+        self.fmt = fmt or ("parquet" if pa else "npz")
+        if self.fmt == "parquet" and pa is None:
+            raise RuntimeError("pyarrow is required for --format parquet")
+        self.db = db or FightDatabase()
+        self.archive_root = archive_root
+        os.makedirs(root, exist_ok=True)
+        self.state_path = os.path.join(root, STATE_FILE)
+        self.state = self._load_state()
+
+    def _load_state(self):
+        try:
+            with open(self.state_path, 'r') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {"history_seq": 0, "summary_seq": 0, "summary_pending": [], "parts": {}}
+
+    def _save_state(self):
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def _append_part(self, table, rows, dtypes):
+        """Write rows (list of dicts) as the table's next part"""
+        if not rows:
+            return None
+        table_dir = os.path.join(self.root, table)
+        os.makedirs(table_dir, exist_ok=True)
+        number = self.state["parts"].get(table, 0) + 1
+        path = os.path.join(table_dir, f"part_{number:05d}{_extension(self.fmt)}")
+        write_columns(path, {name: [row[name] for row in rows] for name in dtypes}, dtypes, self.fmt)
+        self.state["parts"][table] = number
+        return path
+
+    def export_history(self):
+        """Append fight_history rows recorded since the last export; returns their fight ids"""
+        self.db.cursor.execute('''
+            SELECT recorded_seq, leek_id, fight_id, opponent_id, opponent_level,
+                   result, duration, actions_count, timestamp
+            FROM fight_history WHERE recorded_seq > ? ORDER BY recorded_seq
+        ''', (self.state["history_seq"],))
+        rows = []
+        for row in self.db.cursor.fetchall():
+            rows.append({
+                'leek_id': row['leek_id'],
+                'fight_id': row['fight_id'],
+                'opponent_id': _int(row['opponent_id']),
+                'opponent_level': _int(row['opponent_level']),
+                'result': RESULT_CODES.get(row['result'], -2),
+                'duration': _int(row['duration']),
+                'actions_count': _int(row['actions_count']),
+                'timestamp': to_epoch(row['timestamp']) if row['timestamp'] else float('nan'),
+            })
+            self.state["history_seq"] = row['recorded_seq']
+        self._append_part("fight_history", rows, HISTORY_COLUMNS)
+        return [(row['leek_id'], row['fight_id']) for row in rows]
+
+    def backfill_summaries(self, fights):
+        """Summarize recorded fights that have no fight_summary row from the archive; returns the count"""
+        pending = [tuple(entry) for entry in self.state["summary_pending"]]
+        candidates = list(dict.fromkeys(pending + fights))
+        if not candidates:
+            return 0
+        missing = []
+        for key in candidates:
+            self.db.cursor.execute('SELECT 1 FROM fight_summary WHERE leek_id = ? AND fight_id = ?', key)
+            if self.db.cursor.fetchone() is None:
+                missing.append(key)
+        if not missing or not os.path.isdir(self.archive_root):
+            self.state["summary_pending"] = [list(key) for key in missing[-MAX_PENDING:]]
+            return 0
+
+        archive = FightArchive(self.archive_root)
+        summaries, still_pending = [], []
+        for leek_id, fight_id in missing:
+            fight = archive.get(fight_id, "data")
+            if fight is None:
+                still_pending.append([leek_id, fight_id])  # Not archived (yet)
+                continue
+            parsed = summarize_fight(fight, [leek_id])
+            if parsed:
+                summaries.append((leek_id, fight_id) + parsed)
+        self.db.save_fight_summaries(summaries)
+        self.state["summary_pending"] = still_pending[-MAX_PENDING:]
+        return len(summaries)
+
+    def export_summaries(self):
+        """Append fight_summary rows stored since the last export"""
+        self.db.cursor.execute('''
+            SELECT * FROM fight_summary WHERE recorded_seq > ? ORDER BY recorded_seq
+        ''', (self.state["summary_seq"],))
+        rows = []
+        for row in self.db.cursor.fetchall():
+            rows.append({name: _int(row[name]) for name in SUMMARY_COLUMNS})
+            self.state["summary_seq"] = row['recorded_seq']
+        self._append_part("fight_summary", rows, SUMMARY_COLUMNS)
+        return len(rows)
+
+    def export_opponent_stats(self):
+        """Rewrite the opponent_stats snapshot (with the decayed posterior as of now)"""
+        self.db.cursor.execute('SELECT * FROM opponent_stats')
+        now = time.time()
+        rows = []
+        for row in self.db.cursor.fetchall():
+            stats = self.db.stats_from_row(row, now)
+            rows.append({
+                'leek_id': row['leek_id'],
+                'opponent_id': row['opponent_id'],
+                'opponent_name': row['opponent_name'],
+                'opponent_level': _int(row['opponent_level']),
+                'wins': row['wins'],
+                'losses': row['losses'],
+                'draws': row['draws'],
+                'total_fights': row['total_fights'],
+                'win_rate': row['win_rate'],
+                'expected_win_rate': stats['expected_win_rate'],
+                'evidence': stats['evidence'],
+                'last_fought': to_epoch(row['last_fought']) if row['last_fought'] else float('nan'),
+            })
+        path = os.path.join(self.root, "opponent_stats" + _extension(self.fmt))
+        write_columns(path, {name: [row[name] for row in rows] for name in OPPONENT_COLUMNS},
+                      OPPONENT_COLUMNS, self.fmt)
+        return len(rows)
+
+    def export(self):
+        """Run one incremental export; returns {table: rows written}"""
+        fights = self.export_history()
+        self.backfill_summaries(fights)
+        summaries = self.export_summaries()
+        opponents = self.export_opponent_stats()
+        self._save_state()
+        return {"fight_history": len(fights), "fight_summary": summaries, "opponent_stats": opponents}
+
+    def compact(self):
+        """Merge each table's parts into a single part (deduplicated)"""
+        for table in ("fight_history", "fight_summary"):
+            parts = _parts(os.path.join(self.root, table))
+            if len(parts) < 2:
+                continue
+            columns = load_table(table, self.root)
+            dtypes = HISTORY_COLUMNS if table == "fight_history" else SUMMARY_COLUMNS
+            number = self.state["parts"].get(table, 0) + 1
+            path = os.path.join(self.root, table, f"part_{number:05d}{_extension(self.fmt)}")
+            write_columns(path, {name: columns[name].tolist() for name in dtypes}, dtypes, self.fmt)
+            self.state["parts"][table] = number
+            self._save_state()
+            for old in parts:
+                os.remove(old)
+            print(f"   🗜️ {table}: {len(parts)} parts → 1 ({len(columns['fight_id'])} rows)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export the fight database to columnar files')
+    parser.add_argument('--root', default=DEFAULT_ROOT, help=f'Output directory (default: {DEFAULT_ROOT})')
+    parser.add_argument('--format', choices=['npz', 'parquet'], default=None,
+                        help='File format (default: parquet if pyarrow is installed, else npz)')
+    parser.add_argument('--archive', default=ARCHIVE_ROOT,
+                        help=f'Fight archive to summarize older fights from (default: {ARCHIVE_ROOT})')
+    parser.add_argument('--compact', action='store_true', help='Merge the parts of each table afterwards')
+    args = parser.parse_args()
+
+    try:
+        exporter = FightExporter(args.root, args.format, archive_root=args.archive)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return 1
+
+    start = time.time()
+    counts = exporter.export()
+    print(f"📦 Exported to {args.root} ({exporter.fmt}) in {time.time() - start:.2f}s")
+    for table, count in counts.items():
+        print(f"   {table:<15} {count} rows")
+    if exporter.state["summary_pending"]:
+        print(f"   ⏳ {len(exporter.state['summary_pending'])} fights not archived yet (summarized on a later export)")
+    if args.compact:
+        exporter.compact()
+    exporter.db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
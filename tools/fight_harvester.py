@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Fight Harvester - Shared concurrent downloader for fight results and logs
+
+Fights are submitted as soon as they are started. A small worker pool waits
+for each one to finish generating, then stores its data and debug logs in
+the compressed fight archive (see fight_archive.py). A fight still generating
+after max_wait is reported as failed and never archived, so sync_fight_logs.py
+fetches it on a later run.
+The pool shares the caller's session, so a RateLimitedSession keeps every
+worker inside the same request budget.
+
+Usage:
+    from fight_harvester import FightHarvester
+
+    harvester = FightHarvester(session, max_workers=4)
+    harvester.submit(fight_id, "team_composition_123", on_result=callback)
+    ...
+    results = harvester.wait_all()
+    harvester.shutdown()
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config_loader import get_api_url
+from fight_archive import FightArchive
+
+BASE_URL = get_api_url()
+
+
+def fight_payload(data):
+    """/fight/get answers either the fight itself or {"fight": {...}}"""
+    if isinstance(data, dict) and isinstance(data.get("fight"), dict):
+        return data["fight"]
+    return data
+
+
+def summarize_fight(fight, our_leek_ids):
+    """Combat aggregates of a finished fight from our side: (summary, turns), or None without actions
+
+    summary holds the fight totals and turns one row per turn (the fight_summary
+    and fight_turns tables of the fight DB). Poison damage only shows in the totals.
+    """
+    from lw_test_script import FightActionParser
+
+    fight = fight_payload(fight)
+    data = fight.get("data") if isinstance(fight, dict) else None
+    actions = data.get("actions") if isinstance(data, dict) else None
+    if not actions:
+        return None
+
+    parser = FightActionParser()
+    parser.set_entity_names(fight, our_leek_ids)
+    parsed = parser.parse_actions(actions)
+    ours, theirs = parsed["our_stats"], parsed["enemy_stats"]
+
+    deaths = {}
+    for death in parsed["deaths"]:
+        key = "deaths" if death["is_ours"] else "enemy_deaths"
+        deaths.setdefault(death["turn"], {"deaths": 0, "enemy_deaths": 0})[key] += 1
+
+    def count(actions, prefix):
+        return sum(1 for action in actions if action.startswith(prefix))
+
+    turns = []
+    for entry in parsed["turn_timeline"]:
+        turn_deaths = deaths.get(entry["turn"], {})
+        turns.append({
+            'turn': entry["turn"],
+            'damage_dealt': entry["enemy_damage"],
+            'damage_taken': entry["our_damage"],
+            'weapon_uses': count(entry["our_actions"], "Attacked with"),
+            'chip_uses': count(entry["our_actions"], "Used "),
+            'enemy_weapon_uses': count(entry["enemy_actions"], "Attacked with"),
+            'enemy_chip_uses': count(entry["enemy_actions"], "Used "),
+            'deaths': turn_deaths.get("deaths", 0),
+            'enemy_deaths': turn_deaths.get("enemy_deaths", 0),
+        })
+
+    summary = {
+        'turns': parsed["total_turns"],
+        'damage_dealt': ours["damage_dealt"],
+        'damage_taken': ours["damage_taken"],
+        'healing': ours["healing"],
+        'enemy_healing': theirs["healing"],
+        'weapon_uses': sum(ours["weapons"].values()),
+        'chip_uses': sum(ours["chips"].values()),
+        'enemy_weapon_uses': sum(theirs["weapons"].values()),
+        'enemy_chip_uses': sum(theirs["chips"].values()),
+        'deaths': sum(1 for death in parsed["deaths"] if death["is_ours"]),
+        'enemy_deaths': sum(1 for death in parsed["deaths"] if not death["is_ours"]),
+    }
+    return summary, turns
+
+
+def is_fight_complete(fight):
+    """A fight is still processing while winner is -1 or no leeks are listed"""
+    if not isinstance(fight, dict):
+        return False
+    has_leeks = bool(fight.get("leeks1") or fight.get("leeks2") or fight.get("leeks"))
+    return fight.get("winner", -1) != -1 and has_leeks
+
+
+class FightHarvester:
+    def __init__(self, session, max_workers=4, max_wait=30.0, poll_interval=0.5, fight_watcher=None, archive=None):
+        """Harvest fights concurrently through a shared session"""
+        self.session = session
+        self.archive = archive or FightArchive()
+        self.max_wait = max_wait
+        self.poll_interval = poll_interval
+        self.fight_watcher = fight_watcher
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.futures = []
+        self.lock = threading.Lock()
+
+        self.successful = 0
+        self.failed = []
+
+    def get_json(self, url):
+        """GET a JSON document, None on any failure"""
+        try:
+            response = self.session.get(url)
+            if response.status_code == 200:
+                return response.json()
+        except Exception:
+            pass
+        return None
+
+    def wait_for_fight(self, fight_id):
+        """Poll /fight/get until the fight is generated; None if it is not by max_wait"""
+        url = f"{BASE_URL}/fight/get/{fight_id}"
+        deadline = time.monotonic() + self.max_wait
+        first = True
+
+        while True:
+            data = self.get_json(url)
+            if data is not None and is_fight_complete(fight_payload(data)):
+                return data
+            if time.monotonic() >= deadline:
+                return None
+            if first and self.fight_watcher:
+                # Block on the push notification, then re-check over HTTP
+                self.fight_watcher.wait(fight_id, timeout=max(0.0, deadline - time.monotonic()))
+            else:
+                time.sleep(self.poll_interval)
+            first = False
+
+    def harvest(self, fight_id, group):
+        """Wait for one fight and archive its data and logs"""
+        data = self.wait_for_fight(fight_id)
+        result = {"fight_id": fight_id, "data": data, "logs": None, "ok": False}
+
+        if data is not None:
+            self.archive.put(fight_id, "data", data, group)
+
+            logs = self.get_json(f"{BASE_URL}/fight/get-logs/{fight_id}")
+            if logs:
+                self.archive.put(fight_id, "logs", logs, group)
+            result["logs"] = logs
+            result["ok"] = True
+
+        with self.lock:
+            if result["ok"]:
+                self.successful += 1
+            else:
+                self.failed.append(fight_id)
+        return result
+
+    def _run(self, fight_id, group, on_result):
+        result = self.harvest(fight_id, group)
+        if on_result:
+            try:
+                on_result(result)
+            except Exception as e:
+                print(f"   ⚠️ Result handler failed for fight {fight_id}: {e}")
+        return result
+
+    def submit(self, fight_id, group, on_result=None):
+        """Queue a started fight; on_result(result) runs on the worker thread"""
+        future = self.executor.submit(self._run, fight_id, group, on_result)
+        with self.lock:
+            self.futures.append(future)
+        return future
+
+    def wait_all(self):
+        """Wait for every submitted fight and return their results"""
+        results = []
+        while True:
+            with self.lock:
+                pending = [f for f in self.futures if not f.done()]
+                if not pending:
+                    futures, self.futures = self.futures, []
+                    break
+            for future in pending:
+                future.result()
+        for future in futures:
+            results.append(future.result())
+        return results
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Fight Planner - Split the farmer's shared fight quota across leeks
+
+Every (leek, opponent) pairing gets an expected gain from:
+  - the win probability: the fight DB's decayed Beta posterior of the leek's
+    record against that opponent (classify_opponents), or over all the leek's
+    fights while it has too little evidence, updated with this session's results
+  - talent: LeekWars talent moves like an Elo rating, so a fight is worth
+    TALENT_K * (p - E), where E is the win chance implied by the talent gap
+  - XP: worth xp_weight per won fight (XP_LOSS_SHARE of that for a loss),
+    only for leeks below MAX_LEVEL
+
+A leek's expected gain per fight averages the pairings it would pick from
+next (its latest preferred opponents, weighted like choose_opponent); a leek
+that has not been offered opponents yet is scored on its overall record.
+The planner only splits fights between leeks: which opponent a leek fights is
+still chosen by the strategy (get_preferred_opponents).
+
+The remaining quota goes to the leek with the best expected gain, after every
+other active leek receives an exploration floor (MIN_SHARE of the quota, at
+least one fight while enough are left) so its estimate keeps being refreshed. The concurrent scheduler (lw_solo_fights_multi.py) claims
+fights from the plan, and the plan is recomputed every REPLAN_EVERY results,
+whenever a leek stops and whenever a leek has used up its share; a leek left
+without fights by a fresh plan is retired.
+
+Usage:
+    planner = FightPlanner(leeks, db)
+    planner.plan(remaining_fights)
+    planner.observe(leek_id, preferred, db.classify_opponents(...))
+    if planner.claim(leek_id): ...      # start a fight for that leek
+    planner.record(leek_id, "WIN")      # True when it is time to re-plan
+"""
+
+from fight_db import MIN_EVIDENCE, PRIOR_LOSSES, PRIOR_WINS
+
+MAX_LEVEL = 301
+TALENT_K = 20          # Talent swing of a fight against an equally rated opponent
+XP_WEIGHT = 5.0        # Talent-equivalent value of the XP of a won fight
+XP_LOSS_SHARE = 0.5    # XP of a lost fight relative to a won one
+MIN_SHARE = 0.1        # Fraction of the remaining quota every active leek gets (at least 1)
+REPLAN_EVERY = 10      # Results between re-plans
+
+
+def pick_weights(count):
+    """Relative chance of each preferred opponent being chosen (as in choose_opponent)"""
+    if count >= 3:
+        return [3, 2, 1] + [1] * (count - 3)
+    return [1] * count
+
+
+class FightPlanner:
+    def __init__(self, leeks, db, xp_weight=XP_WEIGHT):
+        """leeks: leek dicts (id, name, level, talent); db: FightDatabase for the decayed records"""
+        self.leeks = {leek['id']: leek for leek in leeks}
+        self.xp_weight = xp_weight
+        self.evidence = {leek_id: db.get_leek_evidence(leek_id) for leek_id in self.leeks}
+        self.offers = {}
+        self.active = set(self.leeks)
+        self.allocation = {leek_id: 0 for leek_id in self.leeks}
+        self.results_since_plan = 0
+        self.plans = 0
+
+    def win_probability(self, leek_id):
+        """Posterior mean of the leek's win rate (draws count half)"""
+        wins, losses = self.evidence[leek_id]
+        return (PRIOR_WINS + wins) / (PRIOR_WINS + PRIOR_LOSSES + wins + losses)
+
+    def matchup_probability(self, leek_id, stats):
+        """Win probability against one opponent: our record against it, else the leek's overall one"""
+        if stats and stats['evidence'] >= MIN_EVIDENCE:
+            return stats['expected_win_rate']
+        return self.win_probability(leek_id)
+
+    def matchup_gain(self, leek_id, p, opponent_talent):
+        """Expected talent-equivalent gain of one fight won with probability p"""
+        leek = self.leeks[leek_id]
+        talent = leek.get('talent')
+        if talent is not None and opponent_talent is not None:
+            elo_expected = 1 / (1 + 10 ** ((opponent_talent - talent) / 400))
+        else:
+            elo_expected = 0.5  # Matchmaking offers similarly rated opponents
+        gain = TALENT_K * (p - elo_expected)
+
+        if (leek.get('level') or 0) < MAX_LEVEL:
+            gain += self.xp_weight * (p + (1 - p) * XP_LOSS_SHARE)
+        return gain
+
+    def expected_gain(self, leek_id):
+        """Expected talent-equivalent gain of one more fight for this leek"""
+        offers = self.offers.get(leek_id)
+        if not offers:
+            return self.matchup_gain(leek_id, self.win_probability(leek_id), None)
+        weights = pick_weights(len(offers))
+        total = sum(weight * self.matchup_gain(leek_id, self.matchup_probability(leek_id, stats), talent)
+                    for weight, (talent, stats) in zip(weights, offers))
+        return total / sum(weights)
+
+    def plan(self, remaining):
+        """Allocate the remaining (unclaimed) fights; returns {leek_id: fights}"""
+        self.plans += 1
+        self.results_since_plan = 0
+        self.allocation = {leek_id: 0 for leek_id in self.leeks}
+        if remaining <= 0 or not self.active:
+            return self.allocation
+
+        ranked = sorted(self.active, key=self.expected_gain, reverse=True)
+        floor = max(1, int(remaining * MIN_SHARE))
+        # Floors go in rank order and always leave the best leek at least one fight
+        for leek_id in ranked[1:]:
+            self.allocation[leek_id] = min(floor, remaining - 1)
+            remaining -= self.allocation[leek_id]
+        self.allocation[ranked[0]] = remaining
+        return self.allocation
+
+    def claim(self, leek_id):
+        """Take one planned fight for a leek; False if none is planned for it"""
+        if self.allocation.get(leek_id, 0) <= 0:
+            return False
+        self.allocation[leek_id] -= 1
+        return True
+
+    def release(self, leek_id):
+        """Give back a claimed fight that failed to start"""
+        self.allocation[leek_id] = self.allocation.get(leek_id, 0) + 1
+
+    def observe(self, leek_id, preferred, stats=None):
+        """Remember the opponents a leek picks its next fight from
+
+        preferred: the strategy's opponent list, best first; stats: the leek's
+        classify_opponents() records against them.
+        """
+        stats = stats or {}
+        self.offers[leek_id] = [(opp.get('talent'), stats.get(opp['id'])) for opp in preferred]
+
+    def record(self, leek_id, result):
+        """Fold a finished fight into the leek's record; True when a re-plan is due"""
+        wins, losses = self.evidence[leek_id]
+        self.evidence[leek_id] = (wins + {'WIN': 1.0, 'DRAW': 0.5}.get(result, 0.0),
+                                  losses + {'LOSS': 1.0, 'DRAW': 0.5}.get(result, 0.0))
+        self.results_since_plan += 1
+        return self.results_since_plan >= REPLAN_EVERY
+
+    def retire(self, leek_id):
+        """Stop planning fights for a leek (its worker gave up)"""
+        self.active.discard(leek_id)
+
+    def describe(self):
+        """One line per planned leek: fights, win probability and expected gain"""
+        return ", ".join(
+            f"{self.leeks[leek_id]['name']} {fights} ({self.win_probability(leek_id):.0%}, "
+            f"{self.expected_gain(leek_id):+.1f}/fight)"
+            for leek_id, fights in sorted(self.allocation.items(), key=lambda item: -item[1])
+            if leek_id in self.active
+        )
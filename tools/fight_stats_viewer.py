@@ -1,12 +1,20 @@
 #!/usr/bin/env python3
 """
 Fight Statistics Viewer - View detailed stats from fight database
-Usage: python3 fight_stats_viewer.py <leek_id>
+Usage: python3 fight_stats_viewer.py <leek_id> [--rebuild] [--damage]
+       python3 fight_stats_viewer.py --vs <opponent_id>
+  --rebuild  recompute opponent_stats and the rollups from fight_history and report drift
+  --damage   add early-turn damage by opponent build (scans the leek's fight_turns)
+  --vs       compare every leek's record against one opponent
+
+The overview reads the rollup tables and indexed top-10 queries, so it takes
+the same time however many fights are stored.
 """
 
 import sys
 import os
-from fight_db import FightDatabase
+from config_loader import get_fight_db_path
+from fight_db import FightDatabase, LEVEL_BUCKET
 from datetime import datetime
 
 def format_timestamp(ts_str):
@@ -19,12 +27,28 @@ def format_timestamp(ts_str):
     except:
         return ts_str
 
-def display_stats(leek_id):
+def rebuild_stats(leek_id):
+    """Recompute the incrementally maintained opponent stats"""
+    if not os.path.exists(get_fight_db_path()):
+        return
+    db = FightDatabase(leek_id)
+    mismatches = db.rebuild_stats()
+    db.close()
+    if mismatches:
+        print(f"🔧 Rebuilt opponent stats and rollups: {mismatches} row(s) were out of sync")
+    else:
+        print("✅ Opponent stats and rollups consistent with fight history")
+
+def win_rate_line(row):
+    """W-L-D and win rate of a rollup row"""
+    return f"{row['wins']}W-{row['losses']}L-{row['draws']}D ({row['wins'] / row['fights']:.0%})"
+
+def display_stats(leek_id, damage=False):
     """Display comprehensive fight statistics"""
-    db_path = f"fight_history_{leek_id}.db"
+    db_path = get_fight_db_path()
 
     if not os.path.exists(db_path):
-        print(f"❌ No database found for leek ID {leek_id}")
+        print("❌ No fight database found")
         print(f"   Expected: {db_path}")
         return
 
@@ -46,18 +70,36 @@ def display_stats(leek_id):
     print(f"\n📊 OVERALL STATISTICS")
     print(f"   Total fights: {stats['total_fights']}")
     if stats['total_fights'] > 0:
-        print(f"   Win rate: {stats['win_rate']:.1%}")
-        print(f"   Opponents tracked: {stats['opponents_tracked']}")
-        print(f"   🟢 Beatable: {stats['beatable_opponents']}")
-        print(f"   🔴 Dangerous: {stats['dangerous_opponents']}")
+        print(f"   Win rate: {stats['win_rate']:.1%} ({stats['wins']}W-{stats['losses']}L-{stats['draws']}D)")
+        print(f"   Opponents tracked: {stats['opponents_tracked']} (status as of their last fight)")
+        print(f"   🟢 Beatable: {stats['beatable_opponents']}   🟡 Even: {stats['even_opponents']}   "
+              f"🔴 Dangerous: {stats['dangerous_opponents']}   ⚪ Unknown: {stats['unknown_opponents']}")
+
+    # Daily win rate
+    daily = db.get_daily_stats(14)
+    if daily:
+        print(f"\n📅 DAILY WIN RATE (Last {len(daily)} fighting days)")
+        print("-" * 70)
+        for day in daily:
+            print(f"   {day['day']}  {day['fights']:>4} fights  {win_rate_line(day)}")
+
+    # Win rate by opponent level
+    levels = db.get_level_stats()
+    if levels:
+        print(f"\n📈 WIN RATE BY OPPONENT LEVEL")
+        print("-" * 70)
+        for bucket in levels:
+            label = "unknown" if bucket['level_bucket'] < 0 else \
+                f"L{bucket['level_bucket']}-{bucket['level_bucket'] + LEVEL_BUCKET - 1}"
+            print(f"   {label:<10} {bucket['fights']:>5} fights  {win_rate_line(bucket)}")
 
     # Recent fights
     print(f"\n📜 RECENT FIGHTS (Last 10)")
     print("-" * 70)
     db.cursor.execute('''
-        SELECT * FROM fight_history
+        SELECT * FROM fight_history WHERE leek_id = ?
         ORDER BY timestamp DESC LIMIT 10
-    ''')
+    ''', (leek_id,))
     recent_fights = db.cursor.fetchall()
 
     if recent_fights:
@@ -74,9 +116,9 @@ def display_stats(leek_id):
     print(f"\n🎯 MOST FOUGHT OPPONENTS")
     print("-" * 70)
     db.cursor.execute('''
-        SELECT * FROM opponent_stats
+        SELECT * FROM opponent_stats WHERE leek_id = ?
         ORDER BY total_fights DESC LIMIT 10
-    ''')
+    ''', (leek_id,))
     top_opponents = db.cursor.fetchall()
 
     if top_opponents:
@@ -87,9 +129,9 @@ def display_stats(leek_id):
                 'even': '🟡',
                 'unknown': '⚪'
             }
-            stats = db.get_opponent_stats(opp['opponent_id'])
+            stats = db.stats_from_row(opp)
             icon = status_icons.get(stats['status'], '⚪')
-            difficulty = db.calculate_opponent_difficulty(opp['opponent_id'])
+            difficulty = stats['difficulty']
 
             print(f"{i:>2}. {icon} {opp['opponent_name']:<25} L{opp['opponent_level']} → "
                   f"{opp['wins']}W-{opp['losses']}L-{opp['draws']}D "
@@ -103,15 +145,15 @@ def display_stats(leek_id):
     print("-" * 70)
     db.cursor.execute('''
         SELECT * FROM opponent_stats
-        WHERE win_rate >= 0.7 AND total_fights >= 3
+        WHERE leek_id = ? AND win_rate >= 0.7 AND total_fights >= 3
         ORDER BY win_rate DESC, total_fights DESC
         LIMIT 10
-    ''')
+    ''', (leek_id,))
     best_matchups = db.cursor.fetchall()
 
     if best_matchups:
         for i, opp in enumerate(best_matchups, 1):
-            difficulty = db.calculate_opponent_difficulty(opp['opponent_id'])
+            difficulty = db.stats_from_row(opp)['difficulty']
             print(f"{i:>2}. {opp['opponent_name']:<25} L{opp['opponent_level']} → "
                   f"{opp['wins']}W-{opp['losses']}L-{opp['draws']}D "
                   f"({opp['win_rate']:.0%}, diff:{difficulty})")
@@ -123,33 +165,74 @@ def display_stats(leek_id):
     print("-" * 70)
     db.cursor.execute('''
         SELECT * FROM opponent_stats
-        WHERE win_rate <= 0.3 AND total_fights >= 3
+        WHERE leek_id = ? AND win_rate <= 0.3 AND total_fights >= 3
         ORDER BY win_rate ASC, total_fights DESC
         LIMIT 10
-    ''')
+    ''', (leek_id,))
     worst_matchups = db.cursor.fetchall()
 
     if worst_matchups:
         for i, opp in enumerate(worst_matchups, 1):
-            difficulty = db.calculate_opponent_difficulty(opp['opponent_id'])
+            difficulty = db.stats_from_row(opp)['difficulty']
             print(f"{i:>2}. {opp['opponent_name']:<25} L{opp['opponent_level']} → "
                   f"{opp['wins']}W-{opp['losses']}L-{opp['draws']}D "
                   f"({opp['win_rate']:.0%}, diff:{difficulty})")
     else:
         print("   No problematic matchups yet")
 
+    # Early-turn damage by scouted opponent build (fight_turns)
+    early = db.get_turn_damage_by_build(1, 3) if damage else None
+    if early:
+        print(f"\n💥 EARLY DAMAGE BY OPPONENT BUILD (Turns 1-3, per fight)")
+        print("-" * 70)
+        for build_type, damage in sorted(early.items(), key=lambda item: -item[1]['damage_taken']):
+            print(f"   {build_type:<17} taken {damage['damage_taken']:>6.0f}  dealt {damage['damage_dealt']:>6.0f}  "
+                  f"({damage['fights']} fights)")
+
+    db.close()
+    print("\n" + "="*70)
+
+def display_matchup(opponent_id):
+    """Compare every leek's record against one opponent"""
+    if not os.path.exists(get_fight_db_path()):
+        print(f"❌ No fight database found at {get_fight_db_path()}")
+        return
+
+    db = FightDatabase()
+    records = db.get_cross_leek_stats([opponent_id]).get(opponent_id, [])
+    best = db.best_leek_against(opponent_id)
     db.close()
+
+    print("="*70)
+    print(f"CROSS-LEEK MATCHUP - OPPONENT ID {opponent_id}")
+    print("="*70)
+    if not records:
+        print("   None of our leeks has fought this opponent yet")
+        return
+
+    for stats in records:
+        print(f"🥬 {(stats['leek_name'] or stats['leek_id']):<25} → "
+              f"{stats['wins']}W-{stats['losses']}L-{stats['draws']}D "
+              f"({stats['win_rate']:.0%}, {stats['total_fights']} fights, diff:{stats['difficulty']})")
+    if best:
+        print(f"\n🏆 Best pick: {best['leek_name'] or best['leek_id']} ({best['win_rate']:.0%} over {best['total_fights']} fights)")
     print("\n" + "="*70)
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("Usage: python3 fight_stats_viewer.py <leek_id>")
+        print("Usage: python3 fight_stats_viewer.py <leek_id> [--rebuild] [--damage]")
+        print("       python3 fight_stats_viewer.py --vs <opponent_id>")
         print("\nExample: python3 fight_stats_viewer.py 123456")
         sys.exit(1)
 
     try:
+        if sys.argv[1] == '--vs':
+            display_matchup(int(sys.argv[2]))
+            sys.exit(0)
         leek_id = int(sys.argv[1])
-        display_stats(leek_id)
+        if '--rebuild' in sys.argv[2:]:
+            rebuild_stats(leek_id)
+        display_stats(leek_id, damage='--damage' in sys.argv[2:])
     except ValueError:
         print("❌ Invalid leek ID - must be a number")
         sys.exit(1)
@@ -4,12 +4,25 @@ Generate LeekScript item database from market_data.json
 
 This script reads the market_data.json file and generates a LeekScript module
 (item_database.lk) containing all weapon and chip information as static data structures.
+
+The generated header records a hash of the source data; when item_database.lk
+already matches the current market_data.json nothing is rewritten (and
+upload_v8.py's manifest then skips the module too).
+
+Usage:
+    python3 generate_item_database.py [--force]
 """
 
+import argparse
 import json
 import os
+import re
 import sys
 
+from metadata_cache import data_hash
+
+SOURCE_HASH_PATTERN = re.compile(r'^// Source hash: ([0-9a-f]{64})$', re.MULTILINE)
+
 def escape_string(s):
     """Escape string for LeekScript"""
     return s.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
@@ -86,14 +99,27 @@ def generate_chip_entry(chip_id, chip_data):
         {cooldown}  // cooldown
     ]"""
 
-def generate_leekscript_database(json_path, output_path):
-    """Generate the complete LeekScript database file"""
+def existing_source_hash(output_path):
+    """Source hash recorded in a previously generated database, or None"""
+    if not os.path.exists(output_path):
+        return None
+    with open(output_path, 'r') as f:
+        match = SOURCE_HASH_PATTERN.search(f.read(2048))
+    return match.group(1) if match else None
+
+def generate_leekscript_database(json_path, output_path, force=False):
+    """Generate the complete LeekScript database file; returns False if it was already up to date"""
 
     with open(json_path, 'r') as f:
         data = json.load(f)
 
     weapons = data.get('weapons', {})
     chips = data.get('chips', {})
+    source_hash = data_hash({'weapons': weapons, 'chips': chips})
+
+    if not force and existing_source_hash(output_path) == source_hash:
+        print(f"⏭️  {output_path} is up to date (source hash {source_hash[:12]})")
+        return False
 
     print(f"Found {len(weapons)} weapons and {len(chips)} chips")
 
@@ -107,9 +133,13 @@ def generate_leekscript_database(json_path, output_path):
     for chip_id, chip_data in chips.items():
         chip_entries.append(generate_chip_entry(chip_id, chip_data))
 
+    weapons_code = ',\n'.join(weapon_entries)
+    chips_code = ',\n'.join(chip_entries)
+
     # Build the complete LeekScript file
     leekscript_code = f"""// AUTO-GENERATED FILE - DO NOT EDIT MANUALLY
 // Generated from market_data.json by tools/generate_item_database.py
+// Source hash: {source_hash}
 //
 // This module provides static weapon and chip data for the V8 AI system.
 // Data format:
@@ -118,11 +148,11 @@ def generate_leekscript_database(json_path, output_path):
 //   Effects: [effect_type: [min_value, max_value, turns], ...]
 
 global WEAPON_DATABASE = [
-{',\n'.join(weapon_entries)}
+{weapons_code}
 ]
 
 global CHIP_DATABASE = [
-{',\n'.join(chip_entries)}
+{chips_code}
 ]
 
 // Lookup functions
@@ -160,8 +190,13 @@ function hasChipData(chipId) {{
     # Report file size
     file_size = os.path.getsize(output_path)
     print(f"  - File size: {file_size:,} bytes ({file_size / 1024:.1f} KB)")
+    return True
 
 def main():
+    parser = argparse.ArgumentParser(description='Generate item_database.lk from market_data.json')
+    parser.add_argument('--force', action='store_true', help='Regenerate even if the source data is unchanged')
+    args = parser.parse_args()
+
     script_dir = os.path.dirname(os.path.abspath(__file__))
     project_root = os.path.dirname(script_dir)
 
@@ -172,8 +207,8 @@ def main():
         print(f"Error: {json_path} not found", file=sys.stderr)
         sys.exit(1)
 
-    generate_leekscript_database(json_path, output_path)
-    print("\\nDone! Don't forget to upload the V8 modules with the new database.")
+    if generate_leekscript_database(json_path, output_path, force=args.force):
+        print("\\nDone! Don't forget to upload the V8 modules with the new database.")
 
 if __name__ == '__main__':
     main()
@@ -8,9 +8,9 @@ Usage:
 
 import requests
 import argparse
-from config_loader import load_credentials
+from config_loader import load_credentials, get_api_url
 
-BASE_URL = "https://leekwars.com/api"
+BASE_URL = get_api_url()
 
 
 def get_leeks(account='main'):
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+LeekScript include graph - Parses include('...') statements of the V8 modules
+
+Paths are resolved relative to the including file, like the LeekWars
+compiler does, and returned relative to the modules root (e.g.
+include('../scenario_generator') in strategy/base_strategy.lk resolves to
+'scenario_generator.lk').
+
+Usage:
+    from lk_includes import build_include_graph, upload_levels
+
+    graph = build_include_graph(Path("V8_modules"))
+    for level in upload_levels(graph, last="main.lk"):
+        ...  # modules in a level only depend on earlier levels
+
+    python3 lk_includes.py [V8_modules]   # print the graph and upload order
+"""
+
+import os
+import re
+import sys
+from pathlib import Path
+
+INCLUDE_PATTERN = re.compile(r"""^\s*include\s*\(\s*['"]([^'"]+)['"]\s*\)""", re.MULTILINE)
+
+
+def parse_includes(code):
+    """Raw include targets in source order (commented-out lines are ignored)"""
+    includes = []
+    for match in INCLUDE_PATTERN.finditer(code):
+        line_start = code.rfind("\n", 0, match.start()) + 1
+        if code[line_start:match.start()].lstrip().startswith("//"):
+            continue
+        includes.append(match.group(1))
+    return includes
+
+
+def resolve_include(module, target):
+    """Resolve an include target relative to the including module"""
+    base = os.path.dirname(module)
+    path = os.path.normpath(os.path.join(base, target)).replace(os.sep, "/")
+    if not path.endswith(".lk"):
+        path += ".lk"
+    return path
+
+
+def build_include_graph(modules_dir, modules=None):
+    """Map each module (relative path) to the modules it includes"""
+    modules_dir = Path(modules_dir)
+    if modules is None:
+        modules = [p.relative_to(modules_dir).as_posix() for p in sorted(modules_dir.rglob("*.lk"))]
+
+    graph = {}
+    for module in modules:
+        path = modules_dir / module
+        if not path.exists():
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            code = f.read()
+        graph[module] = [resolve_include(module, target) for target in parse_includes(code)]
+    return graph
+
+
+def upload_levels(graph, last=None):
+    """Group modules into levels so every module comes after what it includes
+
+    Modules within a level are independent and can be uploaded in parallel.
+    `last` (e.g. 'main.lk') is forced into a final level of its own. Include
+    cycles are broken by placing the remaining modules in one final level.
+    """
+    pending = {module: {dep for dep in deps if dep in graph and dep != module}
+               for module, deps in graph.items() if module != last}
+    levels = []
+    done = set()
+
+    while pending:
+        ready = sorted(module for module, deps in pending.items() if deps <= done)
+        if not ready:
+            # Include cycle - upload the rest together
+            ready = sorted(pending)
+        levels.append(ready)
+        done.update(ready)
+        for module in ready:
+            del pending[module]
+
+    if last in graph:
+        levels.append([last])
+    return levels
+
+
+def main():
+    modules_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(__file__).parent.parent / "V8_modules"
+    if not modules_dir.exists():
+        print(f"❌ Directory not found: {modules_dir}")
+        return 1
+
+    graph = build_include_graph(modules_dir)
+    missing = sorted({dep for deps in graph.values() for dep in deps if dep not in graph})
+
+    print(f"📦 {len(graph)} modules in {modules_dir}")
+    for index, level in enumerate(upload_levels(graph, last="main.lk"), 1):
+        print(f"   Level {index}: {', '.join(level)}")
+    if missing:
+        print(f"⚠️  Included but not found: {', '.join(missing)}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
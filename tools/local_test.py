@@ -13,6 +13,8 @@ Examples:
     python3 tools/local_test.py 1 dummy_str --leek MargaretHamilton --verbose
     python3 tools/local_test.py 10 dummy_str --leek KurtGodel --parallel 4
     python3 tools/local_test.py 1 mirror --leek MargaretHamilton --seed 42
+    python3 tools/local_test.py 10 dummy_str --leek KurtGodel --build --bundle
+    python3 tools/local_test.py 10 dummy_str --leek KurtGodel --build --profile strength
 
 Available opponents:
     dummy_str    600 STR, 300 WIS (simple AI, move+attack)
@@ -76,7 +78,7 @@ def load_configs():
         return json.load(f)
 
 
-def build_scenario(leek_cfg, opponent_cfg, seed=None, opponent_ai=None):
+def build_scenario(leek_cfg, opponent_cfg, seed=None, opponent_ai=None, ai_path=None):
     """Build a scenario JSON dict matching the generator's expected format.
 
     Args:
@@ -84,12 +86,13 @@ def build_scenario(leek_cfg, opponent_cfg, seed=None, opponent_ai=None):
         opponent_cfg: Opponent config dict
         seed: Random seed (None = random)
         opponent_ai: Override AI path for opponent (for mirror mode)
+        ai_path: Override our AI path (e.g. a build_v8.py output)
     """
     if seed is None:
         seed = random.randint(1, 2**31 - 1)
 
     # Resolve AI paths
-    our_ai = AI_PATH
+    our_ai = ai_path or AI_PATH
     opp_ai = opponent_ai or opponent_cfg.get("ai_relative", "test/ai/basic.leek")
 
     # Build entity configs
@@ -152,7 +155,7 @@ def build_scenario(leek_cfg, opponent_cfg, seed=None, opponent_ai=None):
     return scenario
 
 
-def build_boss_scenario(configs, seed=None):
+def build_boss_scenario(configs, seed=None, ai_path=None):
     """Build a Fennel King boss fight scenario with all 4 leeks vs graal + crystals.
 
     Loads the boss template and map data, builds team 1 from leek configs,
@@ -203,7 +206,7 @@ def build_boss_scenario(configs, seed=None):
 
         entity = {
             "id": entity_id,
-            "ai": AI_PATH,
+            "ai": ai_path or AI_PATH,
             "name": cfg["name"],
             "type": cfg.get("type", 0),
             "farmer": farmer_id,
@@ -533,6 +536,10 @@ def main():
     parser.add_argument("--seed", type=int, default=None, help="Random seed for deterministic replay")
     parser.add_argument("--verbose", action="store_true", help="Save per-fight logs and stderr")
     parser.add_argument("--save", action="store_true", help="Save results JSON to file")
+    parser.add_argument("--build", action="store_true", help="Fight with the minified build (build_v8.py)")
+    parser.add_argument("--bundle", action="store_true", help="With --build, inline all modules into one file")
+    parser.add_argument("--profile", default=None,
+                        help="With --build, specialize the AI for one weight profile (e.g. strength)")
 
     args = parser.parse_args()
 
@@ -542,6 +549,20 @@ def main():
         print("Build it: cd /home/ubuntu/leek-wars-generator && JAVA_HOME=/usr/lib/jvm/java-21-openjdk-amd64 ./gradlew jar")
         return 1
 
+    # Build the AI if requested (the generator accepts absolute AI paths)
+    ai_path = AI_PATH
+    if args.build:
+        from build_v8 import BUILD_DIR, build, fold_weight_profiles, print_stats
+        passes = [fold_weight_profiles(args.profile)] if args.profile else []
+        out_dir = BUILD_DIR / args.profile.lower() if args.profile else BUILD_DIR
+        try:
+            entry_path, build_stats = build(PROJECT_DIR / "V8_modules", out_dir, bundled=args.bundle, passes=passes)
+        except (OSError, ValueError) as e:
+            print(f"ERROR: Build failed: {e}")
+            return 1
+        print_stats(entry_path, build_stats)
+        ai_path = str(entry_path.resolve())
+
     # Load configs
     configs = load_configs()
     is_boss = args.opponent == "boss_fennel"
@@ -564,7 +585,7 @@ def main():
         if args.opponent == "mirror":
             opponent_cfg = leek_cfg.copy()
             opponent_cfg["name"] = f"{leek_cfg['name']}_Mirror"
-            opponent_ai = AI_PATH
+            opponent_ai = ai_path
         else:
             opponent_cfg = configs.get("opponents", {}).get(args.opponent)
             if not opponent_cfg:
@@ -588,9 +609,9 @@ def main():
         if args.seed is not None and args.num_fights > 1:
             seed = args.seed + i
         if is_boss:
-            scenario = build_boss_scenario(configs, seed=seed)
+            scenario = build_boss_scenario(configs, seed=seed, ai_path=ai_path)
         else:
-            scenario = build_scenario(leek_cfg, opponent_cfg, seed=seed, opponent_ai=opponent_ai)
+            scenario = build_scenario(leek_cfg, opponent_cfg, seed=seed, opponent_ai=opponent_ai, ai_path=ai_path)
         scenarios.append((scenario, i, args.verbose))
 
     # Run fights
@@ -19,21 +19,35 @@ import random
 import time
 from datetime import datetime
 from getpass import getpass
-import os
 import sys
 import argparse
-import websocket
-import threading
-import ssl
-from config_loader import load_credentials
+from config_loader import load_credentials, get_api_url
+from fight_harvester import FightHarvester
+from rate_limiter import RateLimiter, RateLimitedSession
+from lw_websocket import LeekWarsSocket, SocketMessage, WS_URL
 
-BASE_URL = "https://leekwars.com/api"
-WS_URL = "wss://leekwars.com/ws"
+BASE_URL = get_api_url()
+
+# Squad lifecycle: IDLE -> CREATING -> IN_SQUAD -> ATTACKING -> STARTED -> LEAVING -> IDLE
+STATE_DISCONNECTED = "disconnected"
+STATE_IDLE = "idle"
+STATE_CREATING = "creating"
+STATE_IN_SQUAD = "in_squad"
+STATE_ATTACKING = "attacking"
+STATE_STARTED = "started"
+STATE_LEAVING = "leaving"
+
+# Seconds to wait for each expected server message
+CREATE_TIMEOUT = 10
+ADD_LEEK_TIMEOUT = 2
+ATTACK_TIMEOUT = 30  # Boss fights may take longer to start
+LEAVE_TIMEOUT = 5
 
 class LeekWarsBossFighter:
     def __init__(self):
         """Initialize session and variables"""
-        self.session = requests.Session()
+        # Rate-limited so the concurrent log harvester stays within budget
+        self.session = RateLimitedSession(RateLimiter(4.0))
         self.farmer = None
         self.token = None
         self.leeks = {}
@@ -42,12 +56,11 @@ class LeekWarsBossFighter:
         self.fight_ids = []  # Store fight IDs for later log retrieval
         
         # WebSocket related
-        self.ws = None
-        self.ws_connected = False
+        self.socket = None
+        self.state = STATE_DISCONNECTED
         self.squad_id = None
         self.boss_squads = {}
         self.current_squad = None
-        self.fight_started = False
         
         # Boss definitions from frontend code
         self.BOSSES = {
@@ -56,22 +69,8 @@ class LeekWarsBossFighter:
             3: {"id": 3, "name": "evil_pumpkin", "level": 300, "difficulty": 3}
         }
         
-        # WebSocket message types (from frontend)
-        self.SocketMessage = {
-            'GARDEN_BOSS_CREATE_SQUAD': 66,
-            'GARDEN_BOSS_JOIN_SQUAD': 67,
-            'GARDEN_BOSS_ADD_LEEK': 68,
-            'GARDEN_BOSS_REMOVE_LEEK': 69,
-            'GARDEN_BOSS_ATTACK': 71,
-            'GARDEN_BOSS_LISTEN': 72,
-            'GARDEN_BOSS_SQUADS': 73,
-            'GARDEN_BOSS_SQUAD_JOINED': 74,
-            'GARDEN_BOSS_LEAVE_SQUAD': 75,
-            'GARDEN_BOSS_SQUAD': 76,
-            'GARDEN_BOSS_NO_SUCH_SQUAD': 77,
-            'GARDEN_BOSS_STARTED': 78,
-            'GARDEN_BOSS_LEFT': 82
-        }
+        # WebSocket message types (shared with lw_websocket)
+        self.SocketMessage = SocketMessage
         
     def login(self, email, password):
         """Login using email and password, maintain session cookies"""
@@ -157,76 +156,47 @@ class LeekWarsBossFighter:
             print(f"   ❌ Request failed: {e}")
             return False
     
-    def connect_websocket(self):
+    def connect_websocket(self, url=WS_URL):
         """Connect to LeekWars WebSocket for boss fights"""
         print("🔌 Connecting to WebSocket...")
         
-        try:
-            # Get session cookies for WebSocket authentication
-            cookies = "; ".join([f"{name}={value}" for name, value in self.session.cookies.items()])
-            
-            def on_message(ws, message):
-                try:
-                    data = json.loads(message)
-                    self.handle_websocket_message(data)
-                except json.JSONDecodeError:
-                    pass
-            
-            def on_error(ws, error):
-                print(f"   ❌ WebSocket error: {error}")
-            
-            def on_close(ws, close_status_code, close_msg):
-                print("   🔌 WebSocket disconnected")
-                self.ws_connected = False
-            
-            def on_open(ws):
-                print("   ✅ WebSocket connected")
-                self.ws_connected = True
-                # Listen for boss squad updates
-                self.send_websocket_message([self.SocketMessage['GARDEN_BOSS_LISTEN']])
-            
-            # Create WebSocket connection with cookies
-            websocket.enableTrace(False)
-            self.ws = websocket.WebSocketApp(
-                WS_URL,
-                header={"Cookie": cookies},
-                on_open=on_open,
-                on_message=on_message,
-                on_error=on_error,
-                on_close=on_close
-            )
-            
-            # Start WebSocket in a separate thread
-            self.ws_thread = threading.Thread(target=self.ws.run_forever, kwargs={'sslopt': {"cert_reqs": ssl.CERT_NONE}})
-            self.ws_thread.daemon = True
-            self.ws_thread.start()
-            
-            # Wait for connection
-            timeout = 10
-            while not self.ws_connected and timeout > 0:
-                time.sleep(0.1)
-                timeout -= 0.1
-            
-            if not self.ws_connected:
-                print("   ❌ Failed to connect to WebSocket")
-                return False
-                
-            return True
-            
-        except Exception as e:
-            print(f"   ❌ WebSocket connection failed: {e}")
+        self.socket = LeekWarsSocket(self.session, url, verbose=True)
+        for name, message_type in self.SocketMessage.items():
+            if name.startswith('GARDEN_BOSS_'):
+                self.socket.subscribe(message_type, self.handle_websocket_message)
+        
+        if not self.socket.connect():
+            print("   ❌ Failed to connect to WebSocket")
             return False
+        
+        print("   ✅ WebSocket connected")
+        self.state = STATE_IDLE
+        # Listen for boss squad updates
+        self.send_websocket_message([self.SocketMessage['GARDEN_BOSS_LISTEN']])
+        return True
     
     def send_websocket_message(self, message):
         """Send a message via WebSocket"""
-        if self.ws and self.ws_connected:
-            try:
-                self.ws.send(json.dumps(message))
-            except Exception as e:
-                print(f"   ❌ Failed to send WebSocket message: {e}")
+        if not self.socket or not self.socket.send(message):
+            print("   ❌ Failed to send WebSocket message")
+            return False
+        return True
+    
+    def request(self, message, expected, timeout):
+        """Send a message and wait for one of the expected replies (None on timeout)"""
+        expected = [self.SocketMessage[name] for name in expected]
+        # Register the waiter first so a fast reply cannot be missed
+        waiter = self.socket.expect(expected)
+        if not self.send_websocket_message(message):
+            self.socket.cancel(waiter)
+            return None
+        reply = waiter.wait(timeout)
+        if reply is None:
+            self.socket.cancel(waiter)
+        return reply
     
     def handle_websocket_message(self, data):
-        """Handle incoming WebSocket messages"""
+        """Handle incoming WebSocket messages (runs on the socket thread)"""
         if not isinstance(data, list) or len(data) < 1:
             return
         
@@ -243,32 +213,38 @@ class LeekWarsBossFighter:
             if len(data) > 1:
                 self.current_squad = data[1]
                 self.squad_id = self.current_squad.get('id')
-                print(f"   ✅ Joined squad: {self.squad_id}")
+                self.state = STATE_IN_SQUAD
                 
         elif message_type == self.SocketMessage['GARDEN_BOSS_SQUAD']:
             # Squad update received
             if len(data) > 1:
                 self.current_squad = data[1]
-                print(f"   📊 Squad updated")
                 
         elif message_type == self.SocketMessage['GARDEN_BOSS_STARTED']:
             # Boss fight started
             if len(data) > 1:
                 fight_id = data[1]
                 self.fight_ids.append(fight_id)
-                self.fight_started = True
+                self.state = STATE_STARTED
                 print(f"   🎮 Boss fight started: {fight_id}")
                 
         elif message_type == self.SocketMessage['GARDEN_BOSS_NO_SUCH_SQUAD']:
             print(f"   ❌ Squad not found")
+            self.current_squad = None
+            self.squad_id = None
+            self.state = STATE_IDLE
             
         elif message_type == self.SocketMessage['GARDEN_BOSS_LEFT']:
-            print(f"   👋 Left squad")
             self.current_squad = None
             self.squad_id = None
+            self.state = STATE_IDLE
             
     def create_boss_squad(self, boss_level):
         """Create a new boss squad for the specified boss"""
+        if self.state != STATE_IDLE:
+            print(f"   ❌ Cannot create squad while {self.state}")
+            return False
+        
         boss = self.BOSSES.get(boss_level)
         if not boss:
             print(f"   ❌ Invalid boss level: {boss_level}")
@@ -290,65 +266,60 @@ class LeekWarsBossFighter:
             [int(leek_id) for leek_id in leek_ids]  # All available leeks
         ]
         
-        self.send_websocket_message(message)
-        
-        # Wait for squad creation response
-        timeout = 10
-        while not self.squad_id and timeout > 0:
-            time.sleep(0.1)
-            timeout -= 0.1
+        self.state = STATE_CREATING
+        reply = self.request(message, ['GARDEN_BOSS_SQUAD_JOINED', 'GARDEN_BOSS_NO_SUCH_SQUAD'], CREATE_TIMEOUT)
         
-        if self.squad_id:
+        if reply and self.state == STATE_IN_SQUAD:
             print(f"   ✅ Squad created: {self.squad_id}")
             return True
         else:
             print(f"   ❌ Failed to create squad")
+            self.state = STATE_IDLE
             return False
     
     def add_leeks_to_squad(self):
         """Add all available leeks to the current squad"""
-        if not self.current_squad:
+        if self.state != STATE_IN_SQUAD:
             return False
             
-        # Add each leek to the squad
+        # Add each leek to the squad, waiting for the squad update instead of sleeping
         for leek_id, leek_data in self.leeks.items():
             message = [self.SocketMessage['GARDEN_BOSS_ADD_LEEK'], int(leek_id)]
-            self.send_websocket_message(message)
-            time.sleep(0.1)  # Small delay between additions
+            if self.request(message, ['GARDEN_BOSS_SQUAD'], ADD_LEEK_TIMEOUT) is None:
+                print(f"   ⚠️ No squad update after adding {leek_data.get('name', leek_id)}")
             
         return True
     
     def start_boss_attack(self):
         """Start the boss attack with current squad"""
-        if not self.current_squad:
+        if self.state != STATE_IN_SQUAD:
             print(f"   ❌ No squad available for attack")
             return False
             
         print(f"   ⚔️ Starting boss attack...")
-        message = [self.SocketMessage['GARDEN_BOSS_ATTACK']]
-        self.send_websocket_message(message)
-        
-        # Wait for fight to start
-        timeout = 30  # Boss fights may take longer to start
-        self.fight_started = False
-        
-        while not self.fight_started and timeout > 0:
-            time.sleep(0.1)
-            timeout -= 0.1
+        self.state = STATE_ATTACKING
+        reply = self.request([self.SocketMessage['GARDEN_BOSS_ATTACK']],
+                             ['GARDEN_BOSS_STARTED', 'GARDEN_BOSS_NO_SUCH_SQUAD'], ATTACK_TIMEOUT)
         
-        if self.fight_started:
+        if reply and self.state == STATE_STARTED:
             print(f"   ✅ Boss fight started!")
             return True
         else:
             print(f"   ❌ Boss fight failed to start")
+            if self.state == STATE_ATTACKING:
+                self.state = STATE_IN_SQUAD
             return False
     
     def leave_squad(self):
         """Leave the current squad"""
-        if self.current_squad:
-            message = [self.SocketMessage['GARDEN_BOSS_LEAVE_SQUAD']]
-            self.send_websocket_message(message)
-            time.sleep(0.5)  # Wait for leave confirmation
+        if self.current_squad or self.state in (STATE_IN_SQUAD, STATE_STARTED):
+            self.state = STATE_LEAVING
+            reply = self.request([self.SocketMessage['GARDEN_BOSS_LEAVE_SQUAD']], ['GARDEN_BOSS_LEFT'], LEAVE_TIMEOUT)
+            if reply is None:
+                print(f"   ⚠️ No leave confirmation - continuing")
+            self.current_squad = None
+            self.squad_id = None
+        self.state = STATE_IDLE
         
     def get_fight_log(self, fight_id):
         """Get the detailed log of a fight"""
@@ -434,45 +405,19 @@ class LeekWarsBossFighter:
         print(f"   Leek: {leek_name} (ID: {leek_id})")
         print(f"   Boss Level: {boss_level}")
         
-        # Create directory for logs using leek ID and boss level
-        log_dir = f"fight_logs/boss_{boss_level}/{leek_id}"
-        os.makedirs(log_dir, exist_ok=True)
-        print(f"   Directory: {log_dir}/")
-        
-        successful = 0
-        failed = []
+        # Archive group named after the boss level and leek ID
+        group = f"boss_{boss_level}/{leek_id}"
         
-        for i, fight_id in enumerate(self.fight_ids):
-            # Rate limiting - 0.3 seconds between requests
-            if i > 0:
-                time.sleep(0.3)
-            
-            # Progress indicator
-            if i > 0 and i % 10 == 0:
-                print(f"   Progress: {i}/{len(self.fight_ids)} ({i*100/len(self.fight_ids):.1f}%)")
-            
-            # Download fight data
-            fight_data = self.download_fight_data(fight_id)
-            if fight_data:
-                # Save fight data
-                data_file = f"{log_dir}/{fight_id}_data.json"
-                with open(data_file, "w") as f:
-                    json.dump(fight_data, f, indent=2)
-                
-                # Download debug logs
-                logs = self.download_fight_logs(fight_id)
-                if logs:
-                    logs_file = f"{log_dir}/{fight_id}_logs.json"
-                    with open(logs_file, "w") as f:
-                        json.dump(logs, f, indent=2)
-                
-                successful += 1
-            else:
-                failed.append(fight_id)
+        harvester = FightHarvester(self.session, max_workers=4)
+        print(f"   Archive: {harvester.archive.root}/ ({group})")
+        for fight_id in self.fight_ids:
+            harvester.submit(fight_id, group)
+        harvester.wait_all()
+        harvester.shutdown()
         
-        print(f"✅ Downloaded logs: {successful}/{len(self.fight_ids)}")
-        if failed:
-            print(f"❌ Failed: {len(failed)} fights")
+        print(f"✅ Downloaded logs: {harvester.successful}/{len(self.fight_ids)}")
+        if harvester.failed:
+            print(f"❌ Failed: {len(harvester.failed)} fights")
         
     def update_farmer_info(self):
         """Update farmer info using session cookies"""
@@ -566,9 +511,6 @@ class LeekWarsBossFighter:
                     print(f"   ❌ Failed to create squad for {boss_name}")
                 continue
                 
-            # Add leeks to the squad (they should be added automatically on creation)
-            time.sleep(1)  # Wait for squad to be fully created
-            
             # Start the boss attack
             if self.start_boss_attack():
                 fights_completed += 1
@@ -599,13 +541,9 @@ class LeekWarsBossFighter:
                 if not quick_mode:
                     print(f"   ❌ Failed to start boss attack")
             
-            # Leave the squad after the fight
+            # Leave the squad after the fight - the next run starts once the server confirms
             self.leave_squad()
             
-            # Small delay between fights
-            if fights_completed < fights_to_run:
-                time.sleep(2.0 if quick_mode else 3.0)
-            
             # Update farmer info periodically to check remaining fights
             if fights_completed > 0 and fights_completed % 5 == 0:
                 self.update_farmer_info()
@@ -659,8 +597,9 @@ class LeekWarsBossFighter:
             print(f"   🗡️ Remaining fights: {self.farmer.get('fights', 0)}")
         
         # Close WebSocket connection
-        if self.ws:
-            self.ws.close()
+        if self.socket:
+            self.socket.close()
+            self.state = STATE_DISCONNECTED
             
     def disconnect(self):
         """Disconnect from LeekWars"""
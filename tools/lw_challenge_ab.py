@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+LeekWars Challenge A/B Runner
+Plays two AI variants on the same seed x side grid of farmer challenges and
+compares them fight-for-fight. The same seed gives both variants the same map
+and spawns, so each cell of the grid is a paired sample and the difference
+in outcomes needs far fewer fights than independent A/B runs to be
+significant.
+
+Fights that are still generating when the harvester gives up (or whose
+download fails) are reported as incomplete and left out of the pairs.
+
+Variants are AI ids or local .lk files. Files are uploaded next to the V8
+modules (8.0/V8/ab_<label>.lk) so their includes resolve.
+
+Usage: python3 lw_challenge_ab.py <farmer_id> <variant_a> <variant_b> [--seeds 20]
+Examples:
+  python3 lw_challenge_ab.py 12345 447461 447626 --seeds 25
+  python3 lw_challenge_ab.py 12345 447461 V8_modules/main_candidate.lk --sides L
+"""
+
+import argparse
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from config_loader import load_credentials
+from fight_harvester import FightHarvester, fight_payload
+from lw_farmer_fights import LeekWarsFarmerFighter, BASE_URL
+from rate_limiter import RateLimiter, RateLimitedSession
+from upload_v8 import V8Uploader
+
+# Two-sided 95% Student t critical values by degrees of freedom
+T_CRITICAL_95 = {
+    1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365,
+    8: 2.306, 9: 2.262, 10: 2.228, 12: 2.179, 15: 2.131, 20: 2.086,
+    25: 2.060, 30: 2.042, 40: 2.021, 60: 2.000, 120: 1.980
+}
+
+
+def t_critical_95(df):
+    """Nearest tabulated critical value at or below df (conservative), 1.96 beyond"""
+    if df > 120:
+        return 1.96
+    return T_CRITICAL_95[max(k for k in T_CRITICAL_95 if k <= df)]
+
+
+INCOMPLETE = "INCOMPLETE"
+
+
+def outcome_score(outcome):
+    """Score of a finished fight, None for an incomplete one"""
+    return {"WIN": 1.0, "DRAW": 0.5, "LOSS": 0.0}.get(outcome)
+
+
+class ChallengeABRunner(LeekWarsFarmerFighter):
+    def __init__(self, rate=4.0, workers=4):
+        """Farmer fighter sharing one rate-limited session across its workers"""
+        super().__init__()
+        self.session = RateLimitedSession(RateLimiter(rate))
+        self.workers = workers
+        self.lock = threading.Lock()
+
+    def our_leek_ids(self):
+        return {int(leek_id) for leek_id in (self.farmer or {}).get("leeks", {})}
+
+    def resolve_variant(self, spec, label):
+        """AI id as-is, or upload a local .lk file and return its AI id"""
+        if str(spec).isdigit():
+            return int(spec)
+
+        path = Path(spec)
+        if not path.exists():
+            print(f"❌ Variant {label}: {spec} is neither an AI id nor a file")
+            return None
+
+        uploader = V8Uploader()
+        uploader.session = self.session
+        existing = uploader.get_existing_folders()
+        folders = existing.get("folders", [])
+        folder_8_0 = uploader.find_folder("8.0", 0, folders)
+        folder_v8 = uploader.find_folder("V8", folder_8_0, folders) if folder_8_0 else None
+        if not folder_v8:
+            print("❌ 8.0/V8 folder not found - run upload_v8.py first")
+            return None
+
+        with open(path, 'r', encoding='utf-8') as f:
+            code = f.read()
+        return uploader.create_or_update_ai_script(f"ab_{label}.lk", code, folder_v8, existing.get("ais", []))
+
+    def set_leek_ai(self, leek_id, ai_id):
+        """Equip an AI on one of our leeks"""
+        response = self.session.post(f"{BASE_URL}/leek/set-ai", data={"leek_id": str(leek_id), "ai_id": str(ai_id)})
+        if response.status_code != 200:
+            print(f"   ❌ Failed to set AI {ai_id} on leek {leek_id}: HTTP {response.status_code}")
+            return False
+        return True
+
+    def fight_outcome(self, data):
+        """WIN/LOSS/DRAW from our farmer's point of view (INCOMPLETE while generating)"""
+        fight = fight_payload(data)
+        winner = fight.get("winner", -1)
+        if winner == -1:
+            return INCOMPLETE
+        if winner == 0:
+            return "DRAW"
+        ours = self.our_leek_ids()
+        team1 = {int(leek.get("id", 0)) for leek in fight.get("leeks1", [])}
+        our_team = 1 if ours & team1 else 2
+        return "WIN" if winner == our_team else "LOSS"
+
+    def play_grid(self, challenge_data, grid, label):
+        """Start every (seed, side) fight concurrently, then harvest the outcomes"""
+        started = {}
+
+        def start(cell):
+            seed, side = cell
+            result = self.start_farmer_challenge(challenge_data, None, seed, side, verbose=False)
+            if result and 'fight_id' in result:
+                with self.lock:
+                    started[cell] = result['fight_id']
+            else:
+                print(f"   ❌ [{label}] seed {seed} side {'LR'[side]}: {result.get('error') if result else 'no response'}")
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            list(executor.map(start, grid))
+        print(f"   ✅ [{label}] Started {len(started)}/{len(grid)} fights")
+
+        outcomes = {}
+        harvester = FightHarvester(self.session, max_workers=self.workers, max_wait=120.0)
+        group = f"challenge_ab/{challenge_data['farmer'].get('id')}"
+        for cell, fight_id in started.items():
+            harvester.submit(fight_id, group,
+                             on_result=lambda result, cell=cell: outcomes.__setitem__(
+                                 cell, self.fight_outcome(result["data"]) if result["ok"] else INCOMPLETE))
+        harvester.wait_all()
+        harvester.shutdown()
+
+        incomplete = sum(1 for outcome in outcomes.values() if outcome == INCOMPLETE)
+        if incomplete:
+            print(f"   ⚠️ [{label}] {incomplete} fights incomplete (not generated in time or not downloaded)")
+        # All fights of this variant must be generated before the AI is switched
+        return outcomes
+
+
+def paired_report(grid, results_a, results_b):
+    """Print per-variant scores and the paired B - A difference with a 95% CI"""
+    # A cell only counts when both variants' fights finished
+    pairs = [(outcome_score(results_a[c]), outcome_score(results_b[c]))
+             for c in grid if outcome_score(results_a.get(c)) is not None
+             and outcome_score(results_b.get(c)) is not None]
+
+    print("\n" + "="*60)
+    print("CHALLENGE A/B RESULTS")
+    print("="*60)
+
+    for label, results in (("A", results_a), ("B", results_b)):
+        wins = sum(1 for o in results.values() if o == "WIN")
+        draws = sum(1 for o in results.values() if o == "DRAW")
+        losses = sum(1 for o in results.values() if o == "LOSS")
+        incomplete = sum(1 for o in results.values() if o == INCOMPLETE)
+        total = wins + draws + losses
+        score = (wins + 0.5 * draws) / total if total else 0.0
+        print(f"   {label}: {wins}W-{losses}L-{draws}D  score {score:.1%} ({total} fights"
+              + (f", {incomplete} incomplete)" if incomplete else ")"))
+
+    n = len(pairs)
+    if n < 2:
+        print("\n⚠️ Not enough paired fights for a confidence interval")
+        return
+
+    diffs = [b - a for a, b in pairs]
+    mean = sum(diffs) / n
+    variance = sum((d - mean) ** 2 for d in diffs) / (n - 1)
+    stderr = math.sqrt(variance / n)
+    margin = t_critical_95(n - 1) * stderr
+
+    better = sum(1 for d in diffs if d > 0)
+    worse = sum(1 for d in diffs if d < 0)
+
+    print(f"\n📊 Paired cells: {n} (B better in {better}, A better in {worse}, same in {n - better - worse})")
+    print(f"   B - A: {mean * 100:+.1f}pp ± {margin * 100:.1f}pp (95% CI: "
+          f"{(mean - margin) * 100:+.1f}pp .. {(mean + margin) * 100:+.1f}pp)")
+
+    if mean - margin > 0:
+        print("\n🏆 B is significantly better")
+    elif mean + margin < 0:
+        print("\n🏆 A is significantly better")
+    else:
+        print("\n🤝 No significant difference - add seeds to narrow the interval")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Paired A/B test of two AIs on seeded farmer challenges')
+    parser.add_argument('farmer_id', type=int, help='Farmer to challenge')
+    parser.add_argument('variant_a', help='AI id or .lk file for variant A (baseline)')
+    parser.add_argument('variant_b', help='AI id or .lk file for variant B (candidate)')
+    parser.add_argument('--seeds', type=int, default=20, help='Number of seeds (default: 20)')
+    parser.add_argument('--seed-start', type=int, default=1, help='First seed (default: 1)')
+    parser.add_argument('--sides', choices=['L', 'R', 'LR'], default='LR', help='Sides to play (default: LR)')
+    parser.add_argument('--rate', type=float, default=4.0,
+                        help='Request budget in requests per second (default: 4)')
+    parser.add_argument('--workers', type=int, default=4, help='Concurrent fight starts/downloads (default: 4)')
+    parser.add_argument('--account', default='main', help='Account to use (default: main)')
+
+    args = parser.parse_args()
+
+    sides = [0 if s == 'L' else 1 for s in args.sides]
+    grid = [(seed, side) for seed in range(args.seed_start, args.seed_start + args.seeds) for side in sides]
+
+    print("="*60)
+    print("LEEKWARS CHALLENGE A/B RUNNER")
+    print("="*60)
+    print(f"Target farmer: {args.farmer_id}")
+    print(f"Grid: {args.seeds} seeds x {len(sides)} sides = {len(grid)} fights per variant")
+    print()
+
+    runner = ChallengeABRunner(rate=args.rate, workers=args.workers)
+    email, password = load_credentials(account=args.account)
+    if not runner.login(email, password):
+        print("Failed to login. Exiting.")
+        return 1
+
+    leeks = runner.farmer.get("leeks", {})
+    original_ais = {}
+    for leek_id, leek in leeks.items():
+        ai = leek.get("ai")
+        original_ais[leek_id] = ai.get("id") if isinstance(ai, dict) else ai
+    switched = False
+
+    try:
+        challenge_data = runner.get_farmer_challenge(args.farmer_id, verbose=True)
+        if not challenge_data:
+            print(f"❌ No challenge available for farmer ID {args.farmer_id}!")
+            return 1
+
+        ai_a = runner.resolve_variant(args.variant_a, "A")
+        ai_b = runner.resolve_variant(args.variant_b, "B")
+        if not ai_a or not ai_b:
+            return 1
+
+        start_time = time.time()
+        results = {}
+        for label, ai_id in (("A", ai_a), ("B", ai_b)):
+            print(f"\n🧪 Variant {label} (AI {ai_id})")
+            switched = True
+            if not all(runner.set_leek_ai(leek_id, ai_id) for leek_id in leeks):
+                return 1
+            results[label] = runner.play_grid(challenge_data, grid, label)
+
+        paired_report(grid, results["A"], results["B"])
+        print(f"\n⏱️ Time taken: {time.time() - start_time:.1f} seconds")
+
+    except KeyboardInterrupt:
+        print("\n\n⚠️ Interrupted by user")
+
+    finally:
+        if switched:
+            restored = [leek_id for leek_id, ai_id in original_ais.items()
+                        if str(ai_id).isdigit() and runner.set_leek_ai(leek_id, ai_id)]
+            if restored:
+                print(f"\n♻️ Restored original AI on {len(restored)} leeks")
+            else:
+                print("\n⚠️ Original AIs unknown - leeks keep the last tested variant")
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -28,9 +28,9 @@ from datetime import datetime
 import os
 import sys
 import argparse
-from config_loader import load_credentials
+from config_loader import load_credentials, get_api_url
 
-BASE_URL = "https://leekwars.com/api"
+BASE_URL = get_api_url()
 
 class LeekWarsFarmerFighter:
     def __init__(self):
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+LeekWars Multi-Account Orchestrator
+Runs the daily solo fight pass for several accounts in parallel.
+Each account gets its own session and rate limiter; fights go to the shared
+fight database (data/fight_history.db, or <db-root>/<account>/ with --db-root)
+and progress and results are aggregated in one view.
+
+Usage: python3 lw_multi_account.py [--accounts main cure] [--strategy <strategy>]
+Examples:
+  python3 lw_multi_account.py                      # every account in config.json
+  python3 lw_multi_account.py --accounts main cure --fights 50
+  python3 lw_multi_account.py --rate 3 --interval 10
+"""
+
+import argparse
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from config_loader import get_fight_db_path, list_accounts, load_credentials
+from lw_solo_fights_multi import LeekWarsMultiLeekFighter
+
+
+class AccountSession:
+    def __init__(self, account, args):
+        """One account: its own fighter and limiter, writing to the account's database"""
+        self.account = account
+        self.fighter = LeekWarsMultiLeekFighter(
+            rate=args.rate,
+            harvest_workers=args.harvesters,
+            quiet=True,
+            db_dir=account_db_dir(args.db_root, account)
+        )
+        self.fights_available = 0
+        self.status = "pending"
+        self.error = None
+
+    def login(self):
+        """Log the account in (done sequentially so login output stays readable)"""
+        print(f"\n=== Account: {self.account} ===")
+        email, password = load_credentials(account=self.account)
+        if not self.fighter.login(email, password):
+            self.status = "login failed"
+            return False
+        self.fights_available = self.fighter.total_fights
+        self.status = "ready" if self.fights_available > 0 else "no fights"
+        return True
+
+    def run(self, num_fights, leek_selectors, strategy):
+        """Drain this account's quota; runs in its own thread"""
+        if self.status != "ready":
+            return
+        self.status = "running"
+        try:
+            self.fighter.run_multi_leek_fights(num_fights, leek_selectors=leek_selectors, strategy=strategy)
+            self.status = "done"
+        except Exception as e:
+            self.status = "error"
+            self.error = str(e)
+            self.fighter.stop_event.set()
+
+    def totals(self):
+        """Aggregate the fighter's per-leek counters"""
+        totals = {'started': 0, 'wins': 0, 'losses': 0, 'draws': 0, 'failed': 0}
+        with self.fighter.lock:
+            for progress in self.fighter.progress.values():
+                for key in totals:
+                    totals[key] += progress[key]
+        return totals
+
+
+def account_db_dir(db_root, account):
+    """Absolute database folder for an account, or None for the shared fight database"""
+    return os.path.join(os.path.abspath(db_root), account) if db_root else None
+
+
+def progress_loop(sessions, stop_event, interval):
+    """Print one aggregated progress line every `interval` seconds"""
+    while not stop_event.wait(interval):
+        parts = []
+        for session in sessions:
+            if session.status not in ("running", "done"):
+                continue
+            totals = session.totals()
+            parts.append(f"{session.account}: {totals['started']}/{session.fights_available} "
+                         f"({totals['wins']}W-{totals['losses']}L)")
+        if parts:
+            print(f"   ⏳ [{datetime.now().strftime('%H:%M:%S')}] " + " | ".join(parts))
+
+
+def print_summary(sessions, duration):
+    """Print a per-account table and the grand total"""
+    print("\n" + "="*72)
+    print("MULTI-ACCOUNT SESSION COMPLETE")
+    print("="*72)
+    print(f"{'Account':<12} {'Status':<13} {'Fights':>8} {'W':>5} {'L':>5} {'D':>5} {'Win%':>7} {'Reqs':>6}")
+    print("-"*72)
+
+    grand = {'started': 0, 'wins': 0, 'losses': 0, 'draws': 0}
+    for session in sessions:
+        totals = session.totals()
+        for key in grand:
+            grand[key] += totals[key]
+        decided = totals['wins'] + totals['losses'] + totals['draws']
+        win_rate = f"{totals['wins'] * 100 / decided:.1f}" if decided else "-"
+        print(f"{session.account:<12} {session.status:<13} {totals['started']:>8} {totals['wins']:>5} "
+              f"{totals['losses']:>5} {totals['draws']:>5} {win_rate:>7} "
+              f"{session.fighter.rate_limiter.requests:>6}")
+        if session.error:
+            print(f"   ❌ {session.error}")
+
+    print("-"*72)
+    decided = grand['wins'] + grand['losses'] + grand['draws']
+    win_rate = f"{grand['wins'] * 100 / decided:.1f}" if decided else "-"
+    print(f"{'TOTAL':<12} {'':<13} {grand['started']:>8} {grand['wins']:>5} "
+          f"{grand['losses']:>5} {grand['draws']:>5} {win_rate:>7}")
+
+    if duration < 60:
+        print(f"\n⏱️ Time taken: {duration:.1f} seconds")
+    else:
+        print(f"\n⏱️ Time taken: {duration/60:.1f} minutes")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run solo fights for several LeekWars accounts in parallel')
+    parser.add_argument('--accounts', nargs='+', default=None,
+                        help='Accounts from config.json (default: all)')
+    parser.add_argument('--fights', type=int, default=None,
+                        help='Fights per account (default: all available)')
+    parser.add_argument('--leeks', nargs='+', default=None,
+                        help='Leek numbers or names to use on every account (default: all leeks)')
+    parser.add_argument('--strategy', choices=['safe', 'smart', 'aggressive', 'random', 'adaptive', 'confident', 'predicted'],
+                        default='smart', help='Opponent selection strategy (default: smart)')
+    parser.add_argument('--rate', type=float, default=4.0,
+                        help='Request budget per account in requests per second (default: 4)')
+    parser.add_argument('--harvesters', type=int, default=4,
+                        help='Concurrent result downloads per account (default: 4)')
+    parser.add_argument('--db-root', default=None,
+                        help='Keep a separate fight database per account in <db-root>/<account>/ '
+                             '(default: the shared fight database)')
+    parser.add_argument('--interval', type=float, default=15.0,
+                        help='Seconds between progress lines (default: 15)')
+
+    args = parser.parse_args()
+
+    accounts = args.accounts or list_accounts()
+
+    print("="*60)
+    print("LEEKWARS MULTI-ACCOUNT ORCHESTRATOR")
+    print("="*60)
+    print(f"Accounts: {', '.join(accounts)}")
+    print(f"Fights per account: {args.fights or 'all available'}")
+    print(f"Strategy: {args.strategy}")
+    print(f"Fight DB: {os.path.join(os.path.abspath(args.db_root), '<account>') if args.db_root else get_fight_db_path()}")
+
+    sessions = [AccountSession(account, args) for account in accounts]
+    for session in sessions:
+        session.login()
+
+    active = [s for s in sessions if s.status == "ready"]
+    if not active:
+        print("\n❌ No account has fights available.")
+        for session in sessions:
+            if session.fighter.token:
+                session.fighter.disconnect()
+        return 1
+
+    print(f"\n🚀 Running {len(active)} accounts in parallel...")
+    start_time = datetime.now()
+    stop_event = threading.Event()
+    reporter = threading.Thread(target=progress_loop, args=(sessions, stop_event, args.interval), daemon=True)
+    reporter.start()
+
+    try:
+        with ThreadPoolExecutor(max_workers=len(active)) as executor:
+            for session in active:
+                executor.submit(session.run, args.fights, args.leeks, args.strategy)
+    except KeyboardInterrupt:
+        print("\n\n⚠️ Interrupted by user - letting running fights finish...")
+        for session in active:
+            session.fighter.stop_event.set()
+    finally:
+        stop_event.set()
+        reporter.join()
+
+    print_summary(sessions, (datetime.now() - start_time).total_seconds())
+
+    for session in sessions:
+        if session.fighter.token:
+            session.fighter.disconnect()
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
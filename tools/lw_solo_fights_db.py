@@ -13,11 +13,14 @@ import time
 import os
 import sys
 import argparse
-from config_loader import load_credentials
+from config_loader import load_credentials, get_api_url
 from datetime import datetime
 from fight_db import FightDatabase
+from fight_harvester import summarize_fight
+from opponent_model import update_model
+from opponent_scout import OpponentScout
 
-BASE_URL = "https://leekwars.com/api"
+BASE_URL = get_api_url()
 
 class LeekWarsSmartFighterDB:
     def __init__(self):
@@ -30,6 +33,8 @@ class LeekWarsSmartFighterDB:
         self.fights_run = []
         self.fight_ids = []
         self.db = None
+        self.scout = None
+        self.fight_watcher = None
 
     def login(self, email, password):
         """Login using email and password, maintain session cookies"""
@@ -146,6 +151,8 @@ class LeekWarsSmartFighterDB:
         if response.status_code == 200:
             result = response.json()
             if "fight" in result:
+                if self.fight_watcher:
+                    self.fight_watcher.watch(result["fight"])
                 return result["fight"]
             elif result.get("success") == False:
                 error = result.get("error", "Unknown error")
@@ -160,6 +167,60 @@ class LeekWarsSmartFighterDB:
             print(f"   ❌ HTTP Error starting fight: {response.status_code}")
         return None
 
+    def parse_fight_data(self, fight_id, data):
+        """Build a fight log from /fight/get data; None while the fight is still processing"""
+        winner = data.get("winner", -1)
+        # The API uses leeks1 and leeks2, not leeks array
+        leeks1 = data.get("leeks1", [])
+        leeks2 = data.get("leeks2", [])
+
+        # Add team information to each leek
+        leeks = []
+        for leek in leeks1:
+            leek_with_team = leek.copy()
+            leek_with_team['team'] = 1
+            leeks.append(leek_with_team)
+        for leek in leeks2:
+            leek_with_team = leek.copy()
+            leek_with_team['team'] = 2
+            leeks.append(leek_with_team)
+
+        # If winner is -1 or no leeks, fight is still processing
+        if winner == -1 or len(leeks) == 0:
+            return None
+
+        # Parse fight log
+        fight_log = {
+            "fight_id": fight_id,
+            "date": data.get("date"),
+            "winner": winner,
+            "leeks": leeks,
+            "duration": None,
+            "actions_count": 0
+        }
+
+        # Try to get duration and actions from report
+        report = data.get("report")
+        if report:
+            try:
+                actions = json.loads(report) if isinstance(report, str) else report
+                if isinstance(actions, list) and len(actions) > 0:
+                    fight_log["actions_count"] = len(actions)
+                    last_action = actions[-1]
+                    if isinstance(last_action, list) and len(last_action) > 0:
+                        fight_log["duration"] = last_action[0]
+            except:
+                pass
+
+        # Per-fight and per-turn combat aggregates for the fight DB
+        try:
+            our_leek_ids = [int(leek['id']) for leek in self.leeks.values()]
+            fight_log["summary"], fight_log["turns"] = summarize_fight(data, our_leek_ids) or (None, None)
+        except Exception:
+            fight_log["summary"] = fight_log["turns"] = None
+
+        return fight_log
+
     def download_fight_data(self, fight_id, max_retries=30):
         """Download full fight data including replay - retries until fight is complete"""
         url = f"{BASE_URL}/fight/get/{fight_id}"
@@ -169,56 +230,19 @@ class LeekWarsSmartFighterDB:
                 response = self.session.get(url)
 
                 if response.status_code == 200:
-                    data = response.json()
+                    fight_log = self.parse_fight_data(fight_id, response.json())
 
-                    # Check if fight is complete
-                    winner = data.get("winner", -1)
-                    # The API uses leeks1 and leeks2, not leeks array
-                    leeks1 = data.get("leeks1", [])
-                    leeks2 = data.get("leeks2", [])
-
-                    # Add team information to each leek
-                    leeks = []
-                    for leek in leeks1:
-                        leek_with_team = leek.copy()
-                        leek_with_team['team'] = 1
-                        leeks.append(leek_with_team)
-                    for leek in leeks2:
-                        leek_with_team = leek.copy()
-                        leek_with_team['team'] = 2
-                        leeks.append(leek_with_team)
-
-                    # If winner is -1 or no leeks, fight is still processing
-                    if winner == -1 or len(leeks) == 0:
+                    if fight_log is None:
                         if attempt < max_retries - 1:
-                            time.sleep(0.5)  # Wait before retry
+                            if attempt == 0 and self.fight_watcher:
+                                # Sleep until the socket says the fight is generated
+                                self.fight_watcher.wait(fight_id, timeout=max_retries * 0.5)
+                            else:
+                                time.sleep(0.5)  # Wait before retry
                             continue
                         else:
                             return None  # Give up after max retries
 
-                    # Parse fight log
-                    fight_log = {
-                        "fight_id": fight_id,
-                        "date": data.get("date"),
-                        "winner": winner,
-                        "leeks": leeks,
-                        "duration": None,
-                        "actions_count": 0
-                    }
-
-                    # Try to get duration and actions from report
-                    report = data.get("report")
-                    if report:
-                        try:
-                            actions = json.loads(report) if isinstance(report, str) else report
-                            if isinstance(actions, list) and len(actions) > 0:
-                                fight_log["actions_count"] = len(actions)
-                                last_action = actions[-1]
-                                if isinstance(last_action, list) and len(last_action) > 0:
-                                    fight_log["duration"] = last_action[0]
-                        except:
-                            pass
-
                     return fight_log
             except:
                 if attempt < max_retries - 1:
@@ -227,6 +251,41 @@ class LeekWarsSmartFighterDB:
 
         return None
 
+    def enable_fight_notifications(self, url=None):
+        """Open the LeekWars socket so fight completion is pushed instead of polled"""
+        from lw_websocket import FIGHT_MESSAGE_IDS, LeekWarsSocket, FightWatcher, WS_URL
+
+        if FIGHT_MESSAGE_IDS is None:
+            print("   ⚠️ LEEKWARS_WS_FIGHT_IDS is not set - polling fight results over HTTP")
+            return False
+        socket = LeekWarsSocket(self.session, url or WS_URL)
+        if not socket.connect():
+            print("   ⚠️ WebSocket unavailable - polling fight results over HTTP")
+            return False
+        self.fight_watcher = FightWatcher(socket)
+        print("   🔌 WebSocket connected - waiting on fight notifications")
+        return True
+
+    def determine_result(self, fight_log, leek_name):
+        """Return WIN/LOSS/DRAW for our leek, or UNKNOWN if it isn't in the fight"""
+        winner = fight_log.get("winner", -1)
+        for leek in fight_log.get("leeks", []):
+            if leek.get("name") == leek_name:
+                if winner == 0:
+                    return "DRAW"
+                elif leek.get("team") == winner:
+                    return "WIN"
+                return "LOSS"
+        return "UNKNOWN"
+
+    def choose_opponent(self, preferred_opponents):
+        """Pick an opponent, weighted towards the best matchups at the front"""
+        if len(preferred_opponents) >= 3:
+            # Prefer first 3 (best matchups) with higher probability
+            weights = [3, 2, 1] + [1] * (len(preferred_opponents) - 3)
+            return random.choices(preferred_opponents, weights=weights[:len(preferred_opponents)])[0]
+        return random.choice(preferred_opponents)
+
     def process_fight_results(self, leek_name):
         """Process all fight results after battles are complete"""
         if not self.fight_ids:
@@ -255,21 +314,11 @@ class LeekWarsSmartFighterDB:
             fight_log = self.download_fight_data(fight_id)
 
             if fight_log:
-                winner = fight_log.get("winner", -1)
                 duration = fight_log.get("duration", "N/A")
                 actions_count = fight_log.get("actions_count", 0)
 
                 # Determine result
-                result = "UNKNOWN"
-                for leek in fight_log.get("leeks", []):
-                    if leek.get("name") == leek_name:
-                        if winner == 0:
-                            result = "DRAW"
-                        elif leek.get("team") == winner:
-                            result = "WIN"
-                        else:
-                            result = "LOSS"
-                        break
+                result = self.determine_result(fight_log, leek_name)
 
                 # Record the fight in database
                 if result != "UNKNOWN":
@@ -281,7 +330,9 @@ class LeekWarsSmartFighterDB:
                         'result': result,
                         'duration': duration,
                         'actions_count': actions_count,
-                        'fight_url': fight_url
+                        'fight_url': fight_url,
+                        'summary': fight_log.get("summary"),
+                        'turns': fight_log.get("turns")
                     })
 
                     successful += 1
@@ -329,21 +380,11 @@ class LeekWarsSmartFighterDB:
                     fight_log = self.download_fight_data(fight_id, max_retries=60)
 
                     if fight_log:
-                        winner = fight_log.get("winner", -1)
                         duration = fight_log.get("duration", "N/A")
                         actions_count = fight_log.get("actions_count", 0)
 
                         # Determine result
-                        result = "UNKNOWN"
-                        for leek in fight_log.get("leeks", []):
-                            if leek.get("name") == leek_name:
-                                if winner == 0:
-                                    result = "DRAW"
-                                elif leek.get("team") == winner:
-                                    result = "WIN"
-                                else:
-                                    result = "LOSS"
-                                break
+                        result = self.determine_result(fight_log, leek_name)
 
                         # Record the fight in database
                         if result != "UNKNOWN":
@@ -355,7 +396,9 @@ class LeekWarsSmartFighterDB:
                                 'result': result,
                                 'duration': duration,
                                 'actions_count': actions_count,
-                                'fight_url': fight_url
+                                'fight_url': fight_url,
+                                'summary': fight_log.get("summary"),
+                                'turns': fight_log.get("turns")
                             })
 
                             retry_successful += 1
@@ -397,7 +440,7 @@ class LeekWarsSmartFighterDB:
             return self.update_farmer_info()
         return False
 
-    def run_smart_fights(self, num_fights=None, leek_number=1, strategy="smart"):
+    def run_smart_fights(self, num_fights=None, leek_number=1, strategy="smart", scout=True):
         """Run fights with smart opponent selection using database"""
         if not self.leeks:
             print("\n❌ No leeks found in your account!")
@@ -422,6 +465,13 @@ class LeekWarsSmartFighterDB:
         print(f"\n💾 Initializing database for {leek_name}...")
         self.db = FightDatabase(leek_id)
         self.db.update_leek_info(leek_name, leek_level)
+        if scout:
+            # Opponent builds are fetched in the background for the selector
+            self.scout = OpponentScout(self.session)
+
+        legacy_db = f"fight_history_{leek_id}.db"
+        if os.path.exists(legacy_db):
+            print(f"📦 Found per-leek database {legacy_db} - import it with: python3 migrate_fight_dbs.py")
 
         # Check for JSON migration
         json_file = f"opponent_tracker_{leek_id}.json"
@@ -432,6 +482,11 @@ class LeekWarsSmartFighterDB:
                 from migrate_json_to_db import migrate_json_to_db
                 migrate_json_to_db(leek_id, json_file)
 
+        if strategy == 'predicted':
+            # Learn from the fights recorded since the last session
+            model, added = update_model(self.db)
+            print(f"🧠 Opponent model: trained on {added} new fights ({model.samples} total)")
+
         # Show existing stats
         stats = self.db.get_global_stats()
         print(f"\n📊 Fight Statistics for {leek_name}:")
@@ -449,12 +504,12 @@ class LeekWarsSmartFighterDB:
         print(f"Strategy: {strategy.upper()}")
         print("="*60)
         print("\n💾 All fight results automatically saved to database!")
-        print("   Database: fight_history_{}.db".format(leek_id))
+        print(f"   Database: {self.db.db_path}")
         print("\nOpponent Status Colors:")
-        print("   🟢 Beatable (win rate ≥ 70%)")
-        print("   🟡 Even (30-70% win rate)")
-        print("   🔴 Dangerous (win rate ≤ 30%)")
-        print("   ⚪ Unknown (< 2 fights)")
+        print("   🟢 Beatable (expected win rate ≥ 65%)")
+        print("   🟡 Even (35-65% expected win rate)")
+        print("   🔴 Dangerous (expected win rate ≤ 35%)")
+        print("   ⚪ Unknown (too few recent fights)")
 
         start_time = datetime.now()
         fights_completed = 0
@@ -474,25 +529,29 @@ class LeekWarsSmartFighterDB:
                 time.sleep(2)
                 continue
 
+            if self.scout:
+                self.scout.scout(all_opponents)
+
             # Show all available opponents for EVERY API request
             print(f"\n📋 API Request #{fights_completed + 1} - Available opponents: {len(all_opponents)}")
             print("-" * 70)
 
-            # Show ALL opponents with their stats
+            # Show ALL opponents with their stats (one query for the whole list)
+            classified = self.db.classify_opponents(opp['id'] for opp in all_opponents)
             for i, opp in enumerate(all_opponents, 1):
                 opp_name = opp.get('name', 'Unknown')
                 opp_level = opp.get('level', 0)
                 opp_id = opp['id']
 
                 # Get history
-                stats = self.db.get_opponent_stats(opp_id)
+                stats = classified.get(opp_id)
                 if stats:
                     status = stats['status']
                     wins = stats['wins']
                     losses = stats['losses']
                     draws = stats['draws']
                     win_rate = stats['win_rate']
-                    difficulty = self.db.calculate_opponent_difficulty(opp_id)
+                    difficulty = stats['difficulty']
 
                     status_icons = {
                         'beatable': '🟢',
@@ -509,7 +568,7 @@ class LeekWarsSmartFighterDB:
             print("-" * 70)
 
             # Apply smart opponent selection using database
-            preferred_opponents = self.db.get_preferred_opponents(all_opponents, strategy)
+            preferred_opponents = self.db.get_preferred_opponents(all_opponents, strategy, classified)
 
             # Show opponent selection info for EVERY request
             avoided = len(all_opponents) - len(preferred_opponents)
@@ -522,26 +581,21 @@ class LeekWarsSmartFighterDB:
                 continue
 
             # Choose opponent (weighted towards better matchups)
-            if len(preferred_opponents) >= 3:
-                # Prefer first 3 (best matchups) with higher probability
-                weights = [3, 2, 1] + [1] * (len(preferred_opponents) - 3)
-                opponent = random.choices(preferred_opponents, weights=weights[:len(preferred_opponents)])[0]
-            else:
-                opponent = random.choice(preferred_opponents)
+            opponent = self.choose_opponent(preferred_opponents)
 
             opponent_name = opponent.get('name', 'Unknown')
             opponent_level = opponent.get('level', 0)
             opponent_id = opponent['id']
 
             # Check our history with this opponent
-            stats_entry = self.db.get_opponent_stats(opponent_id)
+            stats_entry = classified.get(opponent_id)
             history = ""
             status_icon = "⚪"  # Unknown by default
             if stats_entry:
                 w, l, d = stats_entry["wins"], stats_entry["losses"], stats_entry["draws"]
                 win_rate = stats_entry["win_rate"]
                 status = stats_entry["status"]
-                difficulty = self.db.calculate_opponent_difficulty(opponent_id)
+                difficulty = stats_entry["difficulty"]
                 # Status color indicators
                 status_icons = {
                     'beatable': '🟢',
@@ -551,6 +605,9 @@ class LeekWarsSmartFighterDB:
                 }
                 status_icon = status_icons.get(status, '⚪')
                 history = f" [{status_icon} {w}W-{l}L-{d}D, {win_rate:.0%}, diff:{difficulty}]"
+            elif opponent.get('build'):
+                build = opponent['build']
+                history = f" [⚪ scouted: {build['build_type']}, threat {build['threat']}]"
 
             # Start the fight
             fight_id = self.start_solo_fight(leek_id, opponent_id)
@@ -590,6 +647,10 @@ class LeekWarsSmartFighterDB:
                     print("   ⚠️ No more fights available!")
                     break
 
+        if self.scout:
+            self.scout.close()
+            print(f"\n🔍 Scout: {self.scout.summary()}")
+
         # Process fight results after all fights complete
         print(f"\n📥 Processing {len(self.fight_ids)} fight results...")
         self.process_fight_results(leek_name)
@@ -641,8 +702,12 @@ class LeekWarsSmartFighterDB:
 
     def disconnect(self):
         """Disconnect from LeekWars and close database"""
+        if self.scout:
+            self.scout.close()
         if self.db:
             self.db.close()
+        if self.fight_watcher:
+            self.fight_watcher.socket.close()
         if self.token:
             url = f"{BASE_URL}/farmer/disconnect/{self.token}"
             response = self.session.post(url)
@@ -655,9 +720,14 @@ def main():
     parser = argparse.ArgumentParser(description='LeekWars Smart Solo Fighter (Database Edition)')
     parser.add_argument('leek_number', type=int, help='Leek number to use (1, 2, 3, or 4)')
     parser.add_argument('num_fights', type=int, help='Number of fights to run')
-    parser.add_argument('--strategy', choices=['safe', 'smart', 'aggressive', 'random', 'adaptive', 'confident'],
+    parser.add_argument('--strategy', choices=['safe', 'smart', 'aggressive', 'random', 'adaptive', 'confident', 'predicted'],
                        default='smart',
                        help='Opponent selection strategy (default: smart)')
+    parser.add_argument('--ws', action='store_true',
+                       help='Experimental: wait for fight results via WebSocket notifications '
+                       '(needs LEEKWARS_WS_FIGHT_IDS; falls back to polling on the first timeout)')
+    parser.add_argument('--no-scout', action='store_true',
+                       help='Do not fetch opponent builds in the background')
 
     args = parser.parse_args()
 
@@ -683,6 +753,7 @@ def main():
     print("  • aggressive: Fight all, but prefer beatable first")
     print("  • adaptive: Learn from recent trends, adjust dynamically")
     print("  • confident: Only fight opponents with high confidence data")
+    print("  • predicted: Rank opponents by a win probability model learned from fight history")
     print("  • random: No opponent filtering")
     print()
 
@@ -695,6 +766,9 @@ def main():
         print("\n❌ Failed to login. Please check your credentials.")
         return 1
 
+    if args.ws:
+        fighter.enable_fight_notifications()
+
     try:
         if not fighter.leeks:
             print("\n⚠️ No leeks found in your account!")
@@ -702,7 +776,8 @@ def main():
 
         if fighter.total_fights > 0:
             fights_to_run = min(args.num_fights, fighter.total_fights)
-            fighter.run_smart_fights(fights_to_run, leek_number=args.leek_number, strategy=args.strategy)
+            fighter.run_smart_fights(fights_to_run, leek_number=args.leek_number, strategy=args.strategy,
+                                     scout=not args.no_scout)
         else:
             print("\n⚠️ No fights available right now.")
 
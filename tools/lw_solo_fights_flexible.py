@@ -17,17 +17,19 @@ import random
 import time
 from datetime import datetime
 from getpass import getpass
-import os
 import sys
 import argparse
-from config_loader import load_credentials
+from config_loader import load_credentials, get_api_url
+from fight_harvester import FightHarvester
+from rate_limiter import RateLimiter, RateLimitedSession
 
-BASE_URL = "https://leekwars.com/api"
+BASE_URL = get_api_url()
 
 class LeekWarsAutoFighter:
     def __init__(self):
         """Initialize session and variables"""
-        self.session = requests.Session()
+        # Rate-limited so the concurrent log harvester stays within budget
+        self.session = RateLimitedSession(RateLimiter(4.0))
         self.farmer = None
         self.token = None
         self.leeks = {}
@@ -269,45 +271,19 @@ class LeekWarsAutoFighter:
         print(f"\n📥 Downloading logs for {len(self.fight_ids)} fights...")
         print(f"   Leek: {leek_name} (ID: {leek_id})")
         
-        # Create directory for logs using leek ID
-        log_dir = f"fight_logs/{leek_id}"
-        os.makedirs(log_dir, exist_ok=True)
-        print(f"   Directory: {log_dir}/")
+        # Archive group named after the leek ID
+        group = str(leek_id)
         
-        successful = 0
-        failed = []
+        harvester = FightHarvester(self.session, max_workers=4)
+        print(f"   Archive: {harvester.archive.root}/ ({group})")
+        for fight_id in self.fight_ids:
+            harvester.submit(fight_id, group)
+        harvester.wait_all()
+        harvester.shutdown()
         
-        for i, fight_id in enumerate(self.fight_ids):
-            # Rate limiting - 0.3 seconds between requests
-            if i > 0:
-                time.sleep(0.3)
-            
-            # Progress indicator
-            if i > 0 and i % 10 == 0:
-                print(f"   Progress: {i}/{len(self.fight_ids)} ({i*100/len(self.fight_ids):.1f}%)")
-            
-            # Download fight data
-            fight_data = self.download_fight_data(fight_id)
-            if fight_data:
-                # Save fight data
-                data_file = f"{log_dir}/{fight_id}_data.json"
-                with open(data_file, "w") as f:
-                    json.dump(fight_data, f, indent=2)
-                
-                # Download debug logs
-                logs = self.download_fight_logs(fight_id)
-                if logs:
-                    logs_file = f"{log_dir}/{fight_id}_logs.json"
-                    with open(logs_file, "w") as f:
-                        json.dump(logs, f, indent=2)
-                
-                successful += 1
-            else:
-                failed.append(fight_id)
-        
-        print(f"✅ Downloaded logs: {successful}/{len(self.fight_ids)}")
-        if failed:
-            print(f"❌ Failed: {len(failed)} fights")
+        print(f"✅ Downloaded logs: {harvester.successful}/{len(self.fight_ids)}")
+        if harvester.failed:
+            print(f"❌ Failed: {len(harvester.failed)} fights")
         
     def update_farmer_info(self):
         """Update farmer info using session cookies"""
@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+LeekWars Auto Solo Fighter - Multi-Leek Edition
+Drains the farmer's shared daily fight quota with all leeks at once.
+Fight starts for every leek are interleaved within one shared request budget,
+results are harvested concurrently and written by a single database writer.
+The quota is split across leeks by fight_planner.py (expected talent/XP gain)
+and re-planned as results come in.
+
+Usage: python3 lw_solo_fights_multi.py [num_fights] [--leeks 1 2 3 4] [--strategy <strategy>]
+Examples:
+  python3 lw_solo_fights_multi.py                       # whole quota, all leeks
+  python3 lw_solo_fights_multi.py 100 --leeks 1 3
+  python3 lw_solo_fights_multi.py --leeks KurtGodel AdaLovelace --rate 6
+"""
+
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from config_loader import load_credentials
+from fight_db import FightDatabase, FightDatabaseWriter
+from fight_planner import FightPlanner
+from lw_solo_fights_db import LeekWarsSmartFighterDB
+from opponent_model import update_model
+from opponent_scout import OpponentScout
+from rate_limiter import RateLimiter, RateLimitedSession
+
+
+class LeekWarsMultiLeekFighter(LeekWarsSmartFighterDB):
+    def __init__(self, rate=4.0, burst=None, harvest_workers=4, quiet=False, db_dir=None, scout=True,
+                 plan=True):
+        """Initialize a fighter whose leeks share one rate-limited session"""
+        super().__init__()
+        self.db_dir = db_dir
+        self.rate_limiter = RateLimiter(rate, burst)
+        self.session = RateLimitedSession(self.rate_limiter)
+        self.harvest_workers = harvest_workers
+        self.quiet = quiet
+        self.scouting = scout
+        self.planning = plan
+        self.planner = None
+
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.fights_remaining = 0
+        self.progress = {}
+        self.db_writer = None
+
+    def log(self, message):
+        """Print unless running quietly under an orchestrator"""
+        if not self.quiet:
+            print(message)
+
+    def select_leeks(self, selectors=None):
+        """Resolve leek numbers (1-based) or names to leek dicts"""
+        leek_list = list(self.leeks.values())
+        if not selectors:
+            return leek_list
+
+        selected = []
+        for selector in selectors:
+            if str(selector).isdigit() and 1 <= int(selector) <= len(leek_list):
+                leek = leek_list[int(selector) - 1]
+            else:
+                leek = next((l for l in leek_list if l.get('name') == selector), None)
+            if leek is None:
+                print(f"   ⚠️ Leek '{selector}' not found, skipping")
+            elif leek not in selected:
+                selected.append(leek)
+        return selected
+
+    def _quota_left(self):
+        with self.lock:
+            return self.fights_remaining > 0 and not self.stop_event.is_set()
+
+    def _claim_fight(self, leek_id):
+        """Reserve one fight from the shared quota (and from the leek's planned share)
+
+        A leek that has used up its share gets a fresh plan; if that plan leaves
+        it nothing, the leek is retired and its worker stops.
+        """
+        with self.lock:
+            if self.fights_remaining <= 0 or self.stop_event.is_set():
+                return False
+            if self.planner and not self.planner.claim(leek_id):
+                leek_name = self.planner.leeks[leek_id]['name']
+                self._replan(f"{leek_name} used its share")
+                if not self.planner.claim(leek_id):
+                    self.planner.retire(leek_id)
+                    self.log(f"   🗺️ [{leek_name}] No fights planned, stopping")
+                    return False
+            self.fights_remaining -= 1
+            return True
+
+    def _release_fight(self, leek_id):
+        """Give back a reserved fight that failed to start"""
+        with self.lock:
+            self.fights_remaining += 1
+            if self.planner:
+                self.planner.release(leek_id)
+
+    def _replan(self, reason):
+        """Re-allocate the unclaimed fights (caller holds self.lock)"""
+        self.planner.plan(self.fights_remaining)
+        self.log(f"   🗺️ Re-planned ({reason}): {self.planner.describe()}")
+
+    def _count(self, leek_id, key):
+        with self.lock:
+            self.progress[leek_id][key] += 1
+
+    def _harvest(self, leek, fight_info):
+        """Wait for a fight to finish, then hand its result to the DB writer"""
+        leek_id = leek['id']
+        leek_name = leek['name']
+        fight_id = fight_info['fight_id']
+
+        fight_log = self.download_fight_data(fight_id)
+        if not fight_log and not self.stop_event.is_set():
+            # Slow fight generation - give it a longer second chance
+            fight_log = self.download_fight_data(fight_id, max_retries=60)
+
+        result = self.determine_result(fight_log, leek_name) if fight_log else "UNKNOWN"
+        if result == "UNKNOWN":
+            self._count(leek_id, 'failed')
+            self.log(f"   ⚠️ [{leek_name}] Could not get result of fight {fight_id}")
+            return
+
+        self.db_writer.submit(leek_id, {
+            'fight_id': fight_id,
+            'opponent_id': fight_info['opponent_id'],
+            'opponent_name': fight_info['opponent_name'],
+            'opponent_level': fight_info['opponent_level'],
+            'result': result,
+            'duration': fight_log.get("duration"),
+            'actions_count': fight_log.get("actions_count", 0),
+            'fight_url': fight_info['fight_url'],
+            'summary': fight_log.get("summary"),
+            'turns': fight_log.get("turns")
+        })
+
+        self._count(leek_id, {"WIN": 'wins', "LOSS": 'losses', "DRAW": 'draws'}[result])
+        with self.lock:
+            if self.planner and self.planner.record(leek_id, result):
+                self._replan(f"{self.planner.results_since_plan} new results")
+            self.fights_run.append({
+                'id': fight_id,
+                'url': fight_info['fight_url'],
+                'leek': leek_name,
+                'opponent': fight_info['opponent_name'],
+                'result': result,
+                'time': fight_info['timestamp'],
+                'log': fight_log
+            })
+
+        result_icon = {"WIN": "✅", "LOSS": "❌", "DRAW": "🤝"}.get(result, "❓")
+        self.log(f"   {result_icon} [{leek_name}] {result} vs {fight_info['opponent_name']} "
+                 f"(Level {fight_info['opponent_level']})")
+
+    def _leek_worker(self, leek, strategy, harvester):
+        """Start fights for one leek until the shared quota is drained"""
+        leek_id = leek['id']
+        leek_name = leek['name']
+        # Read-only connection for opponent selection, owned by this thread
+        db = FightDatabase(leek_id, self.db_dir)
+        consecutive_failures = 0
+
+        try:
+            while consecutive_failures < 5 and self._quota_left():
+                if not self._claim_fight(leek_id):
+                    break
+
+                all_opponents = self.get_leek_opponents(leek_id, verbose=False)
+                if not all_opponents:
+                    self._release_fight(leek_id)
+                    consecutive_failures += 1
+                    continue
+
+                if self.scout:
+                    self.scout.scout(all_opponents)
+                preferred_opponents = db.get_preferred_opponents(all_opponents, strategy)
+                if not preferred_opponents:
+                    self._release_fight(leek_id)
+                    consecutive_failures += 1
+                    continue
+                if self.planner:
+                    stats = db.classify_opponents(opp['id'] for opp in preferred_opponents)
+                    with self.lock:
+                        self.planner.observe(leek_id, preferred_opponents, stats)
+
+                opponent = self.choose_opponent(preferred_opponents)
+                fight_id = self.start_solo_fight(leek_id, opponent['id'])
+                if not fight_id:
+                    self._release_fight(leek_id)
+                    consecutive_failures += 1
+                    continue
+
+                consecutive_failures = 0
+                self._count(leek_id, 'started')
+                fight_info = {
+                    'fight_id': fight_id,
+                    'opponent_id': opponent['id'],
+                    'opponent_name': opponent.get('name', 'Unknown'),
+                    'opponent_level': opponent.get('level', 0),
+                    'fight_url': f"https://leekwars.com/fight/{fight_id}",
+                    'timestamp': datetime.now().strftime('%H:%M:%S'),
+                    'history': ""
+                }
+                with self.lock:
+                    self.fight_ids.append(fight_info)
+                harvester.submit(self._harvest, leek, fight_info)
+        finally:
+            db.close()
+
+        if consecutive_failures >= 5:
+            self.log(f"   ⚠️ [{leek_name}] Stopping after {consecutive_failures} consecutive failures")
+            if self.planner:
+                with self.lock:
+                    # Hand this leek's share to the others
+                    self.planner.retire(leek_id)
+                    self._replan(f"{leek_name} stopped")
+
+    def run_multi_leek_fights(self, num_fights=None, leek_selectors=None, strategy="smart"):
+        """Run fights for several leeks concurrently from the shared quota"""
+        if not self.leeks:
+            print("\n❌ No leeks found in your account!")
+            return
+
+        if self.total_fights == 0:
+            print("\n❌ No fights available. Try again tomorrow!")
+            return
+
+        leeks = self.select_leeks(leek_selectors)
+        if not leeks:
+            print("\n❌ None of the requested leeks were found!")
+            return
+
+        self.fights_remaining = min(num_fights or self.total_fights, self.total_fights)
+        fights_to_run = self.fights_remaining
+        self.progress = {
+            leek['id']: {'name': leek['name'], 'started': 0, 'wins': 0,
+                         'losses': 0, 'draws': 0, 'failed': 0}
+            for leek in leeks
+        }
+
+        self.log("\n" + "="*60)
+        self.log("STARTING MULTI-LEEK SOLO FIGHTS")
+        self.log(f"Strategy: {strategy.upper()}")
+        self.log(f"Leeks: {', '.join(leek['name'] for leek in leeks)}")
+        self.log(f"Rate budget: {self.rate_limiter.rate:.1f} requests/s")
+        self.log("="*60)
+        self.log(f"\n🎯 Running {fights_to_run} fights across {len(leeks)} leeks...")
+
+        self.planner = None
+        db = FightDatabase(None, self.db_dir)
+        if strategy == 'predicted':
+            # Learn from the fights recorded since the last session
+            model, added = update_model(db)
+            self.log(f"🧠 Opponent model: trained on {added} new fights ({model.samples} total)")
+        if self.planning and len(leeks) > 1:
+            self.planner = FightPlanner(leeks, db)
+            self.planner.plan(self.fights_remaining)
+            self.log(f"🗺️ Plan: {self.planner.describe()}")
+        db.close()
+
+        start_time = datetime.now()
+        self.db_writer = FightDatabaseWriter(self.db_dir, {leek['id']: leek for leek in leeks}).start()
+        if self.scouting:
+            # One scout for all leeks: shared opponents are fetched once, on idle budget
+            self.scout = OpponentScout(self.session, self.db_dir)
+
+        harvester = ThreadPoolExecutor(max_workers=self.harvest_workers)
+        starters = ThreadPoolExecutor(max_workers=len(leeks))
+        try:
+            for leek in leeks:
+                starters.submit(self._leek_worker, leek, strategy, harvester)
+            starters.shutdown()
+            # Then wait for every pending result
+            harvester.shutdown()
+        except KeyboardInterrupt:
+            # Stop the workers before waiting on them, drop queued downloads,
+            # then the writer below saves the results harvested so far
+            self.stop_event.set()
+            starters.shutdown(cancel_futures=True)
+            harvester.shutdown(cancel_futures=True)
+            raise
+        finally:
+            self.db_writer.close()
+            if self.scout:
+                self.scout.close()
+
+        duration = (datetime.now() - start_time).total_seconds()
+        self.print_summary(duration, fights_to_run)
+
+    def print_summary(self, duration, fights_to_run):
+        """Print per-leek and overall results"""
+        started = sum(p['started'] for p in self.progress.values())
+
+        self.log("\n" + "="*60)
+        self.log("MULTI-LEEK FIGHT SESSION COMPLETE")
+        self.log("="*60)
+        self.log(f"✅ Total fights started: {started}/{fights_to_run}")
+        for progress in self.progress.values():
+            self.log(f"   🥬 {progress['name']:<20} {progress['started']:>4} fights → "
+                     f"{progress['wins']}W-{progress['losses']}L-{progress['draws']}D"
+                     + (f" ({progress['failed']} unresolved)" if progress['failed'] else ""))
+
+        if started > 0:
+            if duration < 60:
+                self.log(f"⏱️ Time taken: {duration:.1f} seconds")
+            else:
+                self.log(f"⏱️ Time taken: {duration/60:.1f} minutes")
+            self.log(f"⚡ Average: {duration/started:.2f} seconds per fight")
+        self.log(f"📡 Requests: {self.rate_limiter.requests} ({self.rate_limiter.throttled} rate-limited)")
+        if self.db_writer:
+            self.log(f"💾 Recorded: {self.db_writer.recorded} fights in {self.db_writer.batches} transactions"
+                     + (f" ({self.db_writer.failed} failed)" if self.db_writer.failed else ""))
+        if self.scout:
+            self.log(f"🔍 Scout: {self.scout.summary()}")
+        if self.planner:
+            self.log(f"🗺️ Planner: {self.planner.plans} plans")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='LeekWars Solo Fighter - all leeks concurrently')
+    parser.add_argument('num_fights', type=int, nargs='?', default=None,
+                        help='Number of fights to run (default: all available)')
+    parser.add_argument('--leeks', nargs='+', default=None,
+                        help='Leek numbers or names to use (default: all leeks)')
+    parser.add_argument('--strategy', choices=['safe', 'smart', 'aggressive', 'random', 'adaptive', 'confident', 'predicted'],
+                        default='smart', help='Opponent selection strategy (default: smart)')
+    parser.add_argument('--rate', type=float, default=4.0,
+                        help='Shared request budget in requests per second (default: 4)')
+    parser.add_argument('--harvesters', type=int, default=4,
+                        help='Concurrent result downloads (default: 4)')
+    parser.add_argument('--account', default='main', help='Account to use (default: main)')
+    parser.add_argument('--ws', action='store_true',
+                        help='Experimental: wait for fight results via WebSocket notifications '
+                        '(needs LEEKWARS_WS_FIGHT_IDS; falls back to polling on the first timeout)')
+    parser.add_argument('--no-scout', action='store_true',
+                        help='Do not fetch opponent builds in the background')
+    parser.add_argument('--no-plan', action='store_true',
+                        help='Let leeks take fights first-come instead of planning the split')
+
+    args = parser.parse_args()
+
+    if args.num_fights is not None and args.num_fights < 1:
+        print("❌ Error: Number of fights must be at least 1")
+        return 1
+
+    print("="*60)
+    print("LEEKWARS SOLO FIGHTER (MULTI-LEEK EDITION)")
+    print("="*60)
+    print(f"Leeks: {' '.join(args.leeks) if args.leeks else 'all'}")
+    print(f"Fights to run: {args.num_fights or 'all available'}")
+    print(f"Strategy: {args.strategy}")
+    print(f"Account: {args.account}")
+    print()
+
+    fighter = LeekWarsMultiLeekFighter(rate=args.rate, harvest_workers=args.harvesters, scout=not args.no_scout,
+                                       plan=not args.no_plan)
+
+    email, password = load_credentials(account=args.account)
+
+    if not fighter.login(email, password):
+        print("\n❌ Failed to login. Please check your credentials.")
+        return 1
+
+    if args.ws:
+        fighter.enable_fight_notifications()
+
+    try:
+        if fighter.total_fights > 0:
+            fighter.run_multi_leek_fights(args.num_fights, leek_selectors=args.leeks, strategy=args.strategy)
+        else:
+            print("\n⚠️ No fights available right now.")
+
+    except KeyboardInterrupt:
+        print("\n\n⚠️ Interrupted by user")
+
+    except Exception as e:
+        print(f"\n❌ Error occurred: {e}")
+        import traceback
+        traceback.print_exc()
+
+    finally:
+        fighter.disconnect()
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -15,9 +15,9 @@ from getpass import getpass
 import os
 import sys
 import argparse
-from config_loader import load_credentials
+from config_loader import load_credentials, get_api_url
 
-BASE_URL = "https://leekwars.com/api"
+BASE_URL = get_api_url()
 
 class OpponentTracker:
     def __init__(self, leek_id):
@@ -3,7 +3,7 @@
 LeekWars Auto Team Fighter - All Compositions Version
 Runs all available team fights for all team compositions automatically
 
-Usage: python3 lw_team_fights_all.py [--quick] [--account <name>]
+Usage: python3 lw_team_fights_all.py [--quick] [--account <name>] [--rate <req/s>]
 
 Examples:
   python3 lw_team_fights_all.py
@@ -17,17 +17,24 @@ import random
 import time
 from datetime import datetime
 from getpass import getpass
-import os
 import sys
 import argparse
-from config_loader import load_credentials
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from config_loader import load_credentials, get_api_url
+from fight_harvester import FightHarvester, fight_payload
+from rate_limiter import RateLimiter, RateLimitedSession
 
-BASE_URL = "https://leekwars.com/api"
+BASE_URL = get_api_url()
 
 class LeekWarsTeamFighter:
-    def __init__(self):
+    def __init__(self, rate=4.0, harvest_workers=4):
         """Initialize session and variables"""
-        self.session = requests.Session()
+        # One request budget shared by every composition worker and the harvester
+        self.rate_limiter = RateLimiter(rate)
+        self.session = RateLimitedSession(self.rate_limiter)
+        self.harvest_workers = harvest_workers
+        self.lock = threading.Lock()
         self.farmer = None
         self.token = None
         self.team = None
@@ -302,45 +309,19 @@ class LeekWarsTeamFighter:
         print(f"\n📥 Downloading logs for {len(fight_ids)} fights...")
         print(f"   Composition: {composition_name} (ID: {composition_id})")
         
-        # Create directory for logs using composition ID
-        log_dir = f"fight_logs/team_composition_{composition_id}"
-        os.makedirs(log_dir, exist_ok=True)
-        print(f"   Directory: {log_dir}/")
+        # Archive group named after the composition ID
+        group = f"team_composition_{composition_id}"
         
-        successful = 0
-        failed = []
+        harvester = FightHarvester(self.session, max_workers=self.harvest_workers)
+        print(f"   Archive: {harvester.archive.root}/ ({group})")
+        for fight_id in fight_ids:
+            harvester.submit(fight_id, group)
+        harvester.wait_all()
+        harvester.shutdown()
         
-        for i, fight_id in enumerate(fight_ids):
-            # Rate limiting - 0.3 seconds between requests
-            if i > 0:
-                time.sleep(0.3)
-            
-            # Progress indicator
-            if i > 0 and i % 10 == 0:
-                print(f"   Progress: {i}/{len(fight_ids)} ({i*100/len(fight_ids):.1f}%)")
-            
-            # Download fight data
-            fight_data = self.download_fight_data(fight_id)
-            if fight_data:
-                # Save fight data
-                data_file = f"{log_dir}/{fight_id}_data.json"
-                with open(data_file, "w") as f:
-                    json.dump(fight_data, f, indent=2)
-                
-                # Download debug logs
-                logs = self.download_fight_logs(fight_id)
-                if logs:
-                    logs_file = f"{log_dir}/{fight_id}_logs.json"
-                    with open(logs_file, "w") as f:
-                        json.dump(logs, f, indent=2)
-                
-                successful += 1
-            else:
-                failed.append(fight_id)
-        
-        print(f"✅ Downloaded logs: {successful}/{len(fight_ids)}")
-        if failed:
-            print(f"❌ Failed: {len(failed)} fights")
+        print(f"✅ Downloaded logs: {harvester.successful}/{len(fight_ids)}")
+        if harvester.failed:
+            print(f"❌ Failed: {len(harvester.failed)} fights")
     
     def update_farmer_info(self):
         """Update farmer info using session cookies"""
@@ -359,6 +340,91 @@ class LeekWarsTeamFighter:
             return self.update_farmer_info()
         return False
     
+    def record_fight_result(self, results, result):
+        """Harvester callback: tally the outcome of one of our fights"""
+        if not result["ok"]:
+            return
+        winner = fight_payload(result["data"]).get("winner", -1)
+        with self.lock:
+            # The composition that starts the fight is team 1
+            if winner == 0:
+                results["results"]["draws"] += 1
+            elif winner == 1:
+                results["results"]["wins"] += 1
+            else:
+                results["results"]["losses"] += 1
+    
+    def run_composition_fights(self, composition, results, harvester, quick_mode=False):
+        """Start every available fight for one composition (runs in its own thread)"""
+        comp_id = composition["id"]
+        comp_name = composition.get("name", "Unknown")
+        comp_fights = composition.get("fights", 0)
+        group = f"team_composition_{comp_id}"
+        
+        fights_completed = 0
+        consecutive_failures = 0
+        
+        while fights_completed < comp_fights and consecutive_failures < 3:
+            # Get opponents for this composition
+            opponents = self.get_composition_opponents(comp_id, verbose=False)
+            
+            if not opponents:
+                if not quick_mode:
+                    print(f"   ⚠️ [{comp_name}] No opponents available")
+                break
+            
+            # Choose random opponent
+            opponent = random.choice(opponents)
+            opponent_name = opponent.get("name", "Unknown")
+            opponent_team_name = opponent.get("team_name", "Unknown")
+            
+            # Start the team fight
+            fight_id = self.start_team_fight(comp_id, opponent["id"])
+            results["fights_attempted"] += 1
+            
+            if fight_id:
+                consecutive_failures = 0
+                fights_completed += 1
+                results["fights_completed"] += 1
+                results["fight_ids"].append(fight_id)
+                
+                fight_url = f"https://leekwars.com/fight/{fight_id}"
+                timestamp = datetime.now().strftime('%H:%M:%S')
+                
+                # Results and logs are collected while the next fights start
+                harvester.submit(fight_id, group,
+                                 on_result=lambda result: self.record_fight_result(results, result))
+                
+                if not quick_mode or fights_completed <= 3:
+                    print(f"   ✅ [{comp_name}] Fight #{fights_completed}/{comp_fights} vs {opponent_team_name} - {opponent_name}")
+                    if fights_completed <= 3:
+                        print(f"   🔗 {fight_url}")
+                elif quick_mode:
+                    print(".", end="", flush=True)
+                
+                with self.lock:
+                    self.fight_ids.append(fight_id)
+                    self.fights_run.append({
+                        'id': fight_id,
+                        'url': fight_url,
+                        'composition': comp_name,
+                        'opponent': opponent_name,
+                        'opponent_team': opponent_team_name,
+                        'time': timestamp
+                    })
+            else:
+                if not quick_mode:
+                    print(f"   ❌ [{comp_name}] Failed to start fight against {opponent_team_name} - {opponent_name}")
+                consecutive_failures += 1
+            
+            # Update farmer info periodically to check remaining fights
+            if fights_completed > 0 and fights_completed % 10 == 0:
+                self.update_farmer_info()
+                if self.total_team_fights == 0:
+                    if not quick_mode:
+                        print(f"   ⚠️ [{comp_name}] No more team fights available!")
+                    break
+    
     def run_team_fights(self, quick_mode=False):
         """Run all available team fights for all compositions"""
         if not self.compositions:
@@ -391,115 +457,41 @@ class LeekWarsTeamFighter:
             comp_fights = comp.get("fights", 0)
             print(f"   - {comp_name}: {comp_fights} fights")
         
-        total_fights_completed = 0
         composition_results = {}
-        
-        # Process each composition
-        for comp_idx, composition in enumerate(active_compositions):
-            comp_id = composition["id"]
-            comp_name = composition.get("name", "Unknown")
-            comp_fights = composition.get("fights", 0)
-            
-            print(f"\n🥬 [{comp_idx + 1}/{len(active_compositions)}] Processing: {comp_name}")
-            print(f"   Available fights: {comp_fights}")
-            
-            composition_results[comp_id] = {
-                "name": comp_name,
+        for composition in active_compositions:
+            composition_results[composition["id"]] = {
+                "name": composition.get("name", "Unknown"),
                 "fights_attempted": 0,
                 "fights_completed": 0,
                 "fight_ids": [],
                 "results": {"wins": 0, "losses": 0, "draws": 0}
             }
+        
+        print(f"\n🚀 Starting fights for {len(active_compositions)} compositions concurrently...")
+        
+        # Every composition starts its fights in parallel; results and logs are
+        # harvested as soon as each fight is generated
+        harvester = FightHarvester(self.session, max_workers=self.harvest_workers)
+        try:
+            with ThreadPoolExecutor(max_workers=len(active_compositions)) as executor:
+                futures = [executor.submit(self.run_composition_fights, composition,
+                                           composition_results[composition["id"]], harvester, quick_mode)
+                           for composition in active_compositions]
+                for future in futures:
+                    future.result()  # Surface worker exceptions
             
-            fights_completed = 0
-            consecutive_failures = 0
-            
-            while fights_completed < comp_fights and consecutive_failures < 3:
-                # Get opponents for this composition
-                opponents = self.get_composition_opponents(comp_id, verbose=False)
-                
-                if not opponents:
-                    if consecutive_failures == 0 and not quick_mode:
-                        print(f"   ⚠️ No opponents available for {comp_name}")
-                    consecutive_failures += 1
-                    break
-                
-                # Reset failure counter on successful opponent fetch
-                consecutive_failures = 0
-                
-                # Choose random opponent
-                opponent = random.choice(opponents)
-                opponent_name = opponent.get("name", "Unknown")
-                opponent_team_name = opponent.get("team_name", "Unknown")
-                
-                # Start the team fight
-                fight_id = self.start_team_fight(comp_id, opponent["id"])
-                
-                if fight_id:
-                    fights_completed += 1
-                    total_fights_completed += 1
-                    composition_results[comp_id]["fights_completed"] += 1
-                    composition_results[comp_id]["fight_ids"].append(fight_id)
-                    
-                    fight_url = f"https://leekwars.com/fight/{fight_id}"
-                    timestamp = datetime.now().strftime('%H:%M:%S')
-                    
-                    # Store fight ID for later log retrieval
-                    self.fight_ids.append(fight_id)
-                    
-                    if not quick_mode or fights_completed <= 3:
-                        print(f"   ✅ Fight #{fights_completed}/{comp_fights} vs {opponent_team_name} - {opponent_name}")
-                        if fights_completed <= 3:
-                            print(f"   🔗 {fight_url}")
-                    elif quick_mode:
-                        print(".", end="", flush=True)
-                    
-                    # Get fight result if not in quick mode (for first few fights)
-                    if not quick_mode and fights_completed <= 5:
-                        fight_log = self.get_fight_log(fight_id)
-                        if fight_log:
-                            winner = fight_log.get("winner", -1)
-                            # Determine result (simplified)
-                            if winner == 0:
-                                composition_results[comp_id]["results"]["draws"] += 1
-                            elif winner == 1:  # Assuming team 1 is us
-                                composition_results[comp_id]["results"]["wins"] += 1
-                            else:
-                                composition_results[comp_id]["results"]["losses"] += 1
-                    
-                    self.fights_run.append({
-                        'id': fight_id,
-                        'url': fight_url,
-                        'composition': comp_name,
-                        'opponent': opponent_name,
-                        'opponent_team': opponent_team_name,
-                        'time': timestamp
-                    })
-                    
-                    # Minimal delay to avoid overwhelming the server
-                    if fights_completed < comp_fights:
-                        time.sleep(0.5 if quick_mode else 1.0)
-                else:
-                    if not quick_mode:
-                        print(f"   ❌ Failed to start fight against {opponent_team_name} - {opponent_name}")
-                    consecutive_failures += 1
-                
-                composition_results[comp_id]["fights_attempted"] += 1
-                
-                # Update farmer info periodically to check remaining fights
-                if fights_completed > 0 and fights_completed % 10 == 0:
-                    self.update_farmer_info()
-                    if self.total_team_fights == 0:
-                        if not quick_mode:
-                            print("   ⚠️ No more team fights available!")
-                        break
-            
-            # Download logs for this composition
-            if composition_results[comp_id]["fight_ids"]:
-                self.download_all_fight_logs(comp_id, comp_name, composition_results[comp_id]["fight_ids"])
-            
-            if quick_mode and fights_completed > 5:
-                print()  # New line after progress dots
+            total_fights_completed = sum(r["fights_completed"] for r in composition_results.values())
+            if total_fights_completed > 0:
+                print(f"\n📥 Waiting for {total_fights_completed} fight results and logs...")
+            harvester.wait_all()
+        finally:
+            harvester.shutdown()
+        
+        if quick_mode:
+            print()  # New line after progress dots
+        print(f"✅ Downloaded logs: {harvester.successful}/{total_fights_completed}")
+        if harvester.failed:
+            print(f"❌ Failed: {len(harvester.failed)} fights")
         
         # Final summary
         end_time = datetime.now()
@@ -563,6 +555,8 @@ def main():
     parser.add_argument('--quick', action='store_true', help='Enable quick mode (minimal output)')
     parser.add_argument('--account', default='main', choices=['main', 'cure'],
                         help='Account to use (main or cure, default: main)')
+    parser.add_argument('--rate', type=float, default=4.0,
+                        help='Shared request budget in requests per second (default: 4)')
 
     args = parser.parse_args()
 
@@ -576,7 +570,7 @@ def main():
     print()
 
     # Create fighter instance
-    fighter = LeekWarsTeamFighter()
+    fighter = LeekWarsTeamFighter(rate=args.rate)
 
     # Get credentials
     email, password = load_credentials(account=args.account)
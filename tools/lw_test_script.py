@@ -35,9 +35,9 @@ import os
 import re
 from datetime import datetime
 from html.parser import HTMLParser
-from config_loader import load_credentials
+from config_loader import load_credentials, get_api_url
 
-BASE_URL = "https://leekwars.com/api"
+BASE_URL = get_api_url()
 
 # Action Type Constants (from LeekWars API documentation)
 ACTION_START_FIGHT = 0
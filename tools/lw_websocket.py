@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+LeekWars WebSocket - Shared subscription layer for the LeekWars socket
+
+Keeps one authenticated socket open in a background thread and dispatches
+incoming messages to subscribers, so scripts can block on a notification
+(fight generated, boss fight started, squad joined...) instead of polling.
+
+Usage:
+    from lw_websocket import LeekWarsSocket, FightWatcher
+
+    socket = LeekWarsSocket(fighter.session)
+    if socket.connect():
+        watcher = FightWatcher(socket)
+        watcher.watch(fight_id)              # right after starting the fight
+        watcher.wait(fight_id, timeout=15)   # True once the fight is generated
+
+Requires the `websocket-client` package (see websocket_env). When it is
+missing, connect() returns False and callers keep polling over HTTP.
+
+The fight notification ids (FIGHT_LISTEN / FIGHT_GENERATED) are not known
+from the frontend's SocketMessage enum, so fight notifications are opt-in:
+they need --ws and LEEKWARS_WS_FIGHT_IDS="<listen>,<generated>". Without
+the ids FightWatcher stays disabled and callers poll; with them it still
+falls back to polling for good the first time a wait times out before any
+notification was ever received.
+"""
+
+import json
+import os
+import ssl
+import threading
+
+try:
+    import websocket
+except ImportError:
+    websocket = None
+
+from config_loader import get_ws_url
+
+WS_URL = get_ws_url()
+
+# Unconfirmed wait after which FightWatcher gives up on notifications
+PROBE_TIMEOUT = 5.0
+# Notifications remembered for fights nobody is waiting on yet
+MAX_FINISHED = 256
+
+
+def fight_message_ids():
+    """(FIGHT_LISTEN, FIGHT_GENERATED) ids from LEEKWARS_WS_FIGHT_IDS, or None when not set"""
+    value = os.environ.get("LEEKWARS_WS_FIGHT_IDS")
+    if not value:
+        return None
+    try:
+        listen, generated = (int(part) for part in value.split(","))
+        return listen, generated
+    except ValueError:
+        print(f"   ⚠️ Ignoring LEEKWARS_WS_FIGHT_IDS={value!r} (expected '<listen>,<generated>')")
+        return None
+
+
+FIGHT_MESSAGE_IDS = fight_message_ids()
+
+# WebSocket message types (from frontend)
+SocketMessage = {
+    'GARDEN_BOSS_CREATE_SQUAD': 66,
+    'GARDEN_BOSS_JOIN_SQUAD': 67,
+    'GARDEN_BOSS_ADD_LEEK': 68,
+    'GARDEN_BOSS_REMOVE_LEEK': 69,
+    'GARDEN_BOSS_ATTACK': 71,
+    'GARDEN_BOSS_LISTEN': 72,
+    'GARDEN_BOSS_SQUADS': 73,
+    'GARDEN_BOSS_SQUAD_JOINED': 74,
+    'GARDEN_BOSS_LEAVE_SQUAD': 75,
+    'GARDEN_BOSS_SQUAD': 76,
+    'GARDEN_BOSS_NO_SUCH_SQUAD': 77,
+    'GARDEN_BOSS_STARTED': 78,
+    'GARDEN_BOSS_LEFT': 82
+}
+
+
+def message_fight_id(data):
+    """Extract a fight id from a [type, payload] socket message"""
+    if len(data) < 2:
+        return None
+    payload = data[1]
+    if isinstance(payload, dict):
+        payload = payload.get('id', payload.get('fight'))
+    try:
+        return int(payload)
+    except (TypeError, ValueError):
+        return None
+
+
+class MessageWaiter:
+    def __init__(self, message_types, predicate=None):
+        """One-shot wait for the next message of the given type(s)"""
+        self.message_types = set(message_types)
+        self.predicate = predicate
+        self.event = threading.Event()
+        self.data = None
+
+    def offer(self, data):
+        """Called by the socket thread; returns True when the waiter is satisfied"""
+        if self.event.is_set() or data[0] not in self.message_types:
+            return False
+        if self.predicate and not self.predicate(data):
+            return False
+        self.data = data
+        self.event.set()
+        return True
+
+    def wait(self, timeout=None):
+        """Block until the message arrives; returns it, or None on timeout"""
+        if self.event.wait(timeout):
+            return self.data
+        return None
+
+
+class LeekWarsSocket:
+    def __init__(self, session, url=WS_URL, verbose=False):
+        """Socket authenticated with the cookies of a logged-in requests session"""
+        self.session = session
+        self.url = url
+        self.verbose = verbose
+        self.ws = None
+        self.ws_thread = None
+        self.connected = threading.Event()
+        self.lock = threading.Lock()
+        self.subscribers = {}
+        self.waiters = []
+
+    def connect(self, timeout=10):
+        """Open the socket in a background thread; False if unavailable"""
+        if websocket is None:
+            if self.verbose:
+                print("   ⚠️ websocket-client not installed - falling back to HTTP polling")
+            return False
+
+        cookies = "; ".join([f"{name}={value}" for name, value in self.session.cookies.items()])
+
+        def on_message(ws, message):
+            try:
+                data = json.loads(message)
+            except json.JSONDecodeError:
+                return
+            if isinstance(data, list) and data:
+                self.dispatch(data)
+
+        def on_error(ws, error):
+            if self.verbose:
+                print(f"   ❌ WebSocket error: {error}")
+
+        def on_close(ws, close_status_code, close_msg):
+            self.connected.clear()
+            if self.verbose:
+                print("   🔌 WebSocket disconnected")
+
+        def on_open(ws):
+            self.connected.set()
+
+        websocket.enableTrace(False)
+        self.ws = websocket.WebSocketApp(
+            self.url,
+            header={"Cookie": cookies},
+            on_open=on_open,
+            on_message=on_message,
+            on_error=on_error,
+            on_close=on_close
+        )
+
+        sslopt = {"cert_reqs": ssl.CERT_NONE} if self.url.startswith("wss") else None
+        self.ws_thread = threading.Thread(target=self.ws.run_forever, kwargs={'sslopt': sslopt})
+        self.ws_thread.daemon = True
+        self.ws_thread.start()
+
+        if not self.connected.wait(timeout):
+            if self.verbose:
+                print("   ❌ Failed to connect to WebSocket")
+            return False
+        return True
+
+    def is_connected(self):
+        return self.connected.is_set()
+
+    def send(self, message):
+        """Send a JSON message; False if the socket is down"""
+        if not self.ws or not self.connected.is_set():
+            return False
+        try:
+            self.ws.send(json.dumps(message))
+            return True
+        except Exception as e:
+            if self.verbose:
+                print(f"   ❌ Failed to send WebSocket message: {e}")
+            return False
+
+    def subscribe(self, message_type, callback):
+        """Call callback(data) for every message of this type"""
+        with self.lock:
+            self.subscribers.setdefault(message_type, []).append(callback)
+
+    def unsubscribe(self, message_type, callback):
+        with self.lock:
+            callbacks = self.subscribers.get(message_type, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+    def expect(self, message_types, predicate=None):
+        """Register a one-shot waiter BEFORE sending the request it answers"""
+        if isinstance(message_types, int):
+            message_types = [message_types]
+        waiter = MessageWaiter(message_types, predicate)
+        with self.lock:
+            self.waiters.append(waiter)
+        return waiter
+
+    def cancel(self, waiter):
+        """Drop a waiter that timed out"""
+        with self.lock:
+            if waiter in self.waiters:
+                self.waiters.remove(waiter)
+
+    def dispatch(self, data):
+        """Hand an incoming message to subscribers, then wake waiters"""
+        with self.lock:
+            callbacks = list(self.subscribers.get(data[0], []))
+        # Subscribers run first so waiters wake up to already-updated state
+        for callback in callbacks:
+            try:
+                callback(data)
+            except Exception as e:
+                if self.verbose:
+                    print(f"   ⚠️ WebSocket handler failed: {e}")
+        with self.lock:
+            satisfied = [w for w in self.waiters if w.offer(data)]
+            for waiter in satisfied:
+                self.waiters.remove(waiter)
+
+    def close(self):
+        if self.ws:
+            self.ws.close()
+        self.connected.clear()
+
+
+class FightWatcher:
+    def __init__(self, socket, fight_ids=FIGHT_MESSAGE_IDS):
+        """Track fight-started / fight-generated notifications by fight id
+
+        fight_ids: (FIGHT_LISTEN, FIGHT_GENERATED); without them the watcher is
+        disabled from the start.
+        """
+        self.socket = socket
+        self.fight_ids = fight_ids
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.finished = {}      # Insertion-ordered so the oldest can be dropped
+        self.confirmed = False  # A FIGHT_GENERATED notification has arrived
+        self.disabled = fight_ids is None  # Gave up on notifications: callers poll
+        self.on_started = []
+        self.on_finished = []
+        if fight_ids:
+            socket.subscribe(fight_ids[1], self._fight_generated)
+        socket.subscribe(SocketMessage['GARDEN_BOSS_STARTED'], self._fight_started)
+
+    def _fight_started(self, data):
+        fight_id = message_fight_id(data)
+        if fight_id is not None:
+            for callback in self.on_started:
+                callback(fight_id)
+
+    def _fight_generated(self, data):
+        fight_id = message_fight_id(data)
+        if fight_id is None:
+            return
+        with self.lock:
+            self.confirmed = True
+            event = self.pending.get(fight_id)
+            if event is None:
+                # Notification beat watch()/wait() - remember it
+                self.finished[fight_id] = True
+                if len(self.finished) > MAX_FINISHED:
+                    del self.finished[next(iter(self.finished))]
+            else:
+                event.set()
+        for callback in self.on_finished:
+            callback(fight_id)
+
+    def watch(self, fight_id):
+        """Ask the server to notify us when this fight is generated"""
+        fight_id = int(fight_id)
+        if self.disabled:
+            return False
+        with self.lock:
+            if fight_id not in self.pending:
+                event = threading.Event()
+                if fight_id in self.finished:
+                    event.set()
+                self.pending[fight_id] = event
+        return self.socket.send([self.fight_ids[0], fight_id])
+
+    def wait(self, fight_id, timeout=15):
+        """Block until the fight is generated; False on timeout, no socket or once disabled
+
+        Until a notification has been received, waits at most PROBE_TIMEOUT and
+        disables the watcher if nothing arrives (the message ids may be wrong).
+        """
+        fight_id = int(fight_id)
+        with self.lock:
+            if self.disabled or (not self.socket.is_connected() and fight_id not in self.finished):
+                self.pending.pop(fight_id, None)
+                return False
+            event = self.pending.setdefault(fight_id, threading.Event())
+            if fight_id in self.finished:
+                event.set()
+            probing = not self.confirmed
+        done = event.wait(min(timeout, PROBE_TIMEOUT) if probing else timeout)
+        with self.lock:
+            self.pending.pop(fight_id, None)
+            self.finished.pop(fight_id, None)
+            if not done and not self.confirmed and not self.disabled:
+                self.disabled = True
+                print("   ⚠️ No fight notification received - polling over HTTP from now on "
+                      "(set LEEKWARS_WS_FIGHT_IDS if the fight message ids are wrong)")
+        return done
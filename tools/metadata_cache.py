@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Metadata Cache - Conditional, TTL-based caching of LeekWars reference data
+
+Weapons, chips, constants and leek details change rarely, so each resource
+is cached in data/cache/<resource>.json with the ETag/Last-Modified the server
+sent. Within its TTL a resource is served without any request; after that it
+is revalidated with If-None-Match / If-Modified-Since, and a 304 (or an
+identical body) reports it as unchanged so callers can skip regenerating
+derived files.
+
+Entries are keyed by resource name only: the request headers and the
+session's login are not part of the key, so only cache data that every
+account sees the same way (game reference data, a given leek's details).
+
+Usage:
+    from metadata_cache import MetadataCache
+
+    cache = MetadataCache(session)
+    weapons, changed = cache.get("weapons", f"{BASE_URL}/weapon/get-all")
+    leeks = cache.get_many({f"leek_{i}": f"{BASE_URL}/leek/get/{i}" for i in ids}, ttl=3600)
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+DEFAULT_CACHE_DIR = Path(__file__).parent.parent / "data" / "cache"
+
+# Seconds a cached resource is used without revalidation
+DEFAULT_TTLS = {
+    "weapons": 24 * 3600,
+    "chips": 24 * 3600,
+    "constants": 24 * 3600,
+    "leek": 3600,
+}
+DEFAULT_TTL = 3600
+
+
+def data_hash(data):
+    """Hash of a JSON document independent of key order"""
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class MetadataCache:
+    def __init__(self, session=None, cache_dir=DEFAULT_CACHE_DIR, ttls=None, force=False):
+        """Cache for one session; force revalidates everything regardless of TTL"""
+        self.session = session
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.force = force
+        self.locks = {}
+        self.locks_lock = threading.Lock()
+
+        self.hits = 0
+        self.not_modified = 0
+        self.downloads = 0
+
+    def _lock(self, resource):
+        with self.locks_lock:
+            return self.locks.setdefault(resource, threading.Lock())
+
+    def _path(self, resource):
+        return self.cache_dir / f"{resource}.json"
+
+    def ttl(self, resource):
+        """TTL of a resource, by exact name or its prefix (leek_123 -> leek)"""
+        if resource in self.ttls:
+            return self.ttls[resource]
+        return self.ttls.get(resource.split("_")[0], DEFAULT_TTL)
+
+    def load(self, resource):
+        """Cached entry {url, fetched_at, etag, last_modified, hash, data} or None"""
+        path = self._path(resource)
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def save(self, resource, entry):
+        """Write an entry atomically"""
+        path = self._path(resource)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def is_fresh(self, resource, ttl=None):
+        """True if the resource can be served without asking the server"""
+        entry = self.load(resource)
+        ttl = self.ttl(resource) if ttl is None else ttl
+        return bool(entry) and not self.force and time.time() - entry.get("fetched_at", 0) < ttl
+
+    def get(self, resource, url, ttl=None, headers=None):
+        """Return (data, changed) for a resource
+
+        headers are sent with the request but not part of the cache key.
+        changed is True when the data differs from the previous cached copy
+        (or there was none). On a failed request the stale copy is returned
+        unchanged; (None, False) if there is nothing cached either.
+        """
+        with self._lock(resource):
+            entry = self.load(resource)
+            if entry and entry.get("url") == url and self.is_fresh(resource, ttl):
+                self.hits += 1
+                return entry["data"], False
+
+            request_headers = dict(headers or {})
+            if entry and entry.get("url") == url:
+                if entry.get("etag"):
+                    request_headers["If-None-Match"] = entry["etag"]
+                if entry.get("last_modified"):
+                    request_headers["If-Modified-Since"] = entry["last_modified"]
+
+            try:
+                response = self.session.get(url, headers=request_headers)
+            except Exception as e:
+                print(f"   ⚠️ {resource}: request failed ({e})")
+                return (entry["data"], False) if entry else (None, False)
+
+            if response.status_code == 304 and entry:
+                self.not_modified += 1
+                entry["fetched_at"] = time.time()
+                self.save(resource, entry)
+                return entry["data"], False
+
+            if response.status_code != 200:
+                print(f"   ⚠️ {resource}: HTTP {response.status_code}" + (" - using cached copy" if entry else ""))
+                return (entry["data"], False) if entry else (None, False)
+
+            try:
+                data = response.json()
+            except ValueError:
+                print(f"   ⚠️ {resource}: invalid JSON")
+                return (entry["data"], False) if entry else (None, False)
+
+            self.downloads += 1
+            digest = data_hash(data)
+            changed = not entry or entry.get("hash") != digest
+            self.save(resource, {
+                "url": url,
+                "fetched_at": time.time(),
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "hash": digest,
+                "data": data,
+            })
+            return data, changed
+
+    def get_many(self, resources, ttl=None, headers=None, max_workers=4):
+        """Fetch {resource: url} concurrently; returns {resource: (data, changed)}"""
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {resource: executor.submit(self.get, resource, url, ttl, headers)
+                       for resource, url in resources.items()}
+            return {resource: future.result() for resource, future in futures.items()}
+
+    def summary(self):
+        return f"{self.hits} cached, {self.not_modified} not modified, {self.downloads} downloaded"
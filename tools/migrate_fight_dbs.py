@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Merge per-leek fight_history_<leek_id>.db files into the unified fight database
+Usage: python3 migrate_fight_dbs.py [dir ...] [--db <path>] [--keep]
+  dir     directories to scan (default: current directory, tools/ and project root)
+  --db    target database (default: configured fight_db path)
+  --keep  leave the old files in place instead of renaming them to *.migrated
+
+Importing is idempotent: fights already in the unified database are skipped.
+"""
+
+import argparse
+import glob
+import os
+import re
+import sys
+
+from config_loader import get_fight_db_path
+from fight_db import FightDatabase
+
+LEGACY_PATTERN = re.compile(r"^fight_history_(\d+)\.db$")
+
+
+def find_legacy_dbs(directories):
+    """{path: leek_id} for every fight_history_<leek_id>.db in the directories"""
+    found = {}
+    for directory in directories:
+        for path in glob.glob(os.path.join(directory, "fight_history_*.db")):
+            match = LEGACY_PATTERN.match(os.path.basename(path))
+            if match:
+                found[os.path.realpath(path)] = int(match.group(1))
+    return found
+
+
+def main():
+    tools_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description='Merge per-leek fight databases into one')
+    parser.add_argument('dirs', nargs='*',
+                        default=[os.getcwd(), tools_dir, os.path.dirname(tools_dir)],
+                        help='Directories to scan for fight_history_<leek_id>.db')
+    parser.add_argument('--db', default=None, help='Target database (default: configured fight_db path)')
+    parser.add_argument('--keep', action='store_true', help='Do not rename migrated files')
+    args = parser.parse_args()
+
+    legacy = find_legacy_dbs(args.dirs)
+    if not legacy:
+        print("✅ No per-leek databases found")
+        return 0
+
+    db = FightDatabase(db_path=args.db or get_fight_db_path())
+    print(f"📦 Merging {len(legacy)} database(s) into {db.db_path}")
+
+    failed = 0
+    for path, leek_id in sorted(legacy.items(), key=lambda item: item[1]):
+        try:
+            added = db.import_legacy_db(path, leek_id)
+        except Exception as e:
+            print(f"   ❌ {path}: {e}")
+            failed += 1
+            continue
+        print(f"   ✅ Leek {leek_id}: {added} fights imported from {path}")
+        if not args.keep:
+            os.replace(path, f"{path}.migrated")
+
+    for leek in db.get_leeks():
+        print(f"   🥬 {leek['leek_name'] or leek['leek_id']}: {leek['fights']} fights")
+    db.close()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,557 @@
+#!/usr/bin/env python3
+"""
+Mock LeekWars API - Local stand-in for https://leekwars.com/api
+
+Implements the endpoints our scripts call (login, garden, fights, AIs, test
+scenarios, item data) on a stdlib ThreadingHTTPServer, so the clients can be
+load- and regression-tested offline:
+- Fights finish generating after --fight-delay seconds; until then
+  /fight/get answers winner -1 like the real server.
+- Fight payloads are synthetic, canned from the fight archive (--archive),
+  or produced by the local Java generator (--generator, see local_test.py).
+- --latency/--jitter delay every answer, --error-rate injects random 429s and
+  --rate-limit answers 429 (with Retry-After) above N requests/s per client.
+
+Usage: python3 mock_leekwars_api.py [--port 8766] [--latency 50] [--rate-limit 5]
+Then point any client at it:
+    LEEKWARS_API_URL=http://127.0.0.1:8766/api python3 lw_solo_fights_multi.py 20
+Request counters: GET /api/mock/stats
+"""
+
+import argparse
+import itertools
+import json
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+SCRIPT_DIR = Path(__file__).parent
+LEEK_CONFIGS = SCRIPT_DIR / "leek_configs.json"
+MARKET_DATA = SCRIPT_DIR.parent / "data" / "market_data.json"
+
+FIGHT_TYPE_SOLO = 0
+FIGHT_TYPE_FARMER = 1
+FIGHT_TYPE_TEAM = 2
+
+
+def load_json(path, default):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return default
+
+
+class MockLeekWars:
+    """Server-side state shared by every request thread"""
+
+    def __init__(self, fight_delay=1.0, fights=1000, seed=None, archive=None, generator_workers=0):
+        self.fight_delay = fight_delay
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.fight_ids = itertools.count(50000000)
+        self.object_ids = itertools.count(900000)
+        self.tokens = itertools.count(1)
+
+        configs = load_json(LEEK_CONFIGS, {})
+        self.leek_configs = configs.get("leeks", {})
+        self.opponent_configs = configs.get("opponents", {})
+        self.market = load_json(MARKET_DATA, {}).get("raw_data", {})
+
+        leeks = {}
+        for index, (name, cfg) in enumerate(self.leek_configs.items() or [(f"MockLeek{i}", {}) for i in range(1, 5)]):
+            leek_id = cfg.get("id", 100 + index)
+            leeks[str(leek_id)] = {
+                "id": leek_id, "name": cfg.get("name", name), "level": cfg.get("level", 301),
+                "talent": 1500, "ai": None
+            }
+        self.farmer = {
+            "id": 1, "login": "mock_farmer", "name": "mock_farmer", "leeks": leeks,
+            "fights": fights, "victories": 0, "draws": 0, "defeats": 0, "ratio": 0, "habs": 1000000,
+            "talent": 1500, "level": 301
+        }
+        self.compositions = [
+            {"id": 700 + i, "name": f"Team{i}", "fights": 20, "level": 301,
+             "leeks": list(leeks.values())} for i in (1, 2)
+        ]
+        # Fixed pools so repeated opponents build up history in the fight DB
+        self.opponent_leeks = [
+            {"id": 600000 + i, "name": f"Opponent{i}", "level": 295 + i % 7, "talent": 1400 + 10 * i,
+             "farmer": 2000 + i} for i in range(40)
+        ]
+        self.opponent_farmers = [
+            {"id": 2000 + i, "name": f"Farmer{i}", "level": 301, "talent": 1400 + 10 * i,
+             "victories": 100, "draws": 10, "defeats": 90, "ratio": 1.1} for i in range(20)
+        ]
+
+        self.fights = {}
+        self.history = {}
+        self.folders = []
+        self.ais = {}
+        self.scenarios = {}
+
+        self.templates = self.load_templates(archive) if archive else []
+        self.generator = ThreadPoolExecutor(max_workers=generator_workers) if generator_workers else None
+
+    def load_templates(self, archive_root):
+        """Up to 200 archived fights (data + logs) to serve as canned payloads"""
+        from fight_archive import FightArchive
+        archive = FightArchive(archive_root)
+        templates = []
+        for fight_id in itertools.islice(archive.fight_ids(), 200):
+            data = archive.get(fight_id, "data")
+            if isinstance(data, dict):
+                templates.append((data.get("fight", data), archive.get(fight_id, "logs")))
+        print(f"📦 Loaded {len(templates)} canned fights from {archive_root}")
+        return templates
+
+    # --- Fights ---
+
+    def leek_entry(self, leek):
+        return {"id": leek["id"], "name": leek["name"], "level": leek.get("level", 1),
+                "farmer": leek.get("farmer", self.farmer["id"])}
+
+    def new_fight(self, fight_type, leeks1, leeks2):
+        """Register a fight that finishes generating after fight_delay"""
+        with self.lock:
+            if self.farmer["fights"] <= 0:
+                return None
+            self.farmer["fights"] -= 1
+            fight_id = next(self.fight_ids)
+            winner = self.random.choices([1, 2, 0], weights=[45, 45, 10])[0]
+            template = self.random.choice(self.templates) if self.templates else None
+            fight = {
+                "id": fight_id, "type": fight_type, "date": int(time.time()),
+                "leeks1": [self.leek_entry(l) for l in leeks1], "leeks2": [self.leek_entry(l) for l in leeks2],
+                "winner": winner, "ready_at": time.monotonic() + self.fight_delay, "template": template
+            }
+            self.fights[fight_id] = fight
+            for leek in leeks1:
+                self.history.setdefault(str(leek["id"]), []).append(fight_id)
+
+        if self.generator and fight_type == FIGHT_TYPE_SOLO:
+            fight["ready_at"] = float("inf")
+            self.generator.submit(self.generate_fight, fight, leeks1[0])
+        return fight_id
+
+    def generate_fight(self, fight, leek):
+        """Run the fight through the local generator and publish its result"""
+        from local_test import build_scenario, run_fight
+        cfg = self.leek_configs.get(leek["name"])
+        if cfg and self.opponent_configs:
+            opponent = self.opponent_configs[self.random.choice(sorted(self.opponent_configs))]
+            result = run_fight(build_scenario(cfg, opponent, seed=self.random.randint(1, 2**31 - 1)))
+            if "error" not in result:
+                fight["winner"] = {"WIN": 1, "LOSS": 2}.get(result["result"], 0)
+                fight["actions"] = result.get("actions", [])
+        fight["ready_at"] = time.monotonic()
+
+    def fight_view(self, fight_id):
+        """/fight/get payload: winner -1 while the fight is generating"""
+        fight = self.fights.get(fight_id)
+        if fight is None:
+            return None
+        view = {k: v for k, v in fight.items() if k not in ("ready_at", "template", "actions")}
+        if time.monotonic() < fight["ready_at"]:
+            view.update(winner=-1, status=0)
+            return view
+
+        template = fight["template"][0] if fight["template"] else {}
+        actions = fight.get("actions") or template.get("data", {}).get("actions") or [
+            [6, 1], [7, 0], [10, 0, [fight["leeks1"][0]["id"]]], [6, 2], [5, 1]]
+        view.update(status=1, data=dict(template.get("data", {}), actions=actions), report=actions)
+        return view
+
+    def fight_logs(self, fight_id):
+        fight = self.fights.get(fight_id)
+        if fight and fight["template"] and fight["template"][1]:
+            return fight["template"][1]
+        return {}
+
+    # --- AIs ---
+
+    def find_ai(self, ai_id):
+        return self.ais.get(int(ai_id)) if str(ai_id).isdigit() else None
+
+
+class MockAPIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    # Server-wide settings (set by start_server)
+    state = None
+    latency = 0.0
+    jitter = 0.0
+    error_rate = 0.0
+    rate_limit = 0.0
+    verbose = False
+
+    buckets = {}
+    buckets_lock = threading.Lock()
+    stats = Counter()
+    stats_lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        if self.verbose:
+            super().log_message(format, *args)
+
+    def client_key(self):
+        cookie = self.headers.get("Cookie", "")
+        for part in cookie.split(";"):
+            name, _, value = part.strip().partition("=")
+            if name == "token":
+                return value
+        return self.headers.get("Authorization") or self.client_address[0]
+
+    def throttled(self):
+        """Token bucket per client plus random 429 injection"""
+        if self.error_rate and random.random() < self.error_rate:
+            return True
+        if not self.rate_limit:
+            return False
+        now = time.monotonic()
+        with self.buckets_lock:
+            tokens, last = self.buckets.get(self.client_key(), (self.rate_limit, now))
+            tokens = min(self.rate_limit, tokens + (now - last) * self.rate_limit)
+            if tokens < 1.0:
+                self.buckets[self.client_key()] = (tokens, now)
+                return True
+            self.buckets[self.client_key()] = (tokens - 1.0, now)
+        return False
+
+    def send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_form(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length).decode() if length else ""
+        return {key: values[-1] for key, values in parse_qs(raw, keep_blank_values=True).items()}
+
+    def count(self, key):
+        with self.stats_lock:
+            self.stats[key] += 1
+
+    def do_GET(self):
+        self.dispatch("GET")
+
+    def do_POST(self):
+        self.dispatch("POST")
+
+    def dispatch(self, method):
+        path = urlparse(self.path).path
+        form = self.read_form() if method == "POST" else {}
+        parts = [p for p in path.split("/") if p]
+        if parts[:1] == ["api"]:
+            parts = parts[1:]
+
+        if parts[:2] == ["mock", "stats"]:
+            with self.stats_lock:
+                return self.send_json(200, {"requests": dict(self.stats), "total": sum(self.stats.values())})
+
+        endpoint = "/".join(parts[:2])
+        self.count("total")
+        self.count(endpoint)
+
+        if self.latency or self.jitter:
+            time.sleep(self.latency + random.random() * self.jitter)
+
+        if self.throttled():
+            self.count("429")
+            return self.send_json(429, {"success": False, "error": "too_many_requests"}, {"Retry-After": "1"})
+
+        handler = ROUTES.get(endpoint)
+        if handler is None:
+            self.count("404")
+            return self.send_json(404, {"success": False, "error": f"not mocked: {endpoint}"})
+        try:
+            status, payload, *headers = handler(self.state, parts[2:], form)
+        except (KeyError, ValueError, IndexError) as e:
+            return self.send_json(400, {"success": False, "error": f"bad request: {e}"})
+        self.send_json(status, payload, headers[0] if headers else None)
+
+
+# --- Endpoint handlers: (state, path args, form) -> (status, payload[, headers]) ---
+
+def login(state, args, form):
+    token = f"mock-token-{next(state.tokens)}"
+    return 200, {"farmer": state.farmer, "token": token}, {"Set-Cookie": f"token={token}; Path=/"}
+
+
+def farmer_get(state, args, form):
+    return 200, {"farmer": state.farmer}
+
+
+def disconnect(state, args, form):
+    return 200, {}
+
+
+def garden_get(state, args, form):
+    return 200, {"garden": {"fights": state.farmer["fights"], "max_fights": 100,
+                            "my_compositions": state.compositions}}
+
+
+def leek_opponents(state, args, form):
+    leek = state.farmer["leeks"].get(args[0]) if args else None
+    if leek is None:
+        return 200, {"success": False, "error": "leek_not_found"}
+    return 200, {"opponents": state.random.sample(state.opponent_leeks, 5)}
+
+
+def start_solo_fight(state, args, form):
+    leek = state.farmer["leeks"].get(form["leek_id"])
+    opponent = next((o for o in state.opponent_leeks if str(o["id"]) == form["target_id"]), None)
+    if leek is None or opponent is None:
+        return 200, {"success": False, "error": "invalid_target"}
+    fight_id = state.new_fight(FIGHT_TYPE_SOLO, [leek], [opponent])
+    return (200, {"fight": fight_id}) if fight_id else (200, {"success": False, "error": "no_more_fights"})
+
+
+def farmer_opponents(state, args, form):
+    return 200, {"opponents": state.random.sample(state.opponent_farmers, 5)}
+
+
+def farmer_challenge(state, args, form):
+    farmer = next((f for f in state.opponent_farmers if str(f["id"]) == args[0]), None)
+    if farmer is None:
+        farmer = dict(state.opponent_farmers[0], id=int(args[0]))
+    return 200, {"farmer": farmer, "challenges": 10}
+
+
+def start_farmer_fight(state, args, form):
+    opponents = [o for o in state.opponent_leeks if str(o["farmer"]) == form.get("target_id")] or state.opponent_leeks[:4]
+    fight_id = state.new_fight(FIGHT_TYPE_FARMER, list(state.farmer["leeks"].values()), opponents)
+    return (200, {"fight": fight_id}) if fight_id else (200, {"success": False, "error": "no_more_fights"})
+
+
+def composition_opponents(state, args, form):
+    return 200, {"opponents": [{"id": 800 + i, "name": f"OpponentTeam{i}", "level": 301, "talent": 1400 + 20 * i,
+                                "leeks": state.opponent_leeks[4 * i:4 * i + 4]} for i in range(5)]}
+
+
+def start_team_fight(state, args, form):
+    composition = next((c for c in state.compositions if str(c["id"]) == form.get("composition_id")), state.compositions[0])
+    fight_id = state.new_fight(FIGHT_TYPE_TEAM, composition["leeks"], state.opponent_leeks[:4])
+    return (200, {"fight": fight_id}) if fight_id else (200, {"success": False, "error": "no_more_fights"})
+
+
+def fight_get(state, args, form):
+    view = state.fight_view(int(args[0]))
+    return (200, view) if view else (404, {"success": False, "error": "fight_not_found"})
+
+
+def fight_get_logs(state, args, form):
+    return 200, state.fight_logs(int(args[0]))
+
+
+def fight_get_report(state, args, form):
+    view = state.fight_view(int(args[0]))
+    return (200, {"report": view, "logs": state.fight_logs(int(args[0]))}) if view else (404, {"success": False})
+
+
+def leek_history(state, args, form):
+    fights = [state.fight_view(fight_id) for fight_id in reversed(state.history.get(args[0], []))]
+    return 200, {"fights": [f for f in fights if f], "leek": state.farmer["leeks"].get(args[0])}
+
+
+def opponent_build(opponent):
+    """Deterministic build for a pool opponent so scouting has something to classify"""
+    i = opponent["id"] % 100
+    main_stat = ("strength", "magic", "agility", "science")[i % 4]
+    stats = {"strength": 100, "magic": 50, "agility": 50, "wisdom": 100 + 10 * i,
+             "resistance": 100 + 25 * (i % 5), "science": 50}
+    stats[main_stat] = 300 + 15 * i
+    return dict(opponent, life=2500 + 40 * i, tp=16 + i % 6, mp=5 + i % 3, frequency=100,
+                weapons=[{"template": 37}, {"template": 47}], chips=[{"template": 29}], **stats)
+
+
+def leek_get(state, args, form):
+    leek = state.farmer["leeks"].get(args[0])
+    if leek is None:
+        opponent = next((o for o in state.opponent_leeks if str(o["id"]) == args[0]), None)
+        if opponent:
+            return 200, {"leek": opponent_build(opponent)}
+        return 404, {"success": False, "error": "leek_not_found"}
+    cfg = state.leek_configs.get(leek["name"], {})
+    return 200, {"leek": dict(cfg, **leek, weapons=[{"template": w} for w in cfg.get("weapons", [])],
+                              chips=[{"template": c} for c in cfg.get("chips", [])])}
+
+
+def leek_set_ai(state, args, form):
+    leek = state.farmer["leeks"].get(form["leek_id"])
+    if leek is None:
+        return 200, {"success": False, "error": "leek_not_found"}
+    leek["ai"] = int(form["ai_id"])
+    return 200, {}
+
+
+def farmer_ais(state, args, form):
+    with state.lock:
+        return 200, {"folders": list(state.folders),
+                     "ais": [{k: v for k, v in ai.items() if k != "code"} for ai in state.ais.values()]}
+
+
+def folder_new(state, args, form):
+    with state.lock:
+        folder = {"id": next(state.object_ids), "name": form["name"], "folder": int(form.get("folder_id", 0))}
+        state.folders.append(folder)
+    return 200, {"id": folder["id"]}
+
+
+def ai_new(state, args, form):
+    with state.lock:
+        ai = {"id": next(state.object_ids), "name": form["name"], "folder": int(form.get("folder_id", 0)),
+              "version": int(form.get("version", 4)), "code": ""}
+        state.ais[ai["id"]] = ai
+    return 200, {"ai": {k: v for k, v in ai.items() if k != "code"}}
+
+
+def ai_save(state, args, form):
+    ai = state.find_ai(form.get("ai_id"))
+    if ai is None:
+        return 200, {"success": False, "error": "ai_not_found"}
+    ai["code"] = form.get("code", "")
+    return 200, {"result": [], "modified": int(time.time())}
+
+
+def ai_get(state, args, form):
+    ai = state.find_ai(args[0])
+    return (200, {"ai": ai}) if ai else (404, {"success": False, "error": "ai_not_found"})
+
+
+def ai_test_scenario(state, args, form):
+    leek = next(iter(state.farmer["leeks"].values()))
+    fight_id = state.new_fight(FIGHT_TYPE_SOLO, [leek], state.opponent_leeks[:1])
+    return (200, {"fight": fight_id}) if fight_id else (200, {"success": False, "error": "no_more_fights"})
+
+
+def scenarios_get_all(state, args, form):
+    return 200, {"scenarios": state.scenarios, "leeks": []}
+
+
+def scenario_new(state, args, form):
+    with state.lock:
+        scenario_id = next(state.object_ids)
+        state.scenarios[str(scenario_id)] = {"id": scenario_id, "name": form.get("name", ""), "team1": [], "team2": []}
+    return 200, {"id": scenario_id}
+
+
+def scenario_update(state, args, form):
+    return 200, {}
+
+
+def item_data(kind):
+    return lambda state, args, form: (200, {kind: state.market.get(kind, {})})
+
+
+def constants(state, args, form):
+    return 200, {"constants": []}
+
+
+ROUTES = {
+    "farmer/login-token": login,
+    "farmer/get": farmer_get,
+    "farmer/disconnect": disconnect,
+    "garden/get": garden_get,
+    "garden/get-leek-opponents": leek_opponents,
+    "garden/start-solo-fight": start_solo_fight,
+    "garden/get-farmer-opponents": farmer_opponents,
+    "garden/get-farmer-challenge": farmer_challenge,
+    "garden/start-farmer-fight": start_farmer_fight,
+    "garden/start-farmer-challenge": start_farmer_fight,
+    "garden/get-composition-opponents": composition_opponents,
+    "garden/start-team-fight": start_team_fight,
+    "fight/get": fight_get,
+    "fight/get-logs": fight_get_logs,
+    "fight/get-report": fight_get_report,
+    "history/get-leek-history": leek_history,
+    "leek/get": leek_get,
+    "leek/set-ai": leek_set_ai,
+    "ai/get-farmer-ais": farmer_ais,
+    "ai-folder/new-name": folder_new,
+    "ai/new-name": ai_new,
+    "ai/save": ai_save,
+    "ai/get": ai_get,
+    "ai/test-scenario": ai_test_scenario,
+    "test-scenario/get-all": scenarios_get_all,
+    "test-scenario/new": scenario_new,
+    "test-scenario/update": scenario_update,
+    "test-scenario/add-leek": scenario_update,
+    "weapon/get-all": item_data("weapons"),
+    "chip/get-all": item_data("chips"),
+    "constant/get-all": constants,
+}
+
+
+def start_server(host="127.0.0.1", port=8766, fight_delay=1.0, latency=0.0, jitter=0.0,
+                 error_rate=0.0, rate_limit=0.0, fights=1000, archive=None, generator_workers=0, seed=None):
+    """Start the mock API in a background thread and return (server, base_url)
+
+    port=0 picks a free port. Latency and jitter are in seconds.
+    """
+    MockAPIHandler.state = MockLeekWars(fight_delay, fights, seed, archive, generator_workers)
+    MockAPIHandler.latency = latency
+    MockAPIHandler.jitter = jitter
+    MockAPIHandler.error_rate = error_rate
+    MockAPIHandler.rate_limit = rate_limit
+    MockAPIHandler.buckets = {}
+    MockAPIHandler.stats = Counter()
+
+    server = ThreadingHTTPServer((host, port), MockAPIHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}/api"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local stand-in for the LeekWars HTTP API')
+    parser.add_argument('--host', default='127.0.0.1', help='Bind address (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8766, help='Port (default: 8766)')
+    parser.add_argument('--fight-delay', type=float, default=1.0,
+                        help='Seconds before a started fight is generated (default: 1.0)')
+    parser.add_argument('--latency', type=float, default=0, help='Added latency per request in ms (default: 0)')
+    parser.add_argument('--jitter', type=float, default=0, help='Random extra latency in ms (default: 0)')
+    parser.add_argument('--error-rate', type=float, default=0,
+                        help='Fraction of requests answered 429 at random (default: 0)')
+    parser.add_argument('--rate-limit', type=float, default=0,
+                        help='Requests per second per client before 429s (default: unlimited)')
+    parser.add_argument('--fights', type=int, default=1000, help='Available fights (default: 1000)')
+    parser.add_argument('--archive', default=None, help='Fight archive to serve canned payloads from')
+    parser.add_argument('--generator', type=int, default=0, metavar='WORKERS',
+                        help='Generate solo fights with the local generator using N workers')
+    parser.add_argument('--seed', type=int, default=None, help='Seed for opponents and outcomes')
+    parser.add_argument('--verbose', action='store_true', help='Log every request')
+    args = parser.parse_args()
+
+    MockAPIHandler.verbose = args.verbose
+    server, base_url = start_server(args.host, args.port, args.fight_delay, args.latency / 1000.0,
+                                    args.jitter / 1000.0, args.error_rate, args.rate_limit, args.fights,
+                                    args.archive, args.generator, args.seed)
+    print(f"🧪 Mock LeekWars API on {base_url}")
+    print(f"   export LEEKWARS_API_URL={base_url}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("\n⚠️ Stopping mock server")
+    finally:
+        server.shutdown()
+        stats = MockAPIHandler.stats
+        print(f"📊 {stats['total']} requests, {stats['429']} throttled, {stats['404']} not mocked")
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
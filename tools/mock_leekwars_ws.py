@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Mock LeekWars WebSocket - Local stand-in for wss://leekwars.com/ws
+
+Speaks just enough RFC 6455 (stdlib only) to exercise lw_websocket and the
+boss squad flow without touching the real server:
+- [FIGHT_LISTEN, id]            -> [FIGHT_GENERATED, id] after --fight-delay
+- [GARDEN_BOSS_LISTEN]          -> [GARDEN_BOSS_SQUADS, {}]
+- [GARDEN_BOSS_CREATE_SQUAD...] -> [GARDEN_BOSS_SQUAD_JOINED, squad]
+- [GARDEN_BOSS_ATTACK]          -> [GARDEN_BOSS_STARTED, fight_id]
+- [GARDEN_BOSS_LEAVE_SQUAD]     -> [GARDEN_BOSS_LEFT]
+
+Usage: python3 mock_leekwars_ws.py [--port 8765] [--fight-delay 1.5]
+Then point a client at ws://127.0.0.1:8765, e.g.
+    LeekWarsSocket(session, url="ws://127.0.0.1:8765")
+"""
+
+import argparse
+import base64
+import hashlib
+import itertools
+import json
+import socketserver
+import struct
+import threading
+import time
+
+from lw_websocket import SocketMessage
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+class MockSocketHandler(socketserver.StreamRequestHandler):
+    fight_delay = 1.5
+    fight_counter = itertools.count(90000000)
+    squad_counter = itertools.count(1)
+
+    def handshake(self):
+        """Answer the HTTP upgrade request"""
+        headers = {}
+        request_line = self.rfile.readline()
+        if not request_line:
+            return False
+        while True:
+            line = self.rfile.readline().decode('latin-1').strip()
+            if not line:
+                break
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        key = headers.get('sec-websocket-key')
+        if not key:
+            return False
+        accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+        self.wfile.write((
+            "HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n\r\n"
+        ).encode())
+        return True
+
+    def read_frame(self):
+        """Read one client frame; returns (opcode, payload) or (None, None)"""
+        header = self.rfile.read(2)
+        if len(header) < 2:
+            return None, None
+        opcode = header[0] & 0x0F
+        masked = header[1] & 0x80
+        length = header[1] & 0x7F
+        if length == 126:
+            length = struct.unpack(">H", self.rfile.read(2))[0]
+        elif length == 127:
+            length = struct.unpack(">Q", self.rfile.read(8))[0]
+        mask = self.rfile.read(4) if masked else b"\x00" * 4
+        payload = bytearray(self.rfile.read(length))
+        for i in range(len(payload)):
+            payload[i] ^= mask[i % 4]
+        return opcode, bytes(payload)
+
+    def send_frame(self, payload, opcode=0x1):
+        """Send one unmasked server frame"""
+        header = bytes([0x80 | opcode])
+        length = len(payload)
+        if length < 126:
+            header += bytes([length])
+        elif length < 65536:
+            header += bytes([126]) + struct.pack(">H", length)
+        else:
+            header += bytes([127]) + struct.pack(">Q", length)
+        with self.send_lock:
+            self.wfile.write(header + payload)
+            self.wfile.flush()
+
+    def send_json(self, message):
+        try:
+            self.send_frame(json.dumps(message).encode())
+        except OSError:
+            pass
+
+    def send_later(self, delay, message):
+        timer = threading.Timer(delay, self.send_json, args=(message,))
+        timer.daemon = True
+        timer.start()
+
+    def on_message(self, data):
+        """Reply to one client message like the real server would"""
+        message_type = data[0]
+
+        if message_type == SocketMessage['FIGHT_LISTEN'] and len(data) > 1:
+            self.send_later(self.fight_delay, [SocketMessage['FIGHT_GENERATED'], data[1]])
+
+        elif message_type == SocketMessage['GARDEN_BOSS_LISTEN']:
+            self.send_json([SocketMessage['GARDEN_BOSS_SQUADS'], {}])
+
+        elif message_type == SocketMessage['GARDEN_BOSS_CREATE_SQUAD']:
+            self.squad = {
+                'id': f"mock-{next(self.squad_counter)}",
+                'boss': data[1] if len(data) > 1 else 1,
+                'locked': data[2] if len(data) > 2 else False,
+                'leeks': data[3] if len(data) > 3 else []
+            }
+            self.send_json([SocketMessage['GARDEN_BOSS_SQUAD_JOINED'], self.squad])
+
+        elif message_type == SocketMessage['GARDEN_BOSS_ADD_LEEK'] and self.squad:
+            self.squad['leeks'].append(data[1])
+            self.send_json([SocketMessage['GARDEN_BOSS_SQUAD'], self.squad])
+
+        elif message_type == SocketMessage['GARDEN_BOSS_ATTACK']:
+            if self.squad:
+                self.send_later(0.2, [SocketMessage['GARDEN_BOSS_STARTED'], next(self.fight_counter)])
+            else:
+                self.send_json([SocketMessage['GARDEN_BOSS_NO_SUCH_SQUAD']])
+
+        elif message_type == SocketMessage['GARDEN_BOSS_LEAVE_SQUAD']:
+            self.squad = None
+            self.send_json([SocketMessage['GARDEN_BOSS_LEFT']])
+
+    def handle(self):
+        self.send_lock = threading.Lock()
+        self.squad = None
+        if not self.handshake():
+            return
+        print(f"🔌 Client connected: {self.client_address[0]}:{self.client_address[1]}")
+
+        while True:
+            opcode, payload = self.read_frame()
+            if opcode is None or opcode == 0x8:
+                break
+            if opcode == 0x9:
+                self.send_frame(payload, opcode=0xA)
+                continue
+            if opcode != 0x1:
+                continue
+            try:
+                data = json.loads(payload.decode())
+            except (UnicodeDecodeError, json.JSONDecodeError):
+                continue
+            if isinstance(data, list) and data:
+                self.on_message(data)
+
+        print(f"👋 Client disconnected: {self.client_address[0]}:{self.client_address[1]}")
+
+
+class MockSocketServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+def start_server(host="127.0.0.1", port=8765, fight_delay=1.5):
+    """Start the mock server in a background thread and return it"""
+    MockSocketHandler.fight_delay = fight_delay
+    server = MockSocketServer((host, port), MockSocketHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local stand-in for the LeekWars WebSocket')
+    parser.add_argument('--host', default='127.0.0.1', help='Bind address (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8765, help='Port (default: 8765)')
+    parser.add_argument('--fight-delay', type=float, default=1.5,
+                        help='Seconds before FIGHT_GENERATED is pushed (default: 1.5)')
+    args = parser.parse_args()
+
+    server = start_server(args.host, args.port, args.fight_delay)
+    print(f"🧪 Mock LeekWars WebSocket on ws://{args.host}:{args.port}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("\n⚠️ Stopping mock server")
+    finally:
+        server.shutdown()
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Opponent Model - Win probability for opponent selection, learned from fight history
+
+A small logistic regression (pure Python, no numpy) over:
+  - level difference between the opponent and our leek
+  - our record against the opponent (decayed Beta posterior, see fight_db)
+  - the opponent's scouted build type and threat (opponent_scout.py)
+
+Training is online SGD over fight_history in recording order (recorded_seq);
+the weights and the last trained fight are stored in the fight DB
+(opponent_model table), so each update only learns from fights recorded
+since the previous one. Scoring a candidate is a dot product of a dozen
+features, cheap enough to run for every opponent in every opponent list.
+Used by the `predicted` strategy.
+
+The level difference uses our leek's current level (fight_history does not
+store the level we had at the time). A training fight's record feature is
+replayed from the fights against that opponent before it, as the strategy
+would have seen it, so neither its own result nor later ones leak in.
+
+Usage:
+    python3 opponent_model.py            # train on new fights, show weights
+    python3 opponent_model.py --full     # retrain from scratch with a holdout report
+"""
+
+import argparse
+import json
+import math
+import random
+import sys
+import time
+
+from fight_db import FightDatabase, add_evidence, posterior, to_epoch
+
+MODEL_NAME = "opponent_selection"
+MIN_SAMPLES = 50          # The strategy falls back to `smart` below this
+LEARNING_RATE = 0.05
+L2 = 1e-4
+LABELS = {'WIN': 1.0, 'DRAW': 0.5, 'LOSS': 0.0}
+
+
+def sigmoid(z):
+    if z < -30:
+        return 0.0
+    if z > 30:
+        return 1.0
+    return 1.0 / (1.0 + math.exp(-z))
+
+
+def features(opponent_level, leek_level, expected_win_rate, evidence, build):
+    """Sparse feature dict for one (our leek, opponent) pairing"""
+    x = {'bias': 1.0}
+    if opponent_level is not None and leek_level:
+        x['level_diff'] = max(-3.0, min(3.0, (opponent_level - leek_level) / 10))
+    # Our record: log-odds of the posterior mean, weighted by how much evidence backs it
+    expected_win_rate = min(max(expected_win_rate, 0.01), 0.99)
+    x['record'] = math.log(expected_win_rate / (1 - expected_win_rate))
+    x['evidence'] = min(evidence, 20.0) / 10
+    if build:
+        x['scouted'] = 1.0
+        x['threat'] = (build.get('threat') or 0) / 1000
+        x[f"build:{build.get('build_type')}"] = 1.0
+    return x
+
+
+def candidate_features(opponent, stats, leek_level):
+    """Features for an opponent list entry (stats from classify_opponents, build attached)"""
+    if stats:
+        expected, evidence = stats['expected_win_rate'], stats['evidence']
+    else:
+        expected, evidence = posterior(None, None, None)
+    return features(opponent.get('level'), leek_level, expected, evidence, opponent.get('build'))
+
+
+class OpponentModel:
+    def __init__(self, weights=None, trained_seq=0, samples=0):
+        self.weights = dict(weights or {})
+        self.trained_seq = trained_seq
+        self.samples = samples
+
+    def predict(self, x):
+        """Probability of winning for a feature dict"""
+        return sigmoid(sum(self.weights.get(name, 0.0) * value for name, value in x.items()))
+
+    def train(self, samples, epochs=1, learning_rate=LEARNING_RATE, shuffle=True):
+        """SGD on [(features, label)]; returns the mean log loss of the last epoch"""
+        samples = list(samples)
+        loss = 0.0
+        for _ in range(epochs):
+            if shuffle:
+                random.shuffle(samples)
+            loss = 0.0
+            for x, y in samples:
+                p = self.predict(x)
+                loss -= y * math.log(max(p, 1e-9)) + (1 - y) * math.log(max(1 - p, 1e-9))
+                gradient = p - y
+                for name, value in x.items():
+                    w = self.weights.get(name, 0.0)
+                    self.weights[name] = w - learning_rate * (gradient * value + L2 * w)
+        return loss / len(samples) if samples else 0.0
+
+    def rank(self, opponents, classified, leek_level):
+        """Attach predicted_win_rate to each opponent and return them best first"""
+        for opp in opponents:
+            opp['predicted_win_rate'] = self.predict(candidate_features(opp, classified.get(opp['id']), leek_level))
+        return sorted(opponents, key=lambda opp: opp['predicted_win_rate'], reverse=True)
+
+    @classmethod
+    def load(cls, db, name=MODEL_NAME):
+        state = db.load_model_state(name)
+        if not state:
+            return cls()
+        return cls(json.loads(state['weights']), state['trained_seq'], state['samples'])
+
+    def save(self, db, name=MODEL_NAME):
+        db.save_model_state(name, json.dumps(self.weights), self.trained_seq, self.samples)
+
+
+def training_samples(db, after_seq=0):
+    """[(recorded_seq, features, label)] for fights recorded after after_seq, in recording order
+
+    Each fight's record feature is the decayed posterior of the same leek's
+    earlier fights against that opponent, as of the fight: the history of
+    every (leek, opponent) pair with a new fight is replayed in time order.
+    """
+    db.cursor.execute('''
+        SELECT h.leek_id, h.opponent_id, h.recorded_seq, h.opponent_level, h.result, h.timestamp,
+               l.leek_level, b.build_type, b.threat
+        FROM fight_history h
+        LEFT JOIN leek_info l ON l.leek_id = h.leek_id
+        LEFT JOIN opponent_builds b ON b.opponent_id = h.opponent_id
+        WHERE (h.leek_id, h.opponent_id) IN (
+            SELECT leek_id, opponent_id FROM fight_history WHERE recorded_seq > ?
+        )
+        ORDER BY h.leek_id, h.opponent_id, h.timestamp
+    ''', (after_seq,))
+
+    samples = []
+    pair, evidence, pending = None, None, []
+
+    def flush():
+        # Fights at the same time do not see each other's results
+        nonlocal evidence
+        for row, fought_at in pending:
+            evidence = add_evidence(*evidence, row['result'], fought_at)
+        pending.clear()
+
+    for row in db.cursor.fetchall():
+        fought_at = to_epoch(row['timestamp'])
+        if (row['leek_id'], row['opponent_id']) != pair:
+            pair, evidence, pending = (row['leek_id'], row['opponent_id']), (0.0, 0.0, None), []
+        elif pending and fought_at != pending[0][1]:
+            flush()
+        if row['recorded_seq'] > after_seq and row['result'] in LABELS:
+            expected, count = posterior(*evidence, now=fought_at)
+            build = {'build_type': row['build_type'], 'threat': row['threat']} if row['build_type'] else None
+            x = features(row['opponent_level'], row['leek_level'], expected, count, build)
+            samples.append((row['recorded_seq'], x, LABELS[row['result']]))
+        pending.append((row, fought_at))
+    samples.sort(key=lambda sample: sample[0])
+    return samples
+
+
+def update_model(db, full=False, epochs=None):
+    """Train on fights recorded since the last update (all of them if full); returns (model, new samples)"""
+    model = OpponentModel() if full else OpponentModel.load(db)
+    samples = training_samples(db, model.trained_seq)
+    if samples:
+        model.train([(x, y) for _, x, y in samples], epochs or (10 if full else 3))
+        model.trained_seq = samples[-1][0]
+        model.samples += len(samples)
+        model.save(db)
+    return model, len(samples)
+
+
+def evaluate(model, samples):
+    """(log loss, accuracy) on [(features, label)] for decided fights"""
+    loss, correct, decided = 0.0, 0, 0
+    for x, y in samples:
+        p = model.predict(x)
+        loss -= y * math.log(max(p, 1e-9)) + (1 - y) * math.log(max(1 - p, 1e-9))
+        if y != 0.5:
+            decided += 1
+            correct += (p >= 0.5) == (y == 1.0)
+    return loss / max(len(samples), 1), correct / max(decided, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Train the opponent selection model from fight history')
+    parser.add_argument('--full', action='store_true', help='Retrain from scratch and report holdout accuracy')
+    args = parser.parse_args()
+
+    db = FightDatabase()
+    start = time.time()
+    if args.full:
+        # Chronological 80/20 split: how well does history predict later fights?
+        samples = [(x, y) for _, x, y in training_samples(db)]
+        split = int(len(samples) * 0.8)
+        if split >= MIN_SAMPLES:
+            holdout_model = OpponentModel()
+            holdout_model.train(samples[:split], epochs=10)
+            loss, accuracy = evaluate(holdout_model, samples[split:])
+            base_rate = sum(y for _, y in samples[:split]) / split
+            baseline, _ = evaluate(OpponentModel({'bias': math.log(base_rate / (1 - base_rate))}
+                                                 if 0 < base_rate < 1 else {}), samples[split:])
+            print(f"📊 Holdout ({len(samples) - split} fights): log loss {loss:.3f} "
+                  f"(base rate {baseline:.3f}), accuracy {accuracy:.1%}")
+    model, added = update_model(db, full=args.full)
+    db.close()
+
+    print(f"🧠 Trained on {added} new fights ({model.samples} total) in {time.time() - start:.1f}s")
+    if model.samples < MIN_SAMPLES:
+        print(f"   ⚠️ Fewer than {MIN_SAMPLES} fights: the predicted strategy falls back to smart")
+    for name, weight in sorted(model.weights.items(), key=lambda item: -abs(item[1])):
+        print(f"   {name:<25} {weight:+.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
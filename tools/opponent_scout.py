@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Opponent Scout - Background fetch and cache of opponent builds
+
+Opponent lists only carry name and level. The scout fetches each opponent's
+leek details (stats, weapons, chips) on a small thread pool and stores them
+in the fight DB (opponent_builds table, shared by all our leeks) so
+get_preferred_opponents can rank opponents by build before we ever fight them.
+
+scout() only queues work and returns immediately, and a single writer thread
+stores finished builds in batches, so the fight-start loop never waits on
+scouting. On a RateLimitedSession the fetches are background requests that
+only spend idle budget. Builds are refreshed once they are older than the TTL.
+
+Build types mirror detectEnemyBuildType() in V8_modules/enemy_intelligence.lk.
+
+Usage:
+    from opponent_scout import OpponentScout
+
+    scout = OpponentScout(session)
+    scout.scout(opponents)          # non-blocking
+    ...
+    scout.close()
+
+    python3 opponent_scout.py              # show scouted builds
+"""
+
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config_loader import get_api_url
+from fight_db import FightDatabase
+from rate_limiter import RateLimitedSession
+
+BASE_URL = get_api_url()
+DEFAULT_TTL = 24 * 3600  # Builds change slowly (level ups, new items)
+
+
+def detect_build_type(strength, magic, agility, science, resistance):
+    """Same classification as detectEnemyBuildType() in enemy_intelligence.lk"""
+    if resistance >= 300 and science >= 300:
+        return 'tank_sci'
+    if strength > 400 and agility > 400:
+        return 'bruiser_reflect'
+    if strength >= magic and strength >= agility and science >= 200:
+        return 'strength_science'
+    if magic > strength + 100:
+        return 'magic'
+    if abs(strength - magic) < 100 and magic >= 100 and strength >= 100:
+        return 'hybrid'
+    if agility >= strength and agility >= magic:
+        return 'agility'
+    if magic >= strength:
+        return 'magic'
+    return 'strength'
+
+
+def item_ids(items):
+    """Item IDs from an API weapon/chip list ([{'template': id}, ...] or plain IDs)"""
+    return [item['template'] if isinstance(item, dict) else item for item in items or []]
+
+
+def parse_build(leek, opponent=None):
+    """Build row for the opponent_builds table from /leek/get data"""
+    opponent = opponent or {}
+
+    def stat(name, default=0):
+        return leek.get(f"total_{name}", leek.get(name, default)) or 0
+
+    strength, magic, agility = stat('strength'), stat('magic'), stat('agility')
+    wisdom, resistance, science = stat('wisdom'), stat('resistance'), stat('science')
+    life = stat('life')
+
+    return {
+        'opponent_id': leek.get('id', opponent.get('id')),
+        'opponent_name': leek.get('name', opponent.get('name')),
+        'opponent_level': leek.get('level', opponent.get('level')),
+        'life': life,
+        'tp': stat('tp'),
+        'mp': stat('mp'),
+        'strength': strength,
+        'agility': agility,
+        'wisdom': wisdom,
+        'resistance': resistance,
+        'science': science,
+        'magic': magic,
+        'frequency': stat('frequency'),
+        'weapons': item_ids(leek.get('weapons')),
+        'chips': item_ids(leek.get('chips')),
+        'build_type': detect_build_type(strength, magic, agility, science, resistance),
+        # Rough threat estimate: main damage stat plus survivability
+        'threat': max(strength, magic, agility) + resistance + wisdom // 2 + life // 10,
+        'fetched_at': time.time(),
+    }
+
+
+class OpponentScout:
+    def __init__(self, session, db_dir=None, ttl=DEFAULT_TTL, max_workers=2):
+        """Scout storing into the fight DB; fetches go through the given session"""
+        self.session = session
+        self.db_dir = db_dir
+        self.ttl = ttl
+        self.background = isinstance(session, RateLimitedSession)
+
+        db = FightDatabase(None, db_dir)
+        self.scouted = db.get_scouted_times()
+        db.close()
+
+        self.lock = threading.Lock()
+        self.pending = set()
+        self.fetched = 0
+        self.failed = 0
+
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.queue = queue.Queue()
+        self.writer = threading.Thread(target=self._writer, daemon=True)
+        self.writer.start()
+
+    def scout(self, opponents):
+        """Queue fetches for opponents without a fresh build; returns how many were queued"""
+        now = time.time()
+        with self.lock:
+            stale = [opp for opp in opponents
+                     if opp['id'] not in self.pending and now - self.scouted.get(opp['id'], 0) >= self.ttl]
+            self.pending.update(opp['id'] for opp in stale)
+
+        for opp in stale:
+            self.executor.submit(self._fetch, opp)
+        return len(stale)
+
+    def _fetch(self, opponent):
+        """Download one opponent's details and hand the build to the writer"""
+        build = None
+        try:
+            url = f"{BASE_URL}/leek/get/{opponent['id']}"
+            if self.background:
+                response = self.session.get(url, background=True)
+            else:
+                response = self.session.get(url)
+            if response.status_code == 200:
+                data = response.json()
+                build = parse_build(data.get('leek', data), opponent)
+                self.queue.put(build)
+        except Exception:
+            pass
+        finally:
+            with self.lock:
+                self.pending.discard(opponent['id'])
+                if build:
+                    self.fetched += 1
+                    self.scouted[opponent['id']] = build['fetched_at']
+                else:
+                    self.failed += 1
+
+    def _writer(self):
+        """Single writer thread: stores queued builds in batches"""
+        db = FightDatabase(None, self.db_dir)
+        try:
+            done = False
+            while not done:
+                item = self.queue.get()
+                if item is None:
+                    break
+                batch = [item]
+                # Drain whatever else arrived meanwhile into the same transaction
+                while True:
+                    try:
+                        item = self.queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        done = True
+                        break
+                    batch.append(item)
+                try:
+                    db.save_opponent_builds(batch)
+                except Exception as e:
+                    print(f"   ⚠️ Failed to store {len(batch)} scouted builds: {e}")
+        finally:
+            db.close()
+
+    def close(self, wait=False):
+        """Stop scouting and store what was fetched
+
+        Queued fetches are dropped unless wait=True (they are picked up again
+        by the next session's scout); fetches already running always finish.
+        """
+        self.executor.shutdown(wait=True, cancel_futures=not wait)
+        self.queue.put(None)
+        self.writer.join()
+
+    def summary(self):
+        return f"{self.fetched} builds scouted, {self.failed} failed, {len(self.scouted)} known"
+
+
+def main():
+    db = FightDatabase()
+    builds = db.get_opponent_builds(db.get_scouted_times())
+    db.close()
+
+    print(f"🔍 {len(builds)} scouted opponents\n")
+    print(f"{'Opponent':<25} {'Lvl':>4} {'Build':<17} {'Threat':>6} {'HP':>6} {'STR':>5} {'MAG':>5} {'AGI':>5} {'RES':>5}")
+    print("-" * 90)
+    for build in sorted(builds.values(), key=lambda b: b['threat'] or 0):
+        print(f"{(build['opponent_name'] or '?'):<25} {build['opponent_level'] or 0:>4} {build['build_type']:<17} "
+              f"{build['threat']:>6} {build['life']:>6} {build['strength']:>5} {build['magic']:>5} "
+              f"{build['agility']:>5} {build['resistance']:>5}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
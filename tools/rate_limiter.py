@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Rate Limiter - Shared request budget for LeekWars API clients
+
+A token bucket shared by every thread of a session, plus a requests.Session
+subclass that draws a token before each request and backs the whole bucket
+off when the server answers 429.
+
+Usage:
+    from rate_limiter import RateLimiter, RateLimitedSession
+
+    limiter = RateLimiter(rate=4.0, burst=4)
+    session = RateLimitedSession(limiter)
+    fighter.session = session  # every existing call now respects the budget
+"""
+
+import threading
+import time
+
+import requests
+
+
+class RateLimiter:
+    def __init__(self, rate=4.0, burst=None):
+        """Allow `rate` requests per second on average, `burst` at once"""
+        self.rate = float(rate)
+        self.capacity = float(burst if burst is not None else max(1.0, rate))
+        self.tokens = self.capacity
+        self.last_refill = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+        # Counters for progress/summary output
+        self.requests = 0
+        self.throttled = 0
+
+    def _refill(self, now):
+        """Add the tokens earned since the last refill"""
+        elapsed = now - self.last_refill
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.last_refill = now
+
+    def acquire(self, background=False):
+        """Block until a request may be sent
+
+        Background requests only take a token while the bucket is at least
+        half full, so they use idle budget and never delay foreground callers
+        for long.
+        """
+        needed = max(1.0, self.capacity / 2) if background else 1.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now >= self.blocked_until:
+                    self._refill(now)
+                    if self.tokens >= needed:
+                        self.tokens -= 1.0
+                        self.requests += 1
+                        return
+                    wait = (needed - self.tokens) / self.rate
+                else:
+                    wait = self.blocked_until - now
+            time.sleep(wait)
+
+    def backoff(self, seconds):
+        """Pause every caller after a 429 and drain the bucket"""
+        with self.lock:
+            self.throttled += 1
+            self.tokens = 0.0
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+            self.last_refill = self.blocked_until
+
+
+class RateLimitedSession(requests.Session):
+    def __init__(self, limiter, max_retries=5, backoff_seconds=2.0):
+        """Session that spends one limiter token per HTTP request"""
+        super().__init__()
+        self.limiter = limiter
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+
+    def request(self, method, url, *args, background=False, **kwargs):
+        """Send the request within the shared budget, retrying on 429
+
+        background=True marks low-priority traffic (see RateLimiter.acquire).
+        """
+        delay = self.backoff_seconds
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire(background)
+            response = super().request(method, url, *args, **kwargs)
+            if response.status_code != 429 or attempt == self.max_retries:
+                return response
+
+            retry_after = response.headers.get("Retry-After")
+            try:
+                wait = float(retry_after) if retry_after else delay
+            except ValueError:
+                wait = delay
+            self.limiter.backoff(wait)
+            delay = min(delay * 2, 30.0)
+        return response
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+LeekWars Fight Log Sync
+Lists each leek's fight history from the API, compares it with the local
+fight archive (and optionally the fight database), and downloads only what
+is missing. Progress is checkpointed per leek, with separate cursors for
+the archive and the database, so an interrupted sync resumes where it
+stopped and a later --db run still records fights an archive-only run fetched.
+
+Usage: python3 sync_fight_logs.py [--leeks 1 2] [--db] [--account <name>]
+Examples:
+  python3 sync_fight_logs.py                 # archive every leek's missing fights
+  python3 sync_fight_logs.py --db            # also record missing solo fights in the fight database
+  python3 sync_fight_logs.py --leeks KurtGodel --full
+"""
+
+import argparse
+import json
+import os
+from datetime import datetime
+
+from config_loader import load_credentials
+from fight_archive import FightArchive, DEFAULT_ROOT
+from fight_db import FightDatabase
+from fight_harvester import FightHarvester, fight_payload
+from lw_solo_fights_db import LeekWarsSmartFighterDB, BASE_URL
+from rate_limiter import RateLimiter, RateLimitedSession
+
+STATE_FILE = "sync_state.json"
+SOLO_FIGHT_TYPE = 0
+
+
+class FightLogSync(LeekWarsSmartFighterDB):
+    def __init__(self, archive_root=DEFAULT_ROOT, rate=4.0, workers=4, db_dir=None):
+        """Sync client sharing one rate-limited session with its download pool"""
+        super().__init__()
+        self.session = RateLimitedSession(RateLimiter(rate))
+        self.archive = FightArchive(archive_root)
+        self.workers = workers
+        self.db_dir = db_dir
+        self.state_path = os.path.join(archive_root, STATE_FILE)
+        self.state = self.load_state()
+
+    def load_state(self):
+        """Per-leek cursors: every fight id <= cursor is known to be synced"""
+        if os.path.exists(self.state_path):
+            try:
+                with open(self.state_path, "r") as f:
+                    return json.load(f)
+            except (OSError, json.JSONDecodeError):
+                print(f"   ⚠️ Ignoring unreadable {self.state_path}")
+        return {}
+
+    def save_state(self):
+        """Write the checkpoint atomically"""
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def get_leek_history(self, leek_id):
+        """Fights listed in the leek's history (most recent first from the API)"""
+        url = f"{BASE_URL}/history/get-leek-history/{leek_id}"
+        response = self.session.get(url)
+        if response.status_code != 200:
+            print(f"   ❌ HTTP Error fetching history: {response.status_code}")
+            return []
+        try:
+            data = response.json()
+        except json.JSONDecodeError:
+            print("   ❌ Invalid JSON in history response")
+            return []
+        return [fight for fight in data.get("fights", []) if isinstance(fight, dict) and "id" in fight]
+
+    def fight_record(self, fight_id, data, leek_name):
+        """Turn archived fight data into a fight_history row for our leek (solo fights only)"""
+        fight = fight_payload(data)
+        if fight.get("type", SOLO_FIGHT_TYPE) != SOLO_FIGHT_TYPE:
+            return None
+        fight_log = self.parse_fight_data(fight_id, fight)
+        if not fight_log:
+            return None
+        result = self.determine_result(fight_log, leek_name)
+        if result == "UNKNOWN":
+            return None
+
+        ours = next(leek for leek in fight_log["leeks"] if leek.get("name") == leek_name)
+        opponent = next((leek for leek in fight_log["leeks"] if leek.get("team") != ours.get("team")), None)
+        if not opponent:
+            return None
+
+        date = fight_log.get("date")
+        return {
+            'fight_id': fight_id,
+            'opponent_id': opponent.get("id"),
+            'opponent_name': opponent.get("name", "Unknown"),
+            'opponent_level': opponent.get("level", 0),
+            'result': result,
+            'duration': fight_log.get("duration"),
+            'actions_count': fight_log.get("actions_count", 0),
+            'fight_url': f"https://leekwars.com/fight/{fight_id}",
+            'summary': fight_log.get("summary"),
+            'turns': fight_log.get("turns"),
+            'timestamp': datetime.fromtimestamp(date) if isinstance(date, (int, float)) else None
+        }
+
+    def sync_leek(self, leek, use_db=False, full=False):
+        """Download the leek's missing fights and advance its cursor"""
+        leek_id = int(leek['id'])
+        leek_name = leek.get('name', 'Unknown')
+        group = str(leek_id)
+        leek_state = self.state.setdefault(str(leek_id), {"synced": 0})
+        archive_cursor = 0 if full else leek_state.get("archive_cursor", 0)
+        db_cursor = 0 if full else leek_state.get("db_cursor", 0)
+
+        print(f"\n🥬 {leek_name} (ID: {leek_id})")
+        history = self.get_leek_history(leek_id)
+        fight_ids = sorted(int(fight["id"]) for fight in history)
+        archive_candidates = [fid for fid in fight_ids if fid > archive_cursor]
+        db_candidates = [fid for fid in fight_ids if fid > db_cursor] if use_db else []
+        print(f"   History: {len(history)} fights, {len(archive_candidates)} newer than archive checkpoint "
+              f"{archive_cursor}" + (f", {len(db_candidates)} newer than database checkpoint {db_cursor}" if use_db else ""))
+
+        db = FightDatabase(leek_id, self.db_dir) if use_db else None
+        try:
+            if db:
+                db.update_leek_info(leek_name, leek.get('level', 1))
+
+            to_record = [fid for fid in db_candidates if not db.has_fight(fid)]
+            # Fights to record must be archived first
+            to_download = sorted(fid for fid in set(archive_candidates) | set(to_record)
+                                 if not self.archive.has(fid, "data"))
+            print(f"   Missing: {len(to_download)} in archive" + (f", {len(to_record)} in database" if db else ""))
+
+            failed = set()
+            if to_download:
+                harvester = FightHarvester(self.session, max_workers=self.workers, max_wait=5.0, archive=self.archive)
+                for fight_id in to_download:
+                    harvester.submit(fight_id, group)
+                try:
+                    harvester.wait_all()
+                finally:
+                    harvester.shutdown()
+                failed = set(harvester.failed)
+                print(f"   📥 Downloaded: {harvester.successful}/{len(to_download)}")
+                if failed:
+                    print(f"   ❌ Failed: {len(failed)} fights (retried next run)")
+
+            records = []
+            unrecorded = set()
+            for fight_id in to_record:
+                data = self.archive.get(fight_id, "data")
+                if data is None:
+                    unrecorded.add(fight_id)
+                    continue
+                record = self.fight_record(fight_id, data, leek_name)
+                if record:  # None for fights that are not ours to record (team fights...)
+                    records.append(record)
+            # One transaction for the whole leek
+            recorded = db.record_fights(records) if records else 0
+            if db:
+                print(f"   💾 Recorded: {recorded} solo fights")
+        finally:
+            if db:
+                db.close()
+
+        # Advance each cursor up to (not past) the first fight its sink is missing
+        leek_state["archive_cursor"] = max(leek_state.get("archive_cursor", 0),
+                                           advance_cursor(archive_cursor, archive_candidates, failed))
+        if use_db:
+            leek_state["db_cursor"] = max(leek_state.get("db_cursor", 0),
+                                          advance_cursor(db_cursor, db_candidates, unrecorded))
+        leek_state["synced"] = leek_state.get("synced", 0) + len(to_download) - len(failed)
+        leek_state["last_sync"] = datetime.now().isoformat(timespec='seconds')
+        self.save_state()
+
+
+def advance_cursor(cursor, candidates, missing):
+    """Highest candidate id before the first missing one (candidates sorted)"""
+    for fight_id in candidates:
+        if fight_id in missing:
+            break
+        cursor = fight_id
+    return cursor
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Download fights missing from the local archive')
+    parser.add_argument('--leeks', nargs='+', default=None,
+                        help='Leek numbers or names to sync (default: all leeks)')
+    parser.add_argument('--db', action='store_true',
+                        help='Also record missing solo fights in the fight database')
+    parser.add_argument('--db-dir', default=None,
+                        help='Directory of fight_history.db (default: configured fight_db path)')
+    parser.add_argument('--archive', default=DEFAULT_ROOT, help=f'Archive directory (default: {DEFAULT_ROOT})')
+    parser.add_argument('--full', action='store_true', help='Ignore checkpoints and re-check the whole history')
+    parser.add_argument('--rate', type=float, default=4.0,
+                        help='Request budget in requests per second (default: 4)')
+    parser.add_argument('--workers', type=int, default=4, help='Concurrent downloads (default: 4)')
+    parser.add_argument('--account', default='main', help='Account to use (default: main)')
+
+    args = parser.parse_args()
+
+    print("="*60)
+    print("LEEKWARS FIGHT LOG SYNC")
+    print("="*60)
+
+    syncer = FightLogSync(args.archive, rate=args.rate, workers=args.workers, db_dir=args.db_dir)
+
+    email, password = load_credentials(account=args.account)
+    if not syncer.login(email, password):
+        print("\n❌ Failed to login. Please check your credentials.")
+        return 1
+
+    try:
+        leek_list = list(syncer.leeks.values())
+        if args.leeks:
+            selected = []
+            for selector in args.leeks:
+                if selector.isdigit() and 1 <= int(selector) <= len(leek_list):
+                    selected.append(leek_list[int(selector) - 1])
+                else:
+                    selected.extend(l for l in leek_list if l.get('name') == selector)
+            leek_list = selected
+
+        for leek in leek_list:
+            syncer.sync_leek(leek, use_db=args.db, full=args.full)
+
+        print(f"\n✅ Sync complete - archive: {syncer.archive.stats()['fights']} fights")
+
+    except KeyboardInterrupt:
+        print("\n\n⚠️ Interrupted - archived fights are kept, re-run to resume")
+
+    finally:
+        syncer.disconnect()
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
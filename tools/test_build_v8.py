@@ -0,0 +1,75 @@
+"""Tests for the V8 build's weight-profile folding pass"""
+
+import pytest
+
+from build_v8 import (BOSS_PROFILES, ENTRY, WEIGHTS_MODULE, fold_weight_profiles, load_modules,
+                      parse_weight_profiles, render, tokenize)
+
+WEIGHTS = """
+global STRENGTH_WEIGHTS = ['damage': 2, 'heal': 1, 'shield': 4]
+global MAGIC_WEIGHTS = ['damage': 3, 'heal': 1, 'poison': -0.5]
+global BOSS_PUZZLE_WEIGHTS = ['heal': 1]
+global BOSS_COMBAT_WEIGHTS = ['heal': 1, 'unset': null]
+function getWeightsForBuild(build) {
+    if (build == 'magic') return MAGIC_WEIGHTS
+    return STRENGTH_WEIGHTS
+}
+"""
+
+MAIN = """
+include('weight_profiles')
+var boss = [BOSS_PUZZLE_WEIGHTS, BOSS_COMBAT_WEIGHTS]
+var heal = this.getWeight('heal', 1)
+var damage = this.getWeight('damage', 2)
+var armor = this.getWeight('armor', 5)
+var shield = this.getWeight('shield', 4)
+var unset = this.getWeight('unset', 1)
+weights['shield'] = 0
+"""
+
+
+def modules():
+    return {ENTRY: tokenize(MAIN, ENTRY), WEIGHTS_MODULE: tokenize(WEIGHTS, WEIGHTS_MODULE)}
+
+
+def test_parse_weight_profiles():
+    profiles = parse_weight_profiles(tokenize(WEIGHTS))
+    assert profiles["STRENGTH"] == {'damage': '2', 'heal': '1', 'shield': '4'}
+    assert profiles["MAGIC"]["poison"] == '-0.5'
+    assert profiles["BOSS_COMBAT"] == {'heal': '1', 'unset': None}
+
+
+def test_only_calls_every_weight_map_agrees_on_are_folded():
+    folded = fold_weight_profiles("magic")(modules())
+    main = render(folded[ENTRY])
+
+    assert "var heal = (1)" in main          # Same in every profile and the default
+    assert "var armor = (5)" in main         # In no profile: always the default
+    assert "this.getWeight('damage', 2)" in main   # Magic and the boss profiles disagree
+    assert "this.getWeight('shield', 4)" in main   # Written at runtime
+    assert "this.getWeight('unset', 1)" in main    # null in a boss profile
+
+
+def test_other_build_profiles_are_dropped():
+    weights = render(fold_weight_profiles("strength")(modules())[WEIGHTS_MODULE])
+    assert "return STRENGTH_WEIGHTS" in weights
+    assert "MAGIC_WEIGHTS" not in weights
+    assert all(f"{name}_WEIGHTS" in weights for name in BOSS_PROFILES)
+
+
+def test_unknown_profile_is_rejected():
+    with pytest.raises(ValueError, match="unknown profile 'tank'"):
+        fold_weight_profiles("tank")(modules())
+
+
+def test_v8_profiles_fold():
+    sources = load_modules()
+    for name in parse_weight_profiles(sources[WEIGHTS_MODULE]):
+        if name in BOSS_PROFILES:
+            continue
+        folded = fold_weight_profiles(name)(sources)
+        weights = render(folded[WEIGHTS_MODULE])
+        assert f"return {name}_WEIGHTS" in weights
+        # Folding only removes code
+        assert sum(len(render(tokens)) for tokens in folded.values()) < \
+            sum(len(render(tokens)) for tokens in sources.values())
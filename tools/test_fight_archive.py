@@ -0,0 +1,66 @@
+"""Tests for the compressed fight archive"""
+
+import os
+
+from fight_archive import INDEX_FILE, FightArchive
+
+
+def test_put_and_get_round_trip(tmp_path):
+    archive = FightArchive(str(tmp_path), codec="gz")
+    archive.put(1, "data", {"fight": 1}, group="team_1")
+    archive.put(1, "logs", {"logs": [1, 2]})
+
+    assert archive.get(1) == {"fight": 1}
+    assert archive.get(1, "logs") == {"logs": [1, 2]}
+    assert archive.get(2) is None
+    assert archive.fight_ids(group="team_1") == [1]
+
+
+def test_segments_roll_over_when_full(tmp_path):
+    archive = FightArchive(str(tmp_path), segment_size=200, codec="gz")
+    for fight_id in range(1, 11):
+        archive.put(fight_id, "data", {"fight": fight_id, "padding": "x" * fight_id * 10})
+
+    segments = sorted(name for name in os.listdir(tmp_path) if name.startswith("segment_"))
+    assert len(segments) > 1
+    assert all(os.path.getsize(tmp_path / name) <= 200 for name in segments)
+
+    # A fresh reader finds every document through the index
+    reopened = FightArchive(str(tmp_path), segment_size=200, codec="gz")
+    assert [reopened.get(fight_id)["fight"] for fight_id in range(1, 11)] == list(range(1, 11))
+
+
+def test_rearchived_fight_points_at_the_newest_copy(tmp_path):
+    archive = FightArchive(str(tmp_path), codec="gz")
+    archive.put(1, "data", {"version": 1})
+    archive.put(1, "data", {"version": 2})
+    assert FightArchive(str(tmp_path)).get(1) == {"version": 2}
+
+
+def test_miss_rereads_an_index_changed_by_another_writer(tmp_path):
+    reader = FightArchive(str(tmp_path), codec="gz")
+    writer = FightArchive(str(tmp_path), codec="gz")
+    assert not reader.has(1)
+
+    writer.put(1, "data", {"fight": 1})
+    assert reader.has(1)
+    writer.put(2, "logs", {"logs": []})
+    assert reader.get(2, "logs") == {"logs": []}
+
+
+def test_rewritten_index_is_read_from_the_start(tmp_path):
+    reader = FightArchive(str(tmp_path), codec="gz")
+    writer = FightArchive(str(tmp_path), codec="gz")
+    writer.put(1, "data", {"fight": 1})
+    writer.put(2, "data", {"fight": 2})
+    assert reader.get(2) == {"fight": 2}
+
+    # e.g. restored from a backup with fewer fights
+    index_path = tmp_path / INDEX_FILE
+    backup = tmp_path / "index.backup"
+    backup.write_bytes(index_path.read_bytes().splitlines(keepends=True)[0])
+    os.replace(backup, index_path)
+    writer = FightArchive(str(tmp_path), codec="gz")
+    writer.put(3, "data", {"fight": 3})
+    assert reader.get(3) == {"fight": 3}
+    assert reader.fight_ids() == [1, 3]
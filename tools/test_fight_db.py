@@ -0,0 +1,157 @@
+"""Tests for fight_db: the decayed posterior and the incrementally maintained stats and rollups"""
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from fight_db import (DIFFICULTY_HALF_LIFE_DAYS, FightDatabase, add_evidence, classify, decay_factor,
+                      posterior)
+
+START = datetime(2026, 6, 1, 12, 0)
+HALF_LIFE = DIFFICULTY_HALF_LIFE_DAYS * 86400
+
+
+def fight(fight_id, opponent_id, result, hours=0, leek_id=1, level=100):
+    return {
+        'leek_id': leek_id,
+        'fight_id': fight_id,
+        'opponent_id': opponent_id,
+        'opponent_name': f"opponent_{opponent_id}",
+        'opponent_level': level,
+        'result': result,
+        'fight_url': f"https://leekwars.com/fight/{fight_id}",
+        'timestamp': START + timedelta(hours=hours),
+    }
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = FightDatabase(db_path=str(tmp_path / "fight_history.db"))
+    yield db
+    db.close()
+
+
+def test_decay_halves_evidence_every_half_life():
+    assert decay_factor(0) == 1.0
+    assert decay_factor(HALF_LIFE) == pytest.approx(0.5)
+    assert decay_factor(-HALF_LIFE) == 1.0  # Clock skew never inflates evidence
+
+
+def test_posterior_decays_towards_the_prior():
+    evidence = (0.0, 0.0, None)
+    for _ in range(4):
+        evidence = add_evidence(*evidence, 'WIN', 1000.0)
+    assert posterior(*evidence, now=1000.0) == pytest.approx((5 / 6, 4.0))
+    assert posterior(*evidence, now=1000.0 + HALF_LIFE) == pytest.approx((3 / 4, 2.0))
+    assert posterior(None, None, None) == (0.5, 0.0)
+
+    assert classify(*posterior(*evidence, now=1000.0)) == 'beatable'
+    # Old enough evidence makes the opponent unknown again
+    assert classify(*posterior(*evidence, now=1000.0 + 2 * HALF_LIFE)) == 'unknown'
+
+
+def test_late_result_is_decayed_to_the_latest_fight():
+    evidence = add_evidence(0.0, 0.0, None, 'LOSS', 1000.0 + HALF_LIFE)
+    evidence = add_evidence(*evidence, 'WIN', 1000.0)
+    assert evidence == pytest.approx((0.5, 1.0, 1000.0 + HALF_LIFE))
+
+    # Draws count half each way, and weight=-1 takes a result back out
+    evidence = add_evidence(*evidence, 'DRAW', 1000.0 + HALF_LIFE)
+    assert evidence == pytest.approx((1.0, 1.5, 1000.0 + HALF_LIFE))
+    evidence = add_evidence(*evidence, 'DRAW', 1000.0 + HALF_LIFE, weight=-1)
+    assert evidence == pytest.approx((0.5, 1.0, 1000.0 + HALF_LIFE))
+
+
+def snapshot(db):
+    """Everything record_fights maintains incrementally"""
+    tables = {}
+    for table, columns in (
+        ('opponent_stats', 'leek_id, opponent_id, opponent_name, opponent_level, wins, losses, draws, '
+                           'total_fights, win_rate, last_fought, decayed_wins, decayed_losses, decayed_at, status'),
+        ('leek_daily_stats', 'leek_id, day, wins, losses, draws, fights'),
+        ('leek_level_stats', 'leek_id, level_bucket, wins, losses, draws, fights'),
+        ('leek_status_counts', 'leek_id, status, opponents'),
+    ):
+        db.cursor.execute(f"SELECT {columns} FROM {table} ORDER BY 1, 2")
+        rows = [tuple(round(v, 9) if isinstance(v, float) else v for v in row) for row in db.cursor.fetchall()]
+        # Rollup rows that dropped to zero are equivalent to missing ones
+        tables[table] = [row for row in rows if table == 'opponent_stats' or row[-1]]
+    return tables
+
+
+def test_record_counts_and_rollups(db):
+    db.record_fights([fight(1, 10, 'WIN'), fight(2, 10, 'LOSS', 1), fight(3, 11, 'DRAW', 30, level=87)])
+
+    view = FightDatabase(1, db_path=db.db_path)
+    stats = view.get_opponent_stats(10)
+    assert (stats['wins'], stats['losses'], stats['draws'], stats['total_fights']) == (1, 1, 0, 2)
+    assert view.get_global_stats()['total_fights'] == 3
+    assert [row['fights'] for row in view.get_daily_stats()] == [1, 2]
+    assert {row['level_bucket']: row['fights'] for row in view.get_level_stats()} == {80: 1, 100: 2}
+    view.close()
+
+
+def test_rerecord_replaces_the_previous_result(db):
+    db.record_fights([fight(1, 10, 'WIN'), fight(2, 10, 'WIN', 1)])
+    db.record_fights([fight(1, 10, 'LOSS')])
+
+    view = FightDatabase(1, db_path=db.db_path)
+    stats = view.get_opponent_stats(10)
+    assert (stats['wins'], stats['losses'], stats['total_fights']) == (1, 1, 2)
+    assert view.get_global_stats()['total_fights'] == 2
+    assert db.rebuild_stats() == 0
+    view.close()
+
+
+def test_rerecord_against_another_opponent_removes_the_empty_row(db):
+    db.record_fights([fight(1, 10, 'WIN')])
+    db.record_fights([fight(1, 11, 'LOSS', 48, level=130)])
+
+    view = FightDatabase(1, db_path=db.db_path)
+    assert view.get_opponent_stats(10) is None
+    assert view.get_opponent_stats(11)['losses'] == 1
+    assert view.get_global_stats()['opponents_tracked'] == 1
+    assert {row['level_bucket']: row['fights'] for row in view.get_level_stats()} == {130: 1}
+    assert [row['day'] for row in view.get_daily_stats()] == ['2026-06-03']
+    view.close()
+
+
+def test_incremental_state_matches_a_rebuild(db):
+    rng = random.Random(5)
+    for batch in range(20):
+        records = []
+        for _ in range(10):
+            # Re-records, late-synced older fights and several leeks, in random order
+            records.append(fight(rng.randint(1, 60), rng.randint(1, 6), rng.choice(['WIN', 'LOSS', 'DRAW']),
+                                 hours=rng.uniform(0, 24 * 60), leek_id=rng.randint(1, 2),
+                                 level=rng.randint(90, 130)))
+        db.record_fights(records)
+
+    incremental = snapshot(db)
+    assert db.rebuild_stats() == 0
+    assert snapshot(db) == incremental
+
+
+def test_record_seq_increases_on_rerecord(db):
+    db.record_fights([fight(1, 10, 'WIN'), fight(2, 10, 'WIN', 1)])
+    db.record_fights([fight(1, 10, 'LOSS')])
+    db.cursor.execute("SELECT fight_id, recorded_seq FROM fight_history ORDER BY recorded_seq")
+    assert [tuple(row) for row in db.cursor.fetchall()] == [(2, 2), (1, 3)]
+
+
+def test_failed_batch_is_rolled_back(db):
+    db.record_fights([fight(1, 10, 'WIN')])
+    before = snapshot(db)
+
+    broken = fight(3, 12, 'WIN')
+    del broken['opponent_name']
+    with pytest.raises(KeyError):
+        db.record_fights([fight(2, 10, 'LOSS', 1), fight(1, 11, 'LOSS', 2), broken])
+
+    db.cursor.execute("SELECT fight_id, opponent_id, result, recorded_seq FROM fight_history")
+    assert [tuple(row) for row in db.cursor.fetchall()] == [(1, 10, 'WIN', 1)]
+    assert snapshot(db) == before
+    db.record_fights([fight(2, 10, 'LOSS', 1)])
+    db.cursor.execute("SELECT recorded_seq FROM fight_history WHERE fight_id = 2")
+    assert db.cursor.fetchone()[0] == 2
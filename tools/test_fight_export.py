@@ -0,0 +1,71 @@
+"""Tests for the incremental fight_export cursors"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from fight_db import FightDatabase
+from fight_export import FightExporter, SUMMARY_COLUMNS, load_table
+
+START = datetime(2026, 6, 1, 12, 0)
+
+
+def fight(fight_id, result, hours=0, leek_id=1, damage=None):
+    record = {
+        'leek_id': leek_id,
+        'fight_id': fight_id,
+        'opponent_id': 10 + fight_id,
+        'opponent_name': f"opponent_{fight_id}",
+        'opponent_level': 100,
+        'result': result,
+        'fight_url': f"https://leekwars.com/fight/{fight_id}",
+        'timestamp': START + timedelta(hours=hours),
+    }
+    if damage is not None:
+        record['summary'] = dict({name: 0 for name in SUMMARY_COLUMNS if name not in ('fight_id', 'leek_id')},
+                                 turns=5, damage_dealt=damage)
+        record['turns'] = []
+    return record
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = FightDatabase(db_path=str(tmp_path / "fight_history.db"))
+    yield db
+    db.close()
+
+
+def exporter(db, tmp_path):
+    return FightExporter(str(tmp_path / "analytics"), fmt="npz", db=db, archive_root=str(tmp_path / "archive"))
+
+
+def test_export_appends_only_new_fights(db, tmp_path):
+    db.record_fights([fight(1, 'WIN', damage=100), fight(2, 'LOSS', 1, damage=200)])
+    assert exporter(db, tmp_path).export()["fight_history"] == 2
+
+    db.record_fights([fight(3, 'DRAW', 2, damage=300)])
+    counts = exporter(db, tmp_path).export()
+    assert (counts["fight_history"], counts["fight_summary"]) == (1, 1)
+    assert exporter(db, tmp_path).export()["fight_history"] == 0
+
+    history = load_table("fight_history", str(tmp_path / "analytics"))
+    assert sorted(history["fight_id"].tolist()) == [1, 2, 3]
+
+
+def test_rerecorded_fight_is_exported_again(db, tmp_path):
+    # The re-recorded fight reuses the rowid of the deleted row, but gets a new seq
+    db.record_fights([fight(1, 'WIN', damage=100), fight(2, 'WIN', 1, damage=200)])
+    exporter(db, tmp_path).export()
+    db.record_fights([fight(2, 'LOSS', 1, damage=250)])
+
+    counts = exporter(db, tmp_path).export()
+    assert (counts["fight_history"], counts["fight_summary"]) == (1, 1)
+
+    root = str(tmp_path / "analytics")
+    history = load_table("fight_history", root)
+    results = dict(zip(history["fight_id"].tolist(), history["result"].tolist()))
+    assert results == {1: 1, 2: -1}
+    summaries = load_table("fight_summary", root)
+    assert dict(zip(summaries["fight_id"].tolist(), summaries["damage_dealt"].tolist())) == {1: 100, 2: 250}
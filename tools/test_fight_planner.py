@@ -0,0 +1,115 @@
+"""Tests for the fight quota planner"""
+
+import pytest
+
+from fight_planner import MIN_SHARE, FightPlanner
+
+
+class FakeDatabase:
+    """Only what FightPlanner reads: each leek's decayed (wins, losses)"""
+
+    def __init__(self, evidence):
+        self.evidence = evidence
+
+    def get_leek_evidence(self, leek_id):
+        return self.evidence.get(leek_id, (0.0, 0.0))
+
+
+def leek(leek_id, level=100, talent=None):
+    return {'id': leek_id, 'name': f"leek_{leek_id}", 'level': level, 'talent': talent}
+
+
+def stats(opponent_id, expected, evidence=5.0):
+    return {'opponent_id': opponent_id, 'expected_win_rate': expected, 'evidence': evidence}
+
+
+def test_best_leek_gets_the_rest_after_the_exploration_floor():
+    planner = FightPlanner([leek(1), leek(2), leek(3)], FakeDatabase({1: (8.0, 2.0), 2: (2.0, 8.0)}))
+    allocation = planner.plan(100)
+
+    floor = int(100 * MIN_SHARE)
+    assert allocation == {1: 100 - 2 * floor, 2: floor, 3: floor}
+
+
+def test_small_quotas_keep_one_fight_per_leek():
+    planner = FightPlanner([leek(1), leek(2), leek(3)], FakeDatabase({1: (8.0, 2.0), 2: (2.0, 8.0)}))
+    assert planner.plan(7) == {1: 5, 2: 1, 3: 1}
+    # Not enough for everyone: the floors go in rank order after the best leek
+    assert planner.plan(2) == {1: 1, 2: 0, 3: 1}
+    assert planner.plan(1) == {1: 1, 2: 0, 3: 0}
+
+
+def test_claims_follow_the_plan():
+    planner = FightPlanner([leek(1), leek(2)], FakeDatabase({1: (5.0, 0.0)}))
+    assert planner.plan(5) == {1: 4, 2: 1}
+    assert planner.claim(2)
+    assert not planner.claim(2)
+    assert all(planner.claim(1) for _ in range(4))
+    assert not planner.claim(1)
+    planner.release(1)
+    assert planner.claim(1)
+
+
+def test_retired_leeks_get_nothing():
+    planner = FightPlanner([leek(1), leek(2)], FakeDatabase({1: (5.0, 0.0)}))
+    planner.retire(1)
+    assert planner.plan(20) == {1: 0, 2: 20}
+
+
+def test_offered_opponents_drive_the_gain():
+    planner = FightPlanner([leek(1), leek(2)], FakeDatabase({1: (5.0, 5.0), 2: (5.0, 5.0)}))
+    assert planner.expected_gain(1) == pytest.approx(planner.expected_gain(2))
+
+    # Leek 1 keeps beating the opponents it is offered, leek 2 keeps losing to its own
+    planner.observe(1, [{'id': 10}, {'id': 11}], {10: stats(10, 0.9), 11: stats(11, 0.8)})
+    planner.observe(2, [{'id': 20}, {'id': 21}], {20: stats(20, 0.2), 21: stats(21, 0.1)})
+    assert planner.expected_gain(1) > planner.expected_gain(2)
+    assert planner.plan(50)[1] == 50 - int(50 * MIN_SHARE)
+
+
+def test_little_evidence_falls_back_to_the_leek_record():
+    planner = FightPlanner([leek(1)], FakeDatabase({1: (9.0, 1.0)}))
+    overall = planner.expected_gain(1)
+    planner.observe(1, [{'id': 10}], {10: stats(10, 0.1, evidence=0.5)})
+    assert planner.expected_gain(1) == pytest.approx(overall)
+
+
+def test_talent_gap_and_xp():
+    strong = {'id': 10, 'talent': 1000}
+    weak = {'id': 11, 'talent': 200}
+    planner = FightPlanner([leek(1, talent=600), leek(2, level=301, talent=600)], FakeDatabase({}))
+
+    # Beating a higher rated opponent is worth more talent
+    planner.observe(1, [strong])
+    against_strong = planner.expected_gain(1)
+    planner.observe(1, [weak])
+    assert against_strong > planner.expected_gain(1)
+
+    # Only leeks below the maximum level earn XP
+    planner.observe(2, [weak])
+    assert planner.expected_gain(1) > planner.expected_gain(2)
+
+
+def test_results_trigger_a_replan():
+    planner = FightPlanner([leek(1), leek(2)], FakeDatabase({}))
+    planner.plan(30)
+    due = [planner.record(1, 'WIN') for _ in range(10)]
+    assert due == [False] * 9 + [True]
+    assert planner.win_probability(1) > planner.win_probability(2)
+
+
+def test_worker_of_a_leek_without_fights_stops():
+    pytest.importorskip("requests")
+    from lw_solo_fights_multi import LeekWarsMultiLeekFighter
+
+    fighter = LeekWarsMultiLeekFighter(quiet=True, scout=False)
+    fighter.planner = FightPlanner([leek(1), leek(2)], FakeDatabase({1: (5.0, 0.0)}))
+    fighter.fights_remaining = 2
+    fighter.planner.plan(2)
+    assert fighter._claim_fight(2)
+
+    # Leek 2 used its floor, and the last fight is planned for the best leek
+    assert not fighter._claim_fight(2)
+    assert fighter.planner.active == {1}
+    assert fighter._claim_fight(1)
+    assert fighter.fights_remaining == 0
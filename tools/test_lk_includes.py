@@ -0,0 +1,58 @@
+"""Tests for the V8 module include graph and upload levels"""
+
+from pathlib import Path
+
+from lk_includes import build_include_graph, parse_includes, resolve_include, upload_levels
+
+V8_MODULES = Path(__file__).parent.parent / "V8_modules"
+
+
+def test_parse_includes_skips_commented_lines():
+    code = 'include("a.lk")\n  // include("b.lk")\n\tinclude( \'sub/c\' )\nvar x = "include(\'d\')"\n'
+    assert parse_includes(code) == ["a.lk", "sub/c"]
+
+
+def test_includes_resolve_relative_to_the_including_module():
+    assert resolve_include("strategy/base_strategy.lk", "../scenario_generator") == "scenario_generator.lk"
+    assert resolve_include("strategy/base_strategy.lk", "helpers.lk") == "strategy/helpers.lk"
+    assert resolve_include("main.lk", "strategy/base_strategy") == "strategy/base_strategy.lk"
+
+
+def test_build_include_graph(tmp_path):
+    (tmp_path / "strategy").mkdir()
+    (tmp_path / "main.lk").write_text('include("strategy/a")\n')
+    (tmp_path / "strategy" / "a.lk").write_text('include("../b.lk")\n')
+    (tmp_path / "b.lk").write_text("")
+
+    assert build_include_graph(tmp_path) == {
+        "b.lk": [], "main.lk": ["strategy/a.lk"], "strategy/a.lk": ["b.lk"],
+    }
+
+
+def test_levels_follow_includes_and_main_goes_last():
+    graph = {
+        "main.lk": ["a.lk", "b.lk"],
+        "a.lk": ["c.lk"],
+        "b.lk": ["c.lk", "missing.lk"],
+        "c.lk": [],
+        "d.lk": [],
+    }
+    assert upload_levels(graph, last="main.lk") == [["c.lk", "d.lk"], ["a.lk", "b.lk"], ["main.lk"]]
+
+
+def test_include_cycles_share_a_level():
+    graph = {"a.lk": ["b.lk"], "b.lk": ["a.lk"], "c.lk": [], "d.lk": ["a.lk"]}
+    assert upload_levels(graph) == [["c.lk"], ["a.lk", "b.lk", "d.lk"]]
+
+
+def test_v8_modules_upload_after_their_includes():
+    graph = build_include_graph(V8_MODULES)
+    levels = upload_levels(graph, last="main.lk")
+
+    assert levels[-1] == ["main.lk"]
+    assert sorted(module for level in levels for module in level) == sorted(graph)
+    level_of = {module: index for index, level in enumerate(levels) for module in level}
+    for module, deps in graph.items():
+        for dep in deps:
+            if dep in graph and dep != module:
+                assert level_of[dep] < level_of[module], f"{module} is uploaded before {dep}"
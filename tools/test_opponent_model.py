@@ -0,0 +1,74 @@
+"""Tests for the opponent model's training samples and cursor"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from fight_db import FightDatabase
+from opponent_model import OpponentModel, training_samples, update_model
+
+START = datetime(2026, 6, 1, 12, 0)
+
+
+def fight(fight_id, opponent_id, result, hours=0, leek_id=1):
+    return {
+        'leek_id': leek_id,
+        'fight_id': fight_id,
+        'opponent_id': opponent_id,
+        'opponent_name': f"opponent_{opponent_id}",
+        'opponent_level': 100,
+        'result': result,
+        'fight_url': f"https://leekwars.com/fight/{fight_id}",
+        'timestamp': START + timedelta(hours=hours),
+    }
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = FightDatabase(db_path=str(tmp_path / "fight_history.db"))
+    db.update_leek_info("leek", 100, leek_id=1)
+    yield db
+    db.close()
+
+
+def test_features_only_see_earlier_fights(db):
+    db.record_fights([fight(1, 10, 'WIN'), fight(2, 10, 'WIN', 1), fight(3, 10, 'LOSS', 2)])
+    samples = {seq: (x, y) for seq, x, y in training_samples(db)}
+
+    first, second, third = samples[1][0], samples[2][0], samples[3][0]
+    assert (first['record'], first['evidence']) == (0.0, 0.0)
+    assert second['record'] > 0 and second['evidence'] == pytest.approx(0.1, rel=1e-2)
+    assert third['record'] > second['record']
+    assert samples[3][1] == 0.0
+
+    # A fight synced late but fought first is seen by the later fights, and sees none of them
+    db.record_fights([fight(4, 10, 'LOSS', -1)])
+    replayed = {seq: x for seq, x, _ in training_samples(db)}
+    assert replayed[1]['evidence'] > 0
+    assert replayed[4] == first
+
+
+def test_fights_at_the_same_time_do_not_see_each_other(db):
+    db.record_fights([fight(1, 10, 'WIN'), fight(2, 10, 'LOSS'), fight(3, 11, 'WIN', 0)])
+    assert all(x['evidence'] == 0.0 for _, x, _ in training_samples(db))
+
+
+def test_incremental_samples_match_a_full_replay(db):
+    db.record_fights([fight(n, 10 + n % 3, 'WIN' if n % 2 else 'LOSS', n) for n in range(1, 13)])
+    full = {seq: x for seq, x, _ in training_samples(db)}
+    new = training_samples(db, after_seq=8)
+    assert [seq for seq, _, _ in new] == [9, 10, 11, 12]
+    assert all(full[seq] == x for seq, x, _ in new)
+
+
+def test_update_model_follows_recorded_seq(db):
+    db.record_fights([fight(n, 10, 'WIN', n) for n in range(1, 6)])
+    model, added = update_model(db)
+    assert (added, model.trained_seq) == (5, 5)
+    assert update_model(db)[1] == 0
+
+    # Re-recording fight 5 keeps its rowid but is trained on again
+    db.record_fights([fight(5, 10, 'LOSS', 5)])
+    model, added = update_model(db)
+    assert (added, model.trained_seq, model.samples) == (1, 6, 6)
+    assert OpponentModel.load(db).trained_seq == 6
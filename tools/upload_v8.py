@@ -3,28 +3,114 @@
 V8 upload script - Creates structure and uploads V8 modules
 Adapted from V7 uploader for the modular V8 architecture
 
+Only modules whose content changed since the last upload are saved; hashes
+and server AI ids are kept in upload_manifest_<account>.json next to this
+script.
+
+Modules are uploaded concurrently through a shared rate limiter, level by
+level along the include('...') graph: a module is saved only after the
+modules it includes, and main.lk always last. A failed module is retried on
+its own without restarting the deploy; if it still fails, the later levels
+and the main.lk recompile are skipped so nothing is saved against a stale
+include.
+
 Usage:
     python3 upload_v8.py              # Upload to main account
     python3 upload_v8.py --account cure  # Upload to cure account
+    python3 upload_v8.py --force      # Re-upload every module
+    python3 upload_v8.py --workers 2 --rate 1  # Gentler on the API
+    python3 upload_v8.py --build      # Upload the minified build (see build_v8.py)
 """
 
 import os
 import sys
 import json
 import time
-import requests
+import hashlib
 import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, Optional
-from config_loader import load_credentials
+from config_loader import load_credentials, get_api_url
+from lk_includes import build_include_graph, upload_levels
+from rate_limiter import RateLimiter, RateLimitedSession
+
+
+def content_hash(code: str) -> str:
+    """Stable hash of a module's source"""
+    return hashlib.sha256(code.encode('utf-8')).hexdigest()
+
 
 class V8Uploader:
-    def __init__(self):
-        self.base_url = "https://leekwars.com/api"
-        self.session = requests.Session()
+    def __init__(self, manifest_path: Optional[Path] = None, force: bool = False,
+                 workers: int = 4, rate: float = 2.0, max_attempts: int = 3):
+        self.base_url = get_api_url()
+        self.session = RateLimitedSession(RateLimiter(rate))
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.lock = threading.Lock()
         self.token = None
         self.farmer = None
         self.folder_ids = {}
+        self.manifest_path = manifest_path
+        self.force = force
+        self.manifest = self.load_manifest()
+        self.main_ai_id = None
+
+    def load_manifest(self) -> Dict:
+        """Load module -> {hash, ai_id} from the last upload"""
+        if self.manifest_path and self.manifest_path.exists():
+            try:
+                with open(self.manifest_path, 'r') as f:
+                    return json.load(f)
+            except (OSError, json.JSONDecodeError):
+                print(f"⚠️  Ignoring unreadable manifest: {self.manifest_path}")
+        return {"modules": {}}
+
+    def save_manifest(self):
+        """Write the manifest atomically"""
+        if not self.manifest_path:
+            return
+        tmp_path = self.manifest_path.with_suffix(".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(self.manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    def upload_module(self, key: str, name: str, code: str, folder_id: int, existing_ais: list, stats: Dict) -> Optional[int]:
+        """Upload one module unless the manifest says the server already has this exact code
+
+        Thread-safe; a failed upload is retried up to max_attempts times.
+        """
+        digest = content_hash(code)
+        with self.lock:
+            stats["total"] += 1
+            entry = self.manifest["modules"].get(key)
+        server_ai_id = self.find_ai(name, folder_id, existing_ais) if existing_ais else None
+
+        if (not self.force and entry and entry.get("hash") == digest
+                and server_ai_id and entry.get("ai_id") == server_ai_id):
+            with self.lock:
+                stats["unchanged"] += 1
+            return server_ai_id
+
+        ai_id = None
+        for attempt in range(1, self.max_attempts + 1):
+            ai_id = self.create_or_update_ai_script(name, code, folder_id, existing_ais)
+            if ai_id or attempt == self.max_attempts:
+                break
+            delay = 2 ** attempt
+            print(f"      🔁 Retrying {key} in {delay}s (attempt {attempt + 1}/{self.max_attempts})")
+            time.sleep(delay)
+
+        with self.lock:
+            if ai_id:
+                stats["success"] += 1
+                self.manifest["modules"][key] = {"hash": digest, "ai_id": ai_id}
+                self.save_manifest()
+            else:
+                stats["failed"] += 1
+        return ai_id
 
     def login(self, email: str, password: str) -> bool:
         """Login to LeekWars"""
@@ -198,10 +284,23 @@ class V8Uploader:
             return False
         self.folder_ids["V8"] = folder_v8
 
-        stats = {"total": 0, "success": 0, "failed": 0}
+        stats = {"total": 0, "success": 0, "failed": 0, "unchanged": 0}
+
+        # Step 3: Create or get the strategy and math folders
+        print("\n3️⃣ Setting up module folders...")
+        module_folders = {"": folder_v8}
+        for subfolder in ("strategy", "math"):
+            if not (v8_dir / subfolder).exists():
+                print(f"   ⚠️  No {subfolder} directory found")
+                continue
+            folder_id = self.create_or_get_folder(subfolder, folder_v8, existing_folders)
+            if folder_id:
+                self.folder_ids[subfolder] = folder_id
+                module_folders[subfolder] = folder_id
+            else:
+                print(f"   ⚠️  Failed to create {subfolder} folder")
 
-        # Step 3: Upload root-level V8 modules
-        print("\n3️⃣ Uploading root-level modules...")
+        # Step 4: Upload every module, dependencies before the modules including them
         root_modules = [
             "main",
             "game_entity",
@@ -235,104 +334,61 @@ class V8Uploader:
             "beam_search",
         ]
 
+        module_keys = []
         for module_name in root_modules:
-            module_file = v8_dir / f"{module_name}.lk"
-            if module_file.exists():
-                stats["total"] += 1
-                with open(module_file, 'r', encoding='utf-8') as f:
-                    code = f.read()
-                # Include .lk extension in the uploaded name
-                ai_id = self.create_or_update_ai_script(f"{module_name}.lk", code, folder_v8, existing_ais)
-                if ai_id:
-                    stats["success"] += 1
-                else:
-                    stats["failed"] += 1
-                time.sleep(1.0)
+            if (v8_dir / f"{module_name}.lk").exists():
+                module_keys.append(f"{module_name}.lk")
             else:
                 print(f"   ⚠️  Missing: {module_name}.lk")
-
-        # Step 4: Create strategy folder and upload strategy modules
-        print("\n4️⃣ Uploading strategy modules...")
-        strategy_folder = self.create_or_get_folder("strategy", folder_v8, existing_folders)
-        if not strategy_folder:
-            print("   ⚠️  Failed to create strategy folder")
-        else:
-            self.folder_ids["strategy"] = strategy_folder
-
-            # Upload strategy modules (excluding OLD_BACKUP files)
-            strategy_path = v8_dir / "strategy"
-            if strategy_path.exists():
-                strategy_files = sorted(strategy_path.glob("*.lk"))
-                # Filter out backup files
-                strategy_files = [f for f in strategy_files if "OLD_BACKUP" not in f.name and "BACKUP" not in f.name]
-
-                print(f"   Found {len(strategy_files)} strategy modules to upload")
-
-                for module_file in strategy_files:
-                    # Keep full filename including .lk extension
-                    module_name = module_file.name
-                    stats["total"] += 1
-
-                    with open(module_file, 'r', encoding='utf-8') as f:
-                        code = f.read()
-
-                    ai_id = self.create_or_update_ai_script(module_name, code, strategy_folder, existing_ais)
-
-                    if ai_id:
-                        stats["success"] += 1
-                    else:
-                        stats["failed"] += 1
-
-                    time.sleep(1.0)
-            else:
-                print("   ⚠️  No strategy directory found")
-
-        # Step 5: Create math folder and upload math modules
-        print("\n5️⃣ Uploading math modules...")
-        math_folder = self.create_or_get_folder("math", folder_v8, existing_folders)
-        if not math_folder:
-            print("   ⚠️  Failed to create math folder")
-        else:
-            self.folder_ids["math"] = math_folder
-
-            # Upload math modules (excluding README/markdown files)
-            math_path = v8_dir / "math"
-            if math_path.exists():
-                math_files = sorted(math_path.glob("*.lk"))
-
-                print(f"   Found {len(math_files)} math modules to upload")
-
-                for module_file in math_files:
-                    # Keep full filename including .lk extension
-                    module_name = module_file.name
-                    stats["total"] += 1
-
-                    with open(module_file, 'r', encoding='utf-8') as f:
-                        code = f.read()
-
-                    ai_id = self.create_or_update_ai_script(module_name, code, math_folder, existing_ais)
-
-                    if ai_id:
-                        stats["success"] += 1
-                    else:
-                        stats["failed"] += 1
-
-                    time.sleep(1.0)
-            else:
-                print("   ⚠️  No math directory found")
-
-        # Step 6: Re-save main.lk to force recompilation with updated includes
+        for subfolder in ("strategy", "math"):
+            if subfolder in module_folders:
+                # Skip backup copies of strategy modules
+                module_keys.extend(f"{subfolder}/{f.name}" for f in sorted((v8_dir / subfolder).glob("*.lk"))
+                                   if "BACKUP" not in f.name)
+
+        modules = {}
+        for key in module_keys:
+            with open(v8_dir / key, 'r', encoding='utf-8') as f:
+                code = f.read()
+            subfolder, _, name = key.rpartition("/")
+            # Include .lk extension in the uploaded name
+            modules[key] = (name, code, module_folders[subfolder])
+
+        levels = upload_levels(build_include_graph(v8_dir, module_keys), last="main.lk")
+        print(f"\n4️⃣ Uploading {len(modules)} modules in {len(levels)} dependency levels "
+              f"({self.workers} workers)...")
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for index, level in enumerate(levels, 1):
+                print(f"   🔗 Level {index}/{len(levels)}: {len(level)} modules")
+                # A level only starts once everything it includes has been saved
+                results = executor.map(
+                    lambda key: (key, self.upload_module(key, *modules[key], existing_ais, stats)), level)
+                for key, ai_id in results:
+                    if key == "main.lk":
+                        self.main_ai_id = ai_id
+                if stats["failed"]:
+                    skipped = sum(len(later) for later in levels[index:])
+                    print(f"   ⛔ {stats['failed']} modules failed - skipping the {skipped} modules "
+                          f"of the remaining levels")
+                    break
+
+        # Step 5: Re-save main.lk to force recompilation with updated includes
         # Append a version comment to guarantee the code differs from cached version
-        print("\n6️⃣ Re-saving main.lk to recompile with updated includes...")
         main_file = v8_dir / "main.lk"
-        if main_file.exists():
+        if stats["failed"]:
+            print("\n5️⃣ Upload incomplete - skipping main.lk recompile")
+        elif stats["success"] == 0:
+            print("\n5️⃣ Nothing changed - skipping main.lk recompile")
+        elif main_file.exists():
+            print("\n5️⃣ Re-saving main.lk to recompile with updated includes...")
             with open(main_file, 'r', encoding='utf-8') as f:
                 main_code = f.read()
             # Add timestamp comment to force server recompilation
             import datetime
             ts = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
             resave_code = main_code.rstrip() + f"\n// build: {ts}\n"
-            main_ai_id = self.find_ai("main.lk", folder_v8, existing_ais)
+            main_ai_id = self.main_ai_id or self.find_ai("main.lk", folder_v8, existing_ais)
             if main_ai_id:
                 save_response = self.session.post(
                     f"{self.base_url}/ai/save",
@@ -342,15 +398,18 @@ class V8Uploader:
                     print(f"   ✅ main.lk recompiled (ID: {main_ai_id}, build: {ts})")
                 else:
                     print(f"   ❌ Failed to recompile main.lk")
-            time.sleep(1.0)
 
         # Summary
         print("\n" + "="*60)
         print("📊 UPLOAD COMPLETE")
         print("="*60)
         print(f"✅ Successfully uploaded: {stats['success']}/{stats['total']} modules")
+        if stats['unchanged'] > 0:
+            print(f"⏭️  Unchanged (skipped): {stats['unchanged']} modules")
         if stats['failed'] > 0:
             print(f"❌ Failed: {stats['failed']} modules")
+        if self.main_ai_id:
+            print(f"🆔 Script ID: {self.main_ai_id}")
 
         print("\n📁 V8 structure in LeekWars:")
         print("   8.0/")
@@ -401,7 +460,7 @@ class V8Uploader:
         print("   main.lk - Entry point with build detection")
         print("   include() statements: include('game_entity'), include('strategy/base_strategy')")
 
-        return stats['success'] > 0
+        return stats['failed'] == 0 and (stats['success'] + stats['unchanged']) > 0
 
     def disconnect(self):
         """Disconnect from LeekWars"""
@@ -414,6 +473,14 @@ def main():
     parser = argparse.ArgumentParser(description='Upload V8 modules to LeekWars')
     parser.add_argument('--account', default='main', choices=['main', 'cure'],
                         help='Account to use (main or cure, default: main)')
+    parser.add_argument('--force', action='store_true',
+                        help='Re-upload every module even if unchanged')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='Concurrent module uploads (default: 4)')
+    parser.add_argument('--rate', type=float, default=2.0,
+                        help='Request budget in requests per second (default: 2)')
+    parser.add_argument('--build', action='store_true',
+                        help='Upload minified modules from build/ instead of the sources')
     args = parser.parse_args()
 
     # Get V8_modules path relative to script location
@@ -424,6 +491,16 @@ def main():
         print("❌ V8_modules directory not found")
         sys.exit(1)
 
+    if args.build:
+        from build_v8 import build, print_stats
+        try:
+            entry_path, build_stats = build(v8_dir)
+        except (OSError, ValueError) as e:
+            print(f"❌ Build failed: {e}")
+            sys.exit(1)
+        print_stats(entry_path, build_stats)
+        v8_dir = entry_path.parent
+
     # Count total modules
     total_modules = 0
     root_modules = ["main", "game_entity", "item", "field_map", "field_map_core",
@@ -451,7 +528,8 @@ def main():
     print(f"🏗️  Architecture: Action queue pattern + build-specific strategies")
     print(f"👤 Account: {args.account}")
 
-    uploader = V8Uploader()
+    manifest_path = script_dir / f"upload_manifest_{args.account}.json"
+    uploader = V8Uploader(manifest_path, force=args.force, workers=args.workers, rate=args.rate)
 
     # Login with credentials from config
     email, password = load_credentials(account=args.account)